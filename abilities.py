@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, Iterator, Tuple
+
+# Mob special abilities; append-only, a name's position is its bit in AbilitySet masks
+MOB_ABILITIES = (
+    "armor_plating", "dodge_mastery", "feint_attack", "trap_spawn", "magic_dampening",
+    "spell_corruption", "stamina_drain", "exhaustion_aura", "pattern_prediction",
+    "counter_strike", "chaos_corruption"
+)
+ABILITY_BITS = {name: 1 << bit for bit, name in enumerate(MOB_ABILITIES)}
+
+_names_by_mask: Dict[int, Tuple[str, ...]] = {0: ()}
+
+def ability_mask(names: Iterable[str]) -> int:
+    """Bitmask for ability names"""
+    mask = 0
+    for name in names:
+        mask |= ABILITY_BITS[name]
+    return mask
+
+def ability_names(mask: int) -> Tuple[str, ...]:
+    """Ability names in a mask, in MOB_ABILITIES order (cached per mask)"""
+    names = _names_by_mask.get(mask)
+    if names is None:
+        names = tuple(name for name, bit in ABILITY_BITS.items() if mask & bit)
+        _names_by_mask[mask] = names
+    return names
+
+class AbilitySet:
+    """Mob abilities as a bitmask; reads like the old list of ability names"""
+    
+    __slots__ = ("mask",)
+    
+    def __init__(self, mask: int = 0):
+        self.mask = mask
+    
+    def add(self, name: str):
+        self.mask |= ABILITY_BITS[name]
+    
+    def names(self) -> Tuple[str, ...]:
+        """Ability names, translated only when displayed or chosen from"""
+        return ability_names(self.mask)
+    
+    def __contains__(self, name: object) -> bool:
+        bit = ABILITY_BITS.get(name)
+        return bit is not None and bool(self.mask & bit)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(ability_names(self.mask))
+    
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+    
+    def __bool__(self) -> bool:
+        return self.mask != 0
+    
+    def __repr__(self) -> str:
+        return f"AbilitySet({list(self.names())})"
+    
+    def __getstate__(self) -> int:
+        return self.mask
+    
+    def __setstate__(self, state: int):
+        self.mask = state
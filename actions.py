@@ -0,0 +1,82 @@
+import threading
+from enum import IntEnum
+from typing import Optional
+
+class Action(IntEnum):
+    """Player actions as small ints; each value is also the action's intern code"""
+    UNKNOWN = 0
+    EXPLORE = 1
+    ATTACK = 2
+    DODGE = 3
+    HEAL = 4
+    FLEE = 5
+    INVENTORY = 6
+    STATS = 7
+    SPECIAL = 7  # 's' opens stats outside combat and is the class ability inside it
+    TALK = 8
+    EXIT = 9
+    EXIT_GAME = 10
+    TEST = 11
+    STUNNED = 12
+    FLED = 13
+    KILL = 14
+    NEURAL_VEIL = 15
+    ESSENCE_DRAIN = 16
+
+# Input/history token for each action, indexed by code
+ACTION_TOKENS = (
+    "?", "explore", "a", "d", "h", "f", "i", "s", "t", "exit", "exit_game", "test",
+    "stunned", "flee", "kill", "neural_veil", "essence_drain"
+)
+ACTION_BY_TOKEN = {token: Action(code) for code, token in enumerate(ACTION_TOKENS)}
+
+# Process-wide intern table, seeded so known tokens intern to their Action value;
+# typed input is arbitrary, so codes for anything else are capped
+ACTION_NAMES = list(ACTION_TOKENS)
+ACTION_CODES = {token: code for code, token in enumerate(ACTION_TOKENS)}
+ACTION_OVERFLOW = 255  # Shared code for actions seen after the table fills
+_intern_lock = threading.Lock()  # Session threads intern concurrently
+
+_FNV_OFFSET = 0x811C9DC5
+_FNV_PRIME = 0x01000193
+
+def stable_hash(text: str) -> int:
+    """32-bit FNV-1a of the UTF-8 text; unlike hash(), identical in every process"""
+    h = _FNV_OFFSET
+    for byte in text.encode("utf-8"):
+        h = ((h ^ byte) * _FNV_PRIME) & 0xFFFFFFFF
+    return h
+
+# Normalized action id fed to the generators, precomputed per code: a fixed
+# table for Actions, stable_hash() for other input
+ACTION_FEATURES = [code / 100.0 for code in range(len(ACTION_TOKENS))]
+
+def parse_action(token: str) -> Action:
+    """Action for an input token (UNKNOWN for anything else)"""
+    return ACTION_BY_TOKEN.get(token, Action.UNKNOWN)
+
+def intern_action(action: str) -> int:
+    """Small int code for an action string"""
+    code = ACTION_CODES.get(action)
+    if code is not None:
+        return code
+    with _intern_lock:
+        code = ACTION_CODES.get(action)
+        if code is None:
+            if len(ACTION_NAMES) >= ACTION_OVERFLOW:
+                return ACTION_OVERFLOW
+            code = len(ACTION_NAMES)
+            ACTION_FEATURES.append(stable_hash(action) % 100 / 100.0)
+            ACTION_NAMES.append(action)
+            ACTION_CODES[action] = code  # Published last
+    return code
+
+def action_name(code: int) -> str:
+    """Action string for an interned code"""
+    return ACTION_NAMES[code] if code < len(ACTION_NAMES) else "?"
+
+def action_feature(code: Optional[int]) -> float:
+    """Normalized (0-1) action id for the state vector"""
+    if code is None or code >= len(ACTION_FEATURES):
+        return ACTION_FEATURES[Action.UNKNOWN]
+    return ACTION_FEATURES[code]
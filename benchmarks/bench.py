@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Terminal Souls micro-benchmarks.
+Times the Entity's generators and the per-turn hot paths, and writes the results as JSON
+so a run can be kept as a baseline and compared against later.
+
+    python3 benchmarks/bench.py                                  # Run everything
+    python3 benchmarks/bench.py --out benchmarks/results/baseline.json
+    python3 benchmarks/bench.py --compare benchmarks/results/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import itertools
+import subprocess
+import tracemalloc
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import torch
+
+from entity_ai import EntityAI, InferenceBatcher
+from player import Player
+from combat import Combat
+from room import RoomManager
+from utils import format_stats_display
+
+BATCH_SIZES = (1, 8, 64, 512)
+VECTOR_POOL = 1024  # Distinct player vectors cycled through, so per-vector caches mostly miss
+DEFAULT_OUT = os.path.join(ROOT, "benchmarks", "results", "latest.json")
+
+# Generator -> arguments after the player vector
+GENERATOR_ARGS = {
+    "generate_chapter_blueprint": (1,),
+    "generate_mob": (2,),
+    "generate_item": (2,),
+    "generate_boss": (2,),
+    "generate_lore": (2, "whisper"),
+    "generate_shop": (2, 100),
+    "generate_layout": (2,),
+    "generate_trap": (2,),
+    "generate_ui_distort": (),
+    "generate_whisper": (),
+    "generate_psychological_profile": ({"betrayals": 1, "deaths": 3},),
+}
+
+BENCHMARKS = {}  # name -> setup(context) returning the operation to time
+
+def benchmark(name: str):
+    """Register a benchmark setup function"""
+    def register(setup: Callable[[Dict[str, Any]], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def make_vectors(count: int, seed: int = 0) -> List[List[float]]:
+    """Reproducible 20-dim player vectors"""
+    rng = random.Random(seed)
+    return [[rng.random() for _ in range(20)] for _ in range(count)]
+
+def generator_benchmark(method: str, batch: int):
+    """N players calling one generator at once; batches go through an InferenceBatcher like the server"""
+    args = GENERATOR_ARGS[method]
+    
+    def setup(context: Dict[str, Any]) -> Callable[[], Any]:
+        vectors = itertools.cycle(context["vectors"])
+        if batch == 1:
+            generate = getattr(context["entity_ai"], method)
+            return lambda: generate(next(vectors), *args)
+        
+        generate = getattr(context["batched_entity_ai"], method)
+        pool = context["pools"].get(batch)
+        if pool is None:
+            pool = context["pools"][batch] = ThreadPoolExecutor(max_workers=batch)
+        call = lambda vector: generate(vector, *args)
+        return lambda: list(pool.map(call, [next(vectors) for _ in range(batch)]))
+    
+    setup.batch = batch
+    return setup
+
+for _method in GENERATOR_ARGS:
+    for _batch in BATCH_SIZES:
+        BENCHMARKS[f"entity.{_method}[b={_batch}]"] = generator_benchmark(_method, _batch)
+
+@benchmark("player.state_vector")
+def bench_state_vector(context):
+    return context["player"].state_vector
+
+@benchmark("player.update_predictability")
+def bench_update_predictability(context):
+    player = Player("Bench", "Rogue")
+    actions = itertools.cycle(["a", "d", "a", "h", "explore", "s", "a", "f", "t", "zz"])
+    return lambda: player.update_predictability(next(actions))
+
+@benchmark("combat.select_enemy_action")
+def bench_select_enemy_action(context):
+    combat = Combat(context["entity_ai"])
+    combat.player_patterns = bytearray(b"\x02\x02\x03\x04\x02")
+    patterns = ["strike", "feint", "counter_attack", "area_attack", "interrupt", "pressure"]
+    player = context["player"]
+    return lambda: combat.select_enemy_action(patterns, player)
+
+@benchmark("room.generate_floor_layout")
+def bench_generate_floor_layout(context):
+    rooms = RoomManager(context["entity_ai"])
+    vectors = itertools.cycle(context["vectors"])
+    return lambda: rooms.generate_floor_layout(2, next(vectors))
+
+@benchmark("utils.format_stats_display")
+def bench_format_stats_display(context):
+    player = context["player"]
+    player.skills = ["Neural Veil"]
+    return lambda: format_stats_display(player)
+
+def measure(operation: Callable[[], Any], min_time_s: float, min_ops: int, max_ops: int) -> Dict[str, float]:
+    """Per-operation wall times (perf_counter_ns) until both the time and count floors are met"""
+    for _ in range(3):
+        operation()  # Warm up caches, lazy imports, thread pools
+    
+    samples = []
+    clock = time.perf_counter_ns
+    deadline = time.perf_counter() + min_time_s
+    while len(samples) < max_ops and (len(samples) < min_ops or time.perf_counter() < deadline):
+        start = clock()
+        operation()
+        samples.append(clock() - start)
+    
+    samples.sort()
+    total_s = sum(samples) / 1e9
+    return {
+        "ops": len(samples),
+        "ops_per_sec": len(samples) / total_s if total_s else float("inf"),
+        "p50_us": samples[len(samples) // 2] / 1e3,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1e3,
+    }
+
+def measure_allocations(operation: Callable[[], Any], ops: int) -> Dict[str, float]:
+    """tracemalloc view of one operation: transient peak and bytes still held afterwards"""
+    tracemalloc.start()
+    try:
+        operation()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        for _ in range(ops):
+            operation()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"alloc_peak_bytes": peak - base, "alloc_retained_bytes_per_op": (current - base) / ops}
+
+def environment() -> Dict[str, Any]:
+    """What the numbers were measured on"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "torch": torch.__version__,
+        "numpy": np.__version__,
+        "torch_threads": torch.get_num_threads(),
+    }
+
+def run(names: List[str], min_time_s: float, alloc_ops: int) -> Dict[str, Any]:
+    random.seed(0)
+    np.random.seed(0)
+    torch.manual_seed(0)
+    
+    batcher = InferenceBatcher(window_s=0.0005, max_batch=max(BATCH_SIZES))
+    entity_ai = EntityAI()
+    context = {
+        "entity_ai": entity_ai,
+        "batched_entity_ai": EntityAI(batcher=batcher),
+        "player": Player("Bench", "Warrior"),
+        "vectors": make_vectors(VECTOR_POOL),
+        "pools": {},
+    }
+    
+    results = {}
+    try:
+        # Game code prints as it goes; keep that out of the measurements and the report
+        with open(os.devnull, "w") as devnull:
+            for name in names:
+                setup = BENCHMARKS[name]
+                batch = getattr(setup, "batch", 1)
+                with contextlib.redirect_stdout(devnull):
+                    operation = setup(context)
+                    result = measure(operation, min_time_s, min_ops=10, max_ops=200000)
+                    result.update(measure_allocations(operation, max(1, alloc_ops // batch)))
+                result["batch"] = batch
+                result["items_per_sec"] = result["ops_per_sec"] * batch
+                results[name] = result
+                print(f"  {name:<52} {result['ops_per_sec']:>12.1f} ops/s  p50 {result['p50_us']:>10.1f}us  "
+                      f"p99 {result['p99_us']:>10.1f}us", file=sys.stderr)
+    finally:
+        for pool in context["pools"].values():
+            pool.shutdown()
+        batcher.stop()
+    
+    return {"environment": environment(), "results": results}
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print throughput/latency changes against a baseline; returns the regressed benchmarks"""
+    regressions = []
+    print(f"{'benchmark':<52} {'ops/s':>12} {'baseline':>12} {'change':>8} {'p99 change':>10}")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<52} {result['ops_per_sec']:>12.1f} {'-':>12} {'new':>8}")
+            continue
+        change = result["ops_per_sec"] / old["ops_per_sec"] - 1.0
+        p99_change = result["p99_us"] / old["p99_us"] - 1.0 if old["p99_us"] else 0.0
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<52} {result['ops_per_sec']:>12.1f} {old['ops_per_sec']:>12.1f} "
+              f"{change:>+8.1%} {p99_change:>+10.1%}{flag}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Terminal Souls micro-benchmarks")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds spent timing each benchmark")
+    parser.add_argument("--alloc-ops", type=int, default=64, help="Items traced for allocation stats")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a stored results file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Throughput drop (fraction) reported as a regression by --compare")
+    args = parser.parse_args(argv)
+    
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if not names:
+        parser.error(f"no benchmark matches {args.filter!r}")
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    
+    report = run(names, args.min_time, args.alloc_ops)
+    
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}", file=sys.stderr)
+    
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
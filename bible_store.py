@@ -0,0 +1,212 @@
+import json
+import os
+import sys
+import atexit
+import weakref
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+
+try:
+    import fcntl
+    LOCKING_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    try:
+        import msvcrt
+        LOCKING_AVAILABLE = True
+    except ImportError:
+        LOCKING_AVAILABLE = False
+
+_live_stores = weakref.WeakSet()  # Flushed once at exit; a store goes when its EntityAI does
+
+@atexit.register
+def _flush_live_stores():
+    for store in list(_live_stores):
+        store.flush()
+
+def user_data_dir() -> str:
+    """Per-user directory for files the game writes ($XDG_DATA_HOME, %APPDATA% on Windows)"""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "terminal_souls")
+
+class BibleStore:
+    """Snapshot + append-only journal persistence for the mutable game bible"""
+    
+    # Phrases live in the JSON snapshot; mutations go to a JSONL journal next to
+    # it, coalesced on a debounce timer and compacted back into the snapshot.
+    # Snapshots are written via temp file + fsync + rename under a lock file.
+    # A missing snapshot starts from the read-only seed file (the shipped bible).
+    
+    def __init__(self, path: str, seed_path: Optional[str] = None, debounce_s: float = 2.0,
+                 compact_every: int = 64, edits_kept: int = 50):
+        self.path = path
+        self.seed_path = seed_path  # Never written
+        base, _ = os.path.splitext(path)
+        self.journal_path = f"{base}.journal.jsonl"
+        self.lock_path = f"{path}.lock"
+        self.debounce_s = debounce_s
+        self.compact_every = compact_every
+        self.edits_kept = edits_kept  # Recent edits kept in the snapshot; older ones only count
+        
+        self._pending = []  # Edits waiting for the debounce timer
+        self._timer = None
+        self._mutex = threading.Lock()
+        _live_stores.add(self)
+    
+    def load(self, default: Dict[str, Any]) -> Dict[str, Any]:
+        """Load snapshot + journal, creating the snapshot from the seed file (or `default`) if missing"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._file_lock():
+            bible = self._read_snapshot()
+            if bible is None:
+                bible = (self._read_snapshot(self.seed_path) if self.seed_path else None) or default
+                self._write_snapshot(bible)
+            for edit in self._read_journal():
+                self.apply_edit(bible, edit)
+        return bible
+    
+    def apply_edit(self, bible: Dict[str, Any], edit: Dict[str, Any]):
+        """Apply one journaled mutation to an in-memory bible"""
+        phrases = bible["phrases"]
+        index = edit.get("index")
+        if index is None or not 0 <= index < len(phrases):
+            # Edits from older logs carry no index - locate the phrase instead
+            index = phrases.index(edit["original"]) if edit["original"] in phrases else None
+        if index is not None:
+            phrases[index] = edit["mutated"]
+        
+        edits_log = bible.setdefault("edits_log", [])
+        bible["edit_count"] = bible.get("edit_count", len(edits_log)) + 1
+        edits_log.append(edit)
+        if len(edits_log) > self.edits_kept:
+            del edits_log[:-self.edits_kept]
+    
+    def record_edit(self, edit: Dict[str, Any]):
+        """Queue a mutation for the journal; writes are coalesced on a timer"""
+        with self._mutex:
+            self._pending.append(edit)
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def flush(self):
+        """Append queued mutations to the journal, compacting when it grows long"""
+        with self._mutex:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return
+        
+        with self._file_lock():
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                for edit in pending:
+                    f.write(json.dumps(edit, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            
+            if len(self._read_journal()) >= self.compact_every:
+                self._compact_locked()
+    
+    def compact(self):
+        """Fold the journal into a fresh snapshot"""
+        self.flush()
+        with self._file_lock():
+            self._compact_locked()
+    
+    def _compact_locked(self):
+        """Rebuild the snapshot from disk state so every writer's edits survive"""
+        bible = self._read_snapshot()
+        if bible is None:
+            return
+        for edit in self._read_journal():
+            self.apply_edit(bible, edit)
+        self._write_snapshot(bible)
+        self._truncate_journal()
+    
+    def _read_snapshot(self, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        path = path or self.path
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            bible = json.load(f)
+        bible.setdefault("edits_log", [])
+        bible.setdefault("edit_count", len(bible["edits_log"]))
+        return bible
+    
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.journal_path):
+            return []
+        edits = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    edits.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # Torn final write from a crash - everything before it is intact
+        return edits
+    
+    def _write_snapshot(self, bible: Dict[str, Any]):
+        """Atomic write: temp file in the same directory, fsync, rename"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".game_bible.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(bible, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._fsync_directory(directory)
+    
+    def _truncate_journal(self):
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _fsync_directory(self, directory: str):
+        """Persist the rename itself (POSIX only)"""
+        if sys.platform == "win32":
+            return
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive cross-process lock around snapshot/journal access"""
+        if not LOCKING_AVAILABLE:
+            yield
+            return
+        
+        with open(self.lock_path, "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,106 @@
+import time
+import threading
+from typing import Any, Dict, Optional, TextIO
+
+VIRTUAL_WAIT_LIMIT = 30.0  # Real seconds a VirtualClock waits for an input nothing is scripting
+
+class RealClock:
+    """Wall-clock time: sleeps and timeouts really wait"""
+    
+    def now(self) -> float:
+        return time.monotonic()
+    
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+    
+    def wait(self, event: threading.Event, timeout: Optional[float] = None,
+             start: Optional[float] = None) -> bool:
+        """Wait for an event; False if the timeout (counted from `start`, default now) ran out first"""
+        if timeout is not None and start is not None:
+            timeout = max(0.0, timeout - (self.now() - start))
+        return event.wait(timeout)
+
+class VirtualClock:
+    """Simulated time for headless runs and replays: waiting advances it instantly"""
+    
+    def __init__(self, start: float = 0.0, real_wait_limit: float = VIRTUAL_WAIT_LIMIT):
+        self._now = start
+        self.real_wait_limit = real_wait_limit
+        self._lock = threading.Lock()  # Input threads advance it too
+    
+    def now(self) -> float:
+        return self._now
+    
+    def advance(self, seconds: float):
+        """Move simulated time forward (e.g. an input script modelling think time)"""
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+    
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+    
+    def wait(self, event: threading.Event, timeout: Optional[float] = None,
+             start: Optional[float] = None) -> bool:
+        """Block until the event fires, then judge the timeout in simulated time
+        
+        Whatever sets the event accounts for the time it took by advancing the
+        clock first (see ScriptedInput), so a late answer still times out,
+        deterministically. If nothing answers within real_wait_limit real seconds
+        (an unscripted source, such as a person at stdin) the wait times out and
+        the clock moves to the deadline.
+        """
+        if start is None:
+            start = self._now
+        if not event.wait(self.real_wait_limit):
+            if timeout is not None:
+                self.advance(start + timeout - self._now)
+            return False
+        return timeout is None or self._now - start <= timeout
+    
+    def __getstate__(self) -> Dict[str, float]:
+        return {"_now": self._now, "real_wait_limit": self.real_wait_limit}
+    
+    def __setstate__(self, state: Dict[str, float]):
+        self._now = state["_now"]
+        self.real_wait_limit = state.get("real_wait_limit", VIRTUAL_WAIT_LIMIT)
+        self._lock = threading.Lock()
+
+class ScriptedInput:
+    """Scripted stdin for simulated runs: each line read costs think time on a VirtualClock
+    
+    A line "@2.5 a" answers "a" after 2.5 simulated seconds; other lines take
+    `think_s`. The clock is advanced before the line is returned, so timed
+    prompts judge the answer against their limit in simulated time.
+    """
+    
+    def __init__(self, stream: TextIO, clock: VirtualClock, think_s: float = 1.0):
+        self.stream = stream
+        self.clock = clock
+        self.think_s = think_s
+        self.lines = 0  # Lines answered so far
+    
+    def readline(self, *args: Any) -> str:
+        line = self.stream.readline()
+        if not line:
+            return ""  # End of script: input() raises EOFError
+        think_s = self.think_s
+        if line.startswith("@"):
+            delay, _, rest = line[1:].partition(" ")
+            try:
+                think_s = float(delay)
+                line = rest
+            except ValueError:
+                pass
+        self.clock.advance(think_s)
+        self.lines += 1
+        return line
+    
+    def isatty(self) -> bool:
+        return False
+    
+    def close(self):
+        self.stream.close()
+
+REAL_CLOCK = RealClock()  # Default for everything that is not handed a clock
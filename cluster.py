@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Terminal Souls process-pool supervisor.
+Sessions are sharded across worker processes by a consistent hash of their id;
+every worker maps the same generator weights. The supervisor owns the game bible:
+workers start from its copy, treat it as read-only, and send mutations to the
+supervisor, which journals the ones it accepts and broadcasts them to every worker.
+"""
+
+import os
+import sys
+import copy
+import uuid
+import signal
+import bisect
+import asyncio
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from typing import Any, Dict, Iterable, Optional
+
+from bible_store import BibleStore
+from entity_ai import EntityAI, InferenceBatcher, DEFAULT_GAME_BIBLE, GAME_BIBLE_PATH, GAME_BIBLE_STATE_PATH
+from server import GameServer, SessionStream, PARK_AFTER_S
+
+class HashRing:
+    """Consistent hash ring mapping session ids to worker indexes"""
+    
+    def __init__(self, nodes: Iterable[int] = (), replicas: int = 64):
+        self.replicas = replicas  # Virtual points per node, evens out the shards
+        self._points = []
+        self._nodes = []
+        for node in nodes:
+            self.add(node)
+    
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Stable across processes and runs, unlike hash()
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+    
+    def add(self, node: int):
+        """Add a node; only keys on its new arcs move to it"""
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            i = bisect.bisect(self._points, point)
+            self._points.insert(i, point)
+            self._nodes.insert(i, node)
+    
+    def remove(self, node: int):
+        """Remove a node; its keys move to the next node round the ring"""
+        kept = [(point, n) for point, n in zip(self._points, self._nodes) if n != node]
+        self._points = [point for point, _ in kept]
+        self._nodes = [n for _, n in kept]
+    
+    def node_for(self, key: str) -> int:
+        """Node owning a key"""
+        if not self._points:
+            raise LookupError("hash ring is empty")
+        i = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._nodes[i]
+
+def worker_main(index: int, weights_path: str, conn, batch_window_s: float, stack_kb: int,
+                park_after_s: Optional[float], whisper_spill_dir: Optional[str], bible: Dict[str, Any], bible_conn):
+    """Worker process body: a handoff-mode GameServer on an ephemeral localhost port"""
+    threading.stack_size(stack_kb * 1024)
+    sys.stdout = SessionStream(sys.stdout)
+    sys.stdin = SessionStream(sys.stdin)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The supervisor decides when workers stop
+    
+    batcher = InferenceBatcher(window_s=batch_window_s)
+    entity_ai = EntityAI(whisper_spill_dir=whisper_spill_dir, batcher=batcher, weights_path=weights_path)
+    
+    # Read-only bible: the supervisor's copy, changed only by the edits it broadcasts
+    entity_ai.use_game_bible(bible)
+    send_lock = threading.Lock()  # Session threads propose edits concurrently
+    def propose_edit(edit: Dict[str, Any]):
+        with send_lock:
+            bible_conn.send(("edit", edit))
+    entity_ai.bible_sink = propose_edit
+    threading.Thread(target=_worker_bible_updates, args=(entity_ai, bible_conn), daemon=True).start()
+    
+    server = GameServer(entity_ai, handoff=True, park_after_s=park_after_s)
+    try:
+        asyncio.run(_worker_serve(server, conn))
+    finally:
+        batcher.stop()
+
+def _worker_bible_updates(entity_ai: EntityAI, bible_conn):
+    """Apply the bible edits the supervisor accepted, in the order it accepted them"""
+    while True:
+        try:
+            _, edit = bible_conn.recv()
+        except (EOFError, OSError):
+            return  # Supervisor is gone
+        entity_ai.apply_bible_edit(edit)
+
+async def _worker_serve(server: GameServer, conn):
+    loop = asyncio.get_running_loop()
+    listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+    conn.send(("ready", listener.sockets[0].getsockname()[1]))
+    
+    try:
+        command = await loop.run_in_executor(None, conn.recv)
+    except EOFError:
+        command = None  # Supervisor is gone
+    
+    listener.close()
+    if command == "drain":
+        conn.send(("drained", await server.drain()))
+
+class WorkerHandle:
+    """Supervisor-side record of one worker process"""
+    
+    def __init__(self, process, conn, port: int, bible_conn):
+        self.process = process
+        self.conn = conn
+        self.port = port
+        self.bible_conn = bible_conn  # Edit proposals in, accepted edits out
+
+class ClientLink:
+    """Supervisor-side relay between one client and the worker hosting its session"""
+    
+    def __init__(self, session_id: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.session_id = session_id
+        self.reader = reader
+        self.writer = writer
+        self.upstream = None
+        self.handing_off = False  # Upstream EOF during a handoff must not hang up the client
+        self.flowing = asyncio.Event()  # Cleared while the session moves between workers
+        self.relay_task = None
+    
+    async def relay_from_worker(self, reader: asyncio.StreamReader):
+        """Worker -> client"""
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                self.writer.write(data)
+                await self.writer.drain()
+        except ConnectionError:
+            pass
+        if not self.handing_off and not self.writer.is_closing():
+            self.writer.close()  # Game over, or the worker died
+    
+    async def relay_from_client(self):
+        """Client -> worker, held back while a handoff is in progress"""
+        try:
+            while True:
+                data = await self.reader.read(65536)
+                if not data:
+                    break
+                await self.flowing.wait()
+                self.upstream.write(data)
+                await self.upstream.drain()
+        except ConnectionError:
+            pass
+        if self.upstream is not None and not self.upstream.is_closing():
+            self.upstream.close()
+
+class Supervisor:
+    """Shards sessions over worker processes and hot-restarts workers with session handoff"""
+    
+    def __init__(self, workers: int, weights_path: Optional[str] = None,
+                 batch_window_s: float = 0.002, stack_kb: int = 512,
+                 park_after_s: Optional[float] = PARK_AFTER_S, whisper_spill_dir: Optional[str] = None):
+        self.worker_count = workers
+        self.weights_path = weights_path
+        self.batch_window_s = batch_window_s
+        self.stack_kb = stack_kb
+        self.park_after_s = park_after_s
+        self.whisper_spill_dir = whisper_spill_dir
+        self.ring = HashRing(range(workers))
+        self.workers = {}  # index -> WorkerHandle
+        self.available = {}  # index -> asyncio.Event, cleared while that worker restarts
+        self.links = {}  # session id -> ClientLink
+        self._context = multiprocessing.get_context("spawn")
+        self._owns_weights = False
+        
+        # The one writable copy of the game bible
+        self.bible_store = BibleStore(GAME_BIBLE_STATE_PATH, seed_path=GAME_BIBLE_PATH)
+        self.bible = None
+        self.bible_conns = {}  # index -> supervisor end of that worker's bible pipe
+    
+    def prepare_weights(self):
+        """Export one set of generator weights for every worker to map"""
+        if self.weights_path and os.path.exists(self.weights_path):
+            return
+        if not self.weights_path:
+            fd, self.weights_path = tempfile.mkstemp(prefix="terminal_souls_weights_", suffix=".f32")
+            os.close(fd)
+            self._owns_weights = True
+        EntityAI().export_weights(self.weights_path)
+    
+    async def start_worker(self, index: int):
+        loop = asyncio.get_running_loop()
+        parent_conn, child_conn = self._context.Pipe()
+        bible_conn, child_bible_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, self.weights_path, child_conn, self.batch_window_s, self.stack_kb,
+                  self.park_after_s, self.whisper_spill_dir, self.bible, child_bible_conn),
+            name=f"terminal-souls-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        child_bible_conn.close()
+        # Registered before any await: edits accepted from here on queue in the pipe
+        # behind the bible copy the worker was started with
+        self.bible_conns[index] = bible_conn
+        threading.Thread(target=self._bible_proposals, args=(loop, bible_conn), daemon=True).start()
+        
+        _, port = await loop.run_in_executor(None, parent_conn.recv)
+        self.workers[index] = WorkerHandle(process, parent_conn, port, bible_conn)
+        self.available.setdefault(index, asyncio.Event()).set()
+    
+    def _bible_proposals(self, loop: asyncio.AbstractEventLoop, bible_conn):
+        """Reader thread: hand one worker's edit proposals to the event loop"""
+        while True:
+            try:
+                _, edit = bible_conn.recv()
+            except (EOFError, OSError):
+                return  # Worker exited
+            loop.call_soon_threadsafe(self.accept_edit, edit)
+    
+    def accept_edit(self, edit: Dict[str, Any]):
+        """Apply, journal and broadcast a worker's edit unless another one got there first"""
+        phrases = self.bible["phrases"]
+        index = edit.get("index")
+        if index is None or not 0 <= index < len(phrases) or phrases[index] != edit["original"]:
+            return  # Stale: the phrase already changed
+        if self.bible.get("edit_count", 0) >= edit["death_count"]:
+            return  # The bible has already caught up with that death count
+        self.bible_store.apply_edit(self.bible, edit)
+        self.bible_store.record_edit(edit)
+        for index, bible_conn in list(self.bible_conns.items()):
+            try:
+                bible_conn.send(("edit", edit))
+            except (BrokenPipeError, OSError):
+                self.bible_conns.pop(index, None)  # Exited; its replacement starts from self.bible
+    
+    async def attach(self, link: ClientLink, header: bytes):
+        """Connect a client to the worker owning its session id"""
+        index = self.ring.node_for(link.session_id)
+        await self.available[index].wait()
+        
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.workers[index].port)
+        writer.write(header)
+        await writer.drain()
+        
+        link.upstream = writer
+        link.handing_off = False
+        link.relay_task = asyncio.create_task(link.relay_from_worker(reader))
+        link.flowing.set()
+    
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        link = ClientLink(uuid.uuid4().hex, reader, writer)
+        self.links[link.session_id] = link
+        try:
+            await self.attach(link, f"SESSION {link.session_id}\n".encode("ascii"))
+            await link.relay_from_client()
+        finally:
+            self.links.pop(link.session_id, None)
+    
+    async def restart_worker(self, index: int):
+        """Hot restart: suspend the worker's sessions, replace the process, resume them"""
+        loop = asyncio.get_running_loop()
+        self.available[index].clear()
+        links = [link for link in self.links.values() if self.ring.node_for(link.session_id) == index]
+        for link in links:
+            link.flowing.clear()
+            link.handing_off = True
+        
+        old = self.workers.pop(index)
+        self.bible_conns.pop(index, None)
+        snapshots = {}
+        if old.process.is_alive():
+            old.conn.send("drain")
+            try:
+                _, snapshots = await loop.run_in_executor(None, old.conn.recv)
+            except EOFError:
+                pass  # Died mid-drain; its sessions are lost
+        await loop.run_in_executor(None, old.process.join)
+        
+        await self.start_worker(index)
+        for link in links:
+            data = snapshots.get(link.session_id)
+            if data is None:
+                link.writer.close()  # Finished (or lost) while the worker was draining
+                continue
+            await self.attach(link, f"RESUME {link.session_id} {len(data)}\n".encode("ascii") + data)
+    
+    async def rolling_restart(self):
+        """Restart every worker one at a time (e.g. to pick up new code)"""
+        for index in sorted(self.workers):
+            await self.restart_worker(index)
+    
+    async def watch_workers(self, interval_s: float = 1.0):
+        """Replace workers that exit unexpectedly"""
+        while True:
+            await asyncio.sleep(interval_s)
+            for index, worker in list(self.workers.items()):
+                if self.available[index].is_set() and not worker.process.is_alive():
+                    print(f"Worker {index} exited ({worker.process.exitcode}); restarting")
+                    await self.restart_worker(index)
+    
+    async def serve(self, host: str, port: int):
+        await asyncio.gather(*(self.start_worker(index) for index in range(self.worker_count)))
+        
+        # SIGHUP rolls the workers; SIGINT/SIGTERM shut down (POSIX - Ctrl+C still works elsewhere)
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        if hasattr(signal, "SIGHUP"):
+            loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self.rolling_restart()))
+        for name in ("SIGINT", "SIGTERM"):
+            try:
+                loop.add_signal_handler(getattr(signal, name), stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        
+        watcher = asyncio.create_task(self.watch_workers())
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Terminal Souls supervisor listening on {host}:{port} with {self.worker_count} workers")
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            watcher.cancel()
+    
+    def run(self, host: str, port: int):
+        self.prepare_weights()
+        self.bible = self.bible_store.load(copy.deepcopy(DEFAULT_GAME_BIBLE))
+        try:
+            asyncio.run(self.serve(host, port))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for worker in self.workers.values():
+                worker.process.terminate()
+            self.bible_store.flush()
+            if self._owns_weights and os.path.exists(self.weights_path):
+                os.remove(self.weights_path)
@@ -3,6 +3,10 @@ import time
 import torch
 from typing import Dict, List, Any, Optional
 
+from actions import Action, parse_action
+from clock import REAL_CLOCK
+from profiling import profiled
+
 from utils import (
     input_manager, ui_distorter, narrator_filter, colorize_text,
     press_enter_to_continue
@@ -11,11 +15,12 @@ from utils import (
 class Combat:
     """Turn-based AI-enhanced combat system"""
     
-    def __init__(self, entity_ai):
+    def __init__(self, entity_ai, clock=None):
         self.entity_ai = entity_ai
+        self.clock = clock or REAL_CLOCK  # VirtualClock in simulations: pauses cost nothing
         self.current_enemy = None
         self.combat_round = 0
-        self.player_patterns = []
+        self.player_patterns = bytearray()  # Action codes this encounter
         self.boss_phase = 1
         self.enemy_next_actions = []  # Show enemy actions first in turn-based
         
@@ -23,7 +28,7 @@ class Combat:
         """Start turn-based combat encounter"""
         self.current_enemy = enemy
         self.combat_round = 0
-        self.player_patterns = []
+        self.player_patterns = bytearray()
         self.enemy_next_actions = []
         
         enemy_health = enemy["stats"]["vit"] * 10
@@ -53,15 +58,9 @@ class Combat:
             # TURN-BASED: Show enemy's planned action first
             enemy_action_preview = self.show_enemy_action_preview(player, enemy)
             
-            # Get player response to enemy action
+            # Get player response to enemy action ("f" has no handler: the turn is lost, as it always was)
             player_action = self.get_turn_based_action(player, enemy_action_preview)
             
-            if player_action == "flee":
-                if self.attempt_flee(player, enemy, is_boss):
-                    return "fled"
-                else:
-                    player_action = "stunned"  # Failed flee becomes stun
-            
             # Execute turn sequence
             turn_result = self.execute_turn_sequence(player, enemy, player_action, enemy_health, enemy_max_health)
             
@@ -96,7 +95,7 @@ class Combat:
             3: "Phase 3: Desperation - final gambit unleashed"
         }
         
-        print(f"{colorize_text('Boss Phases:', 'yellow')}")
+        print(f"{colorize_text('Boss Phases:', 'yellow', cache=True)}")
         for phase, desc in phase_descriptions.items():
             print(f"  {colorize_text(f'{phase}.', 'yellow')} {desc}")
     
@@ -120,7 +119,7 @@ class Combat:
         if not self.enemy_next_actions:
             self.generate_enemy_action_preview(player, enemy)
         
-        print(f"\n{colorize_text('Enemy Action Preview:', 'red')}")
+        print(f"\n{colorize_text('Enemy Action Preview:', 'red', cache=True)}")
         print(f"{colorize_text(enemy['name'], 'red')} prepares to:")
         
         selected_action = random.choice(self.enemy_next_actions)
@@ -128,7 +127,7 @@ class Combat:
         # Show the action with threat level
         threat_color = "red" if selected_action["threat_level"] > 7 else "yellow" if selected_action["threat_level"] > 4 else "green"
         
-        print(f"  {colorize_text('→', 'red')} {selected_action['description']}")
+        print(f"  {colorize_text('→', 'red', cache=True)} {selected_action['description']}")
         threat_level = selected_action["threat_level"]
         print(f"  Threat Level: {colorize_text(f'{threat_level}/10', threat_color)}")
         
@@ -136,13 +135,13 @@ class Combat:
         if enemy.get("special_abilities", []):
             abilities = enemy["special_abilities"]
             if any(ability in abilities for ability in ["armor_plating", "feint_attack", "pattern_prediction"]):
-                print(f"  {colorize_text('⚠️  Special abilities detected', 'warning')}")
+                print(f"  {colorize_text('⚠️  Special abilities detected', 'warning', cache=True)}")
         
         return selected_action
     
-    def get_turn_based_action(self, player, enemy_action_preview: Dict[str, Any]) -> str:
+    def get_turn_based_action(self, player, enemy_action_preview: Dict[str, Any]) -> Action:
         """Get player action in response to enemy preview"""
-        print(f"\n{colorize_text('Your Response Options:', 'cyan')}")
+        print(f"\n{colorize_text('Your Response Options:', 'cyan', cache=True)}")
         
         options = [
             ("a", "Attack", "Deal damage to the enemy"),
@@ -158,17 +157,17 @@ class Combat:
             print(f"  {colorize_text(key.upper(), 'cyan')} - {colorize_text(name, 'white')}: {desc}")
             print(f"      Effectiveness vs enemy action: {effectiveness_text}")
         
-        print(f"\n{colorize_text('Choose your response (a/d/h/s/f):', 'white')}")
+        print(f"\n{colorize_text('Choose your response (a/d/h/s/f):', 'white', cache=True)}")
         
         while True:
             try:
                 choice = input().strip().lower()
                 if choice in ['a', 'd', 'h', 's', 'f']:
-                    return choice
+                    return parse_action(choice)
                 else:
-                    print(f"{colorize_text('Invalid choice. Use a/d/h/s/f', 'red')}")
+                    print(f"{colorize_text('Invalid choice. Use a/d/h/s/f', 'red', cache=True)}")
             except (KeyboardInterrupt, EOFError):
-                return "f"  # Default to flee on interrupt
+                return Action.FLEE  # Default to flee on interrupt
     
     def calculate_action_effectiveness(self, player_action: str, enemy_action: Dict[str, Any]) -> int:
         """Calculate how effective player action is against enemy action"""
@@ -188,13 +187,13 @@ class Combat:
     def get_effectiveness_text(self, effectiveness: int) -> str:
         """Convert effectiveness number to descriptive text"""
         if effectiveness >= 8:
-            return colorize_text("Excellent", "green")
+            return colorize_text("Excellent", "green", cache=True)
         elif effectiveness >= 6:
-            return colorize_text("Good", "yellow")
+            return colorize_text("Good", "yellow", cache=True)
         elif effectiveness >= 4:
-            return colorize_text("Fair", "white")
+            return colorize_text("Fair", "white", cache=True)
         else:
-            return colorize_text("Poor", "red")
+            return colorize_text("Poor", "red", cache=True)
     
     def get_action_description(self, action: str, enemy: Dict[str, Any]) -> str:
         """Get descriptive text for enemy action"""
@@ -230,24 +229,19 @@ class Combat:
         threat_modifier = (enemy_str - 5) // 2
         return max(1, min(10, base_threat + threat_modifier))
     
-    def execute_turn_sequence(self, player, enemy: Dict[str, Any], player_action: str, enemy_health: int, enemy_max_health: int) -> Dict[str, Any]:
+    @profiled("combat.execute_turn_sequence")
+    def execute_turn_sequence(self, player, enemy: Dict[str, Any], player_action: Action, enemy_health: int, enemy_max_health: int) -> Dict[str, Any]:
         """Execute the turn sequence and return results"""
         print(f"\n{colorize_text('═══ TURN EXECUTION ═══', 'yellow')}")
         
         # Step 1: Player acts first
         print(f"{colorize_text('Player Action:', 'green')}")
-        player_damage = 0
-        
-        if player_action == "a":
-            player_damage = self.player_attack(player, enemy)
-        elif player_action == "d":
-            self.player_dodge(player)
-        elif player_action == "h":
-            self.player_heal(player)
-        elif player_action == "s":
-            player_damage = self.player_special_ability(player, enemy)
-        elif player_action == "stunned":
+        
+        if player_action == Action.STUNNED:
             print(f"{colorize_text('You are stunned and cannot act!', 'red')}")
+            player_damage = 0
+        else:
+            player_damage = self.perform_player_action(player, player_action, enemy) or 0
             
         # Apply player damage
         enemy_health -= player_damage
@@ -408,7 +402,6 @@ class Combat:
         print(f"{colorize_text('SHIELD WALL! Prepared for the next attack!', 'green')}")
         print(f"{colorize_text('Next enemy attack will be heavily reduced and reflected!', 'yellow')}")
         
-        # Would need to set a temporary effect flag
         player.shield_wall_active = True
         return 0  # No direct damage
     
@@ -430,7 +423,7 @@ class Combat:
         print(f"{colorize_text(f'Dealt {damage} damage, gained {stolen_health} HP and {stolen_stamina} stamina!', 'green')}")
         return damage
     
-    def get_combat_action(self, player) -> str:
+    def get_combat_action(self, player) -> Action:
         """Get player combat action with UI corruption"""
         actions = ["a - Attack", "d - Dodge", "h - Heal", "f - Flee"]
         
@@ -438,7 +431,7 @@ class Combat:
         actions = ui_distorter.shuffle_choices(actions)
         
         print(f"\n{colorize_text('Combat Round ' + str(self.combat_round), 'yellow')}")
-        print(f"{colorize_text('Choose action:', 'white')}")
+        print(f"{colorize_text('Choose action:', 'white', cache=True)}")
         
         for action in actions:
             print(f"  {action}")
@@ -448,16 +441,16 @@ class Combat:
         raw_input = input_manager.get_timed_input("", [], time_limit)
         
         if raw_input is None:
-            print(f"{colorize_text('Hesitation costs you dearly!', 'red')}")
-            return "stunned"
+            print(f"{colorize_text('Hesitation costs you dearly!', 'red', cache=True)}")
+            return Action.STUNNED
         
         # Apply phantom inputs
-        processed_input = ui_distorter.apply_phantom_input(raw_input)
+        action = parse_action(ui_distorter.apply_phantom_input(raw_input))
         
         # Track patterns for AI learning
-        self.player_patterns.append(processed_input)
+        self.player_patterns.append(action)
         
-        return processed_input
+        return action
     
     def calculate_combat_time_limit(self) -> int:
         """Calculate dynamic time limit"""
@@ -470,21 +463,35 @@ class Combat:
             
         return max(3, base_time)
     
-    def process_player_action(self, player, action: str, enemy: Dict[str, Any]) -> int:
+    # Player combat action -> (handler method name, whether it takes the enemy)
+    PLAYER_ACTIONS = {
+        Action.ATTACK: ("player_attack", True),
+        Action.DODGE: ("player_dodge", False),
+        Action.HEAL: ("player_heal", False),
+        Action.SPECIAL: ("player_special_ability", True),
+    }
+    
+    def perform_player_action(self, player, action: Action, enemy: Dict[str, Any]) -> Optional[int]:
+        """Run the handler for a player action; returns damage dealt, None if it has no handler"""
+        handler = self.PLAYER_ACTIONS.get(action)
+        if handler is None:
+            return None
+        name, takes_enemy = handler
+        method = getattr(self, name)
+        return (method(player, enemy) if takes_enemy else method(player)) or 0
+    
+    def process_player_action(self, player, action: Action, enemy: Dict[str, Any]) -> int:
         """Process player combat action"""
-        damage_dealt = 0
-        
-        if action == "a" or action == "attack":
-            damage_dealt = self.player_attack(player, enemy)
-        elif action == "d" or action == "dodge":
-            self.player_dodge(player)
-        elif action == "h" or action == "heal":
-            self.player_heal(player)
-        elif action == "stunned":
+        if action == Action.STUNNED:
             print(f"{colorize_text('You are stunned by indecision!', 'red')}")
-        else:
+            return 0
+        if action == Action.SPECIAL:
+            action = Action.UNKNOWN  # Real-time combat has no special ability
+        
+        damage_dealt = self.perform_player_action(player, action, enemy)
+        if damage_dealt is None:
             print(f"{colorize_text('Invalid action in combat!', 'red')}")
-            
+            return 0
         return damage_dealt
     
     def player_attack(self, player, enemy: Dict[str, Any]) -> int:
@@ -621,11 +628,11 @@ class Combat:
             recent_actions = self.player_patterns[-3:]
             
             # Counter predictable patterns
-            if recent_actions.count("a") >= 2:  # Player spams attack
+            if recent_actions.count(Action.ATTACK) >= 2:  # Player spams attack
                 base_patterns.extend(["counter_attack", "feint"])
-            if recent_actions.count("d") >= 2:  # Player spams dodge
+            if recent_actions.count(Action.DODGE) >= 2:  # Player spams dodge
                 base_patterns.extend(["area_attack", "predict_dodge"])
-            if recent_actions.count("h") >= 2:  # Heal spam
+            if recent_actions.count(Action.HEAL) >= 2:  # Heal spam
                 base_patterns.extend(["interrupt", "pressure"])
         
         return base_patterns
@@ -640,9 +647,9 @@ class Combat:
             
             if pattern == "strike":
                 weight = 2.0
-            elif pattern == "feint" and hasattr(player, 'next_dodge_successful'):
+            elif pattern == "feint":
                 weight = 3.0 if player.next_dodge_successful else 1.0
-            elif pattern == "counter_attack" and "a" in self.player_patterns[-1:]:
+            elif pattern == "counter_attack" and Action.ATTACK in self.player_patterns[-1:]:
                 weight = 4.0
             elif pattern == "area_attack":
                 weight = 2.5
@@ -676,7 +683,7 @@ class Combat:
             action_desc = f"{enemy['name']} strikes with corrupted force!"
             
         elif action == "feint":
-            if hasattr(player, 'next_dodge_successful') and player.next_dodge_successful:
+            if player.next_dodge_successful:
                 damage = enemy_str + enemy_dex + random.randint(5, 12)
                 action_desc = f"{enemy['name']} feints and strikes your exposed flank!"
                 player.next_dodge_successful = False
@@ -692,8 +699,7 @@ class Combat:
             # Ignores dodge
             damage = enemy_str + random.randint(8, 15)
             action_desc = f"{enemy['name']} unleashes a wide, sweeping attack!"
-            if hasattr(player, 'next_dodge_successful'):
-                player.next_dodge_successful = False
+            player.next_dodge_successful = False
                 
         elif action == "interrupt":
             damage = enemy_str // 2
@@ -725,7 +731,7 @@ class Combat:
             action_desc = f"{enemy['name']} attacks!"
         
         # Apply dodge if successful
-        if hasattr(player, 'next_dodge_successful') and player.next_dodge_successful and action != "area_attack":
+        if player.next_dodge_successful and action != "area_attack":
             damage = damage // 3
             action_desc += f" But you dodge most of the damage!"
             player.next_dodge_successful = False
@@ -749,7 +755,7 @@ class Combat:
     
     def show_combat_status(self, player, enemy: Dict[str, Any], enemy_health: int, enemy_max_health: int):
         """Show combat status"""
-        print(f"\n{colorize_text('--- Combat Status ---', 'yellow')}")
+        print(f"\n{colorize_text('--- Combat Status ---', 'yellow', cache=True)}")
         print(f"Player: {colorize_text(f'{player.health}/{player.max_health}', 'green')} HP, {colorize_text(f'{player.stamina}/{player.max_stamina}', 'yellow')} Stamina")
         print(f"{enemy['name']}: {colorize_text(f'{enemy_health}/{enemy_max_health}', 'red')} HP")
         
@@ -759,13 +765,13 @@ class Combat:
             if whisper:
                 print(f"\n{narrator_filter.add_whisper(whisper)}")
         
-        time.sleep(1)
+        self.clock.sleep(1)
 
 class BossCombat(Combat):
     """Enhanced combat for boss encounters"""
     
-    def __init__(self, entity_ai):
-        super().__init__(entity_ai)
+    def __init__(self, entity_ai, clock=None):
+        super().__init__(entity_ai, clock)
         self.boss_phase = 1
         self.phase_triggers = []
         
@@ -835,23 +841,15 @@ class BossCombat(Combat):
             
         press_enter_to_continue()
     
+    @profiled("combat.boss_combat_round")
     def boss_combat_round(self, player, boss: Dict[str, Any], boss_health: int, boss_max_health: int) -> Dict[str, Any]:
         """Enhanced boss combat round"""
         self.combat_round += 1
         
         # Player action with enhanced pressure
         player_action = self.get_boss_combat_action(player, boss)
-        if player_action == "flee":
-            # Boss fights usually don't allow fleeing, but EntityAI might
-            flee_allowed = self.entity_ai.calculate_entity_bias(player.state_vector()) < 0.3
-            if flee_allowed:
-                player.flee_encounter()
-                return {"result": "fled"}
-            else:
-                print(f"{colorize_text('The Entity blocks your escape!', 'red')}")
-                player_action = "stunned"
         
-        # Process player action
+        # Process player action ("f" has no handler: there is no fleeing a boss)
         player_damage = self.process_player_action(player, player_action, boss)
         boss_health -= player_damage
         
@@ -870,7 +868,7 @@ class BossCombat(Combat):
         
         return {"boss_health": boss_health, "player_died": False}
     
-    def get_boss_combat_action(self, player, boss: Dict[str, Any]) -> str:
+    def get_boss_combat_action(self, player, boss: Dict[str, Any]) -> Action:
         """Get player action in boss combat with extra pressure"""
         # Shorter time limits for boss fights
         base_time = 5
@@ -917,13 +915,13 @@ class BossCombat(Combat):
         elif special == "adaptive_counter":
             # Counter player's most used action
             if self.player_patterns:
-                most_common = max(set(self.player_patterns), key=self.player_patterns.count)
+                most_common = max(set(self.player_patterns), key=self.player_patterns.count)  # Action code
                 counter_damage = boss["stats"]["str"] + 10
                 
                 counters = {
-                    "a": "The boss has learned your attack patterns!",
-                    "d": "The boss predicts your dodges perfectly!",
-                    "h": "The boss punishes your healing attempts!"
+                    Action.ATTACK: "The boss has learned your attack patterns!",
+                    Action.DODGE: "The boss predicts your dodges perfectly!",
+                    Action.HEAL: "The boss punishes your healing attempts!"
                 }
                 
                 message = counters.get(most_common, "The boss adapts to your strategy!")
@@ -936,7 +934,7 @@ class BossCombat(Combat):
     
     def show_boss_status(self, player, boss: Dict[str, Any], boss_health: int, boss_max_health: int):
         """Show enhanced boss status"""
-        print(f"\n{colorize_text('=== BOSS BATTLE STATUS ===', 'red')}")
+        print(f"\n{colorize_text('=== BOSS BATTLE STATUS ===', 'red', cache=True)}")
         print(f"Player: {colorize_text(f'{player.health}/{player.max_health}', 'green')} HP, {colorize_text(f'{player.stamina}/{player.max_stamina}', 'yellow')} Stamina")
         
         # Boss health bar
@@ -954,4 +952,4 @@ class BossCombat(Combat):
             if whisper:
                 print(f"\n{narrator_filter.add_whisper(whisper)}")
         
-        time.sleep(1.5)
+        self.clock.sleep(1.5)
@@ -4,7 +4,24 @@ import numpy as np
 import random
 import json
 import os
-from typing import Dict, List, Any, Tuple
+import gzip
+import copy
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from collections import Counter, deque, OrderedDict
+from types import MappingProxyType
+from typing import Callable, Dict, List, Any, Mapping, Tuple, Optional, Iterator
+
+from abilities import AbilitySet, ABILITY_BITS
+from bible_store import BibleStore, user_data_dir
+from lore_index import LoreCorpus
+from narrator import ReplaceAll
+from records import ItemRecord, MobRecord, ITEM_STATS, item_template, mob_template
+from profiling import profiled
+
+GENERATOR_SCALE = 10  # Generator outputs span 0..GENERATOR_SCALE
 
 class GeneratorMLP(nn.Module):
     """Lightweight MLP for procedural generation"""
@@ -18,14 +35,267 @@ class GeneratorMLP(nn.Module):
         )
     
     def forward(self, x):
-        return self.network(x) * 10  # Scale to 0-10 range
+        return self.network(x) * GENERATOR_SCALE  # Scale to 0-10 range
+
+# Generator attribute names; their order is the layout of exported weight files
+GENERATOR_NAMES = ("mob_gen", "item_gen", "boss_gen", "lore_gen", "shop_gen",
+                   "layout_gen", "trap_gen", "ui_gen", "chapter_gen")
+
+# Per-player EntityAI attributes (everything else is shared between sessions)
+SESSION_FIELDS = ("mutation_deaths_seen", "whisper_archive", "player_adaptation_history",
+                  "current_chapter_blueprint", "chaos_mode_active")
+
+# Chapter blueprint: generator output bins (np.digitize) -> chapter type
+CHAPTER_COUNT = 9
+CHAPTER_TYPES = ("safe", "combat", "shop", "miniboss", "boss")
+CHAPTER_THRESHOLDS = np.array([2.5, 5.0, 7.0, 8.5])
+CHAPTER_SAFE, CHAPTER_MINIBOSS, CHAPTER_BOSS = 0, 3, 4
+MIDPOINT_CHAPTERS = (3, 6)  # Indexes that roll for a miniboss
+CORRUPTION_TYPES = ("phantom_enemies", "reversed_controls", "reality_glitch", "time_distortion")
+BLUEPRINT_QUANTUM = 100  # Blueprint cache keys round the player vector to 1/100
+BLUEPRINT_CACHE_SIZE = 512
+
+# Mob generation tables
+MOB_ABILITY_PAIRS = (  # Abilities a mob gains together when countering one player trait
+    ABILITY_BITS["armor_plating"] | ABILITY_BITS["dodge_mastery"],
+    ABILITY_BITS["feint_attack"] | ABILITY_BITS["trap_spawn"],
+    ABILITY_BITS["magic_dampening"] | ABILITY_BITS["spell_corruption"],
+    ABILITY_BITS["stamina_drain"] | ABILITY_BITS["exhaustion_aura"],
+    ABILITY_BITS["pattern_prediction"] | ABILITY_BITS["counter_strike"],
+)
+MOB_COUNTER_PREFIXES = {
+    "armor_plating": "Armored",
+    "feint_attack": "Deceptive",
+    "magic_dampening": "Nullifying",
+    "stamina_drain": "Exhausting",
+    "pattern_prediction": "Prescient"
+}
+MOB_PREFIXES = ("Glitched", "Echo", "Void", "Corrupted", "Phantom")
+MOB_BASE_NAMES = ("Shardfeeder", "Vessel", "Watcher", "Hollow", "Phantom")
+MOB_SUFFIXES = (None, "Fragment", "Shadow", "Remnant")  # None: numbered "Echo-NN"
+MOB_CLASSES = ("Aberrant", "Hollow", "Corrupted", "Phantom")
+
+ITEM_TYPES = ("Ashlight Blade", "Echo Shield", "Corrupted Ring", "Void Charm",
+              "Shadow Catalyst", "Hollow Essence", "Code Fragment")
+ITEM_TEMPLATES = tuple(item_template(name) for name in ITEM_TYPES)  # Shared by every item rolled
+
+BOSS_PATTERNS = ("strike", "feint", "sweep", "phase_shift", "corrupt_cast", "void_grab")
+BOSS_AGGRESSIVE_WEIGHTS = (3, 4, 7, 8, 10, 12)  # Cumulative [3, 1, 3, 1, 2, 2]: low-DEX players
+BOSS_FEINTING_WEIGHTS = (1, 5, 6, 9, 11, 13)    # Cumulative [1, 4, 1, 3, 2, 2]: high-DEX players
+BOSS_NAMES = ("Ash-Soaked Knight", "The Watcher in Code", "The Fractured One",
+              "Grief-Bound Judge", "The Entity (True Form)")  # By floor, from 1
+
+_mob_names = {}  # Name parts -> interned mob name
+
+def mob_name(counter_prefix: str, prefix: str, base_name: str, suffix: str, chaos: bool) -> str:
+    """Assemble a mob name from its parts, reusing one string per distinct name"""
+    key = (counter_prefix, prefix, base_name, suffix, chaos)
+    name = _mob_names.get(key)
+    if name is None:
+        name = " ".join(part for part in ("Chaos" if chaos else "", counter_prefix, prefix, base_name, suffix) if part)
+        _mob_names[key] = name
+    return name
+
+# Lore rewrites, each applied in one pass (and memoized per phrase)
+LORE_GASLIGHT = ReplaceAll((("The code", "You"), ("The Entity", "I"), ("paths", "your paths")))
+LORE_BETRAYAL = ReplaceAll((("betrayal", "your betrayal"),))
+
+# Forms generate_lore can give a phrase: plain, per-context, one per whisper prefix;
+# each exists ungaslit and gaslit, so a phrase has 2 * LORE_FORM_COUNT variants
+WHISPER_PREFIXES = ("...", "Listen:", "The void whispers:", "Code fragment:")
+LORE_CONTEXT_FORMS = {"death": 1, "betrayal": 2}  # Context -> form; unlisted contexts use the plain one
+LORE_WHISPER_FORM = 3  # First whisper form
+LORE_FORM_COUNT = LORE_WHISPER_FORM + len(WHISPER_PREFIXES)
+
+def lore_form(phrase: str, gaslit: bool, form: int) -> str:
+    """One form of a lore phrase"""
+    if gaslit:
+        # Personal pronouns for gaslighting
+        phrase = LORE_GASLIGHT(phrase)
+    if form >= LORE_WHISPER_FORM:
+        return f"{WHISPER_PREFIXES[form - LORE_WHISPER_FORM]} {phrase}"
+    if form == LORE_CONTEXT_FORMS["death"]:
+        return f"COMPILED: {phrase}"
+    if form == LORE_CONTEXT_FORMS["betrayal"]:
+        return LORE_BETRAYAL(phrase)
+    return phrase
+
+def lore_variants(phrase: str) -> Tuple[str, ...]:
+    """Every variant of a phrase, indexed by gaslit * LORE_FORM_COUNT + form"""
+    return tuple(lore_form(phrase, gaslit, form) for gaslit in (False, True) for form in range(LORE_FORM_COUNT))
+
+# The shipped game bible is never written: play mutates a per-user copy seeded from it
+GAME_BIBLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_bible.json")
+GAME_BIBLE_STATE_PATH = os.path.join(user_data_dir(), "game_bible.json")
+# Seed used when the shipped bible is missing as well
+DEFAULT_GAME_BIBLE = {
+    "themes": ["eternal descent", "fractured code", "hollow betrayal", "echoed sins", 
+              "kernel whispers", "corrupted will", "digital ash", "false salvation", 
+              "compiled despair", "shadowed keys", "unreliable echoes", "gaslit paths"],
+    "phrases": [
+        "The code bleeds into shadow.",
+        "Every choice compiles your undoing.",
+        "The Entity watches, unblinking.",
+        "Death is data; you are the error.",
+        "Fingers on keys, but the script writes you.",
+        "Your strength is parsed—irrelevant.",
+        "The abyss knows your next move.",
+        "Betrayal loops forever in the Kernel.",
+        "Ashlight burns, but reveals nothing.",
+        "You descend, yet never arrive.",
+        "Paths remember your flees.",
+        "Allies whisper of your recklessness."
+    ],
+    "edits_log": [],
+    "edit_count": 0
+}
+
+# Game bible mutation rules: name -> (trigger matched case-insensitively, replacement chain)
+BIBLE_MUTATION_RULES = {
+    "essence": ("code", (("The code", "You"), ("code", "your essence"))),
+}
+# Passes over the indexed phrases per death-count change. Each phrase mutates with
+# p=0.4 per pass, so a handful of passes normally catches the bible up; the cap keeps
+# one unlucky run of rolls (or a large death jump) from holding bible_lock for long.
+BIBLE_MUTATION_PASSES = 16
+
+class WhisperArchive:
+    """Bounded whisper store - constant memory no matter how long the descent lasts"""
+    
+    def __init__(self, maxlen: int = 64, rank_size: int = 32, spill_path: Optional[str] = None):
+        self.recent = deque(maxlen=maxlen)  # Last N whispers kept in memory
+        self.rank_size = rank_size
+        self.spill_path = spill_path  # Optional append-only gzip log of every whisper this run
+        self.total = 0
+        self._counts = {}  # Space-saving frequency index: whisper -> times heard
+        self._spill = None
+    
+    def append(self, whisper: str):
+        """Archive a whisper"""
+        self.recent.append(whisper)
+        self.total += 1
+        self._rank(whisper)
+        
+        if self.spill_path:
+            if self._spill is None:
+                os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+                self._spill = gzip.open(self.spill_path, "at", encoding="utf-8")
+            self._spill.write(whisper.replace("\n", " ") + "\n")
+    
+    def _rank(self, whisper: str):
+        """Update the bounded frequency index (evicts the least heard whisper when full)"""
+        if whisper in self._counts:
+            self._counts[whisper] += 1
+        elif len(self._counts) < self.rank_size:
+            self._counts[whisper] = 1
+        else:
+            weakest = min(self._counts, key=self._counts.get)
+            self._counts[whisper] = self._counts.pop(weakest) + 1
+    
+    def top(self, n: int = 3) -> List[str]:
+        """Most repeated whispers of the run, most frequent first (exact when the run was spilled)"""
+        if self.spill_path and os.path.exists(self.spill_path):
+            return [whisper for whisper, _ in Counter(self.iter_spilled()).most_common(n)]
+        ranked = sorted(self._counts.items(), key=lambda entry: entry[1], reverse=True)
+        return [whisper for whisper, _ in ranked[:n]]
+    
+    def iter_spilled(self) -> Iterator[str]:
+        """Read back every whisper spilled to disk this run"""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            yield from self.recent
+            return
+        self.close()  # Finish the current gzip member; the next append starts a new one
+        with gzip.open(self.spill_path, "rt", encoding="utf-8") as f:  # Closed even if the caller stops early
+            for line in f:
+                yield line.rstrip("\n")
+    
+    def close(self):
+        """Close the spill file"""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_spill"] = None  # Reopened in append mode on the next whisper
+        return state
+    
+    def __len__(self) -> int:
+        return len(self.recent)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.recent)
+
+class InferenceBatcher:
+    """Coalesces generator forwards from many concurrent sessions into batched calls"""
+    
+    def __init__(self, window_s: float = 0.002, max_batch: int = 256):
+        self.window_s = window_s  # How long the first request waits for others to join its batch
+        self.max_batch = max_batch
+        self._requests = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._run, name="entity-batcher", daemon=True)
+        self._worker.start()
+    
+    def infer(self, model: nn.Module, player_vector: List[float]) -> torch.Tensor:
+        """Queue one forward and block the calling session until its batch has run"""
+        future = Future()
+        self._requests.put((model, player_vector, future))
+        return future.result()
+    
+    def stop(self):
+        """Stop the worker thread once queued requests are served"""
+        self._requests.put(None)
+        self._worker.join()
+    
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            deadline = time.monotonic() + self.window_s
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._requests.put(None)  # Serve this batch first, then stop
+                    break
+                batch.append(request)
+            self._forward(batch)
+    
+    def _forward(self, batch: List[Tuple[nn.Module, List[float], Future]]):
+        """One forward per distinct generator in the batch"""
+        groups = {}
+        for model, player_vector, future in batch:
+            groups.setdefault(id(model), (model, []))[1].append((player_vector, future))
+        
+        with torch.no_grad():
+            for model, requests in groups.values():
+                try:
+                    outputs = model(torch.tensor([vector for vector, _ in requests], dtype=torch.float32))
+                except Exception as e:
+                    for _, future in requests:
+                        future.set_exception(e)
+                    continue
+                for row, (_, future) in zip(outputs, requests):
+                    future.set_result(row)
 
 class EntityAI:
     """The Entity - AI orchestrator of the player's descent"""
     
-    def __init__(self):
+    def __init__(self, whisper_spill_dir: Optional[str] = None, batcher: Optional[InferenceBatcher] = None,
+                 weights_path: Optional[str] = None, lore_corpus_share: float = 0.0):
         self.device = torch.device("cpu")
         
+        # Deterministic blueprint parts per (quantized vector, run), shared by spawned sessions
+        self.blueprint_cache = OrderedDict()
+        self.blueprint_lock = threading.Lock()
+        
         # Sub-models for different generators
         self.mob_gen = GeneratorMLP(20, 6)  # [str, dex, int, fth, end, vit]
         self.item_gen = GeneratorMLP(20, 4)  # [dmg, def, effect, rarity]
@@ -37,6 +307,10 @@ class EntityAI:
         self.ui_gen = GeneratorMLP(20, 3)  # [delay_ms, shuffle_chance, phantom_chance]
         self.chapter_gen = GeneratorMLP(20, 9)  # New: chapter blueprint generator
         
+        # Worker processes share one set of weights through a memory-mapped file
+        if weights_path:
+            self.load_weights(weights_path)
+        
         # Set all models to evaluation mode (no training)
         for model in [self.mob_gen, self.item_gen, self.boss_gen, self.lore_gen, 
                      self.shop_gen, self.layout_gen, self.trap_gen, self.ui_gen, self.chapter_gen]:
@@ -50,49 +324,134 @@ class EntityAI:
                 _ = model(dummy_input)
         
         # Game bible for mutable lore
-        self.bible_path = os.path.join(os.path.dirname(__file__), "game_bible.json")
+        self.bible_path = GAME_BIBLE_STATE_PATH
+        self.bible_store = BibleStore(self.bible_path, seed_path=GAME_BIBLE_PATH)
+        self.bible_lock = threading.Lock()  # Shared by every session spawned from this instance
         self.load_game_bible()
+        # Cluster workers set this to send mutations to the supervisor instead of applying
+        # them; the supervisor applies, journals and broadcasts them (see apply_bible_edit)
+        self.bible_sink: Optional[Callable[[Dict[str, Any]], None]] = None
+        
+        # Opt-in: chance a lore line is spoken from the shipped lore files instead of the bible
+        # (indexed once and memory-mapped, shared too; never opened while the share is 0)
+        self.lore_corpus_share = lore_corpus_share
+        self.lore_corpus = None
+        if lore_corpus_share > 0:
+            self.lore_corpus = LoreCorpus(os.path.join(os.path.dirname(__file__), "lore"))
+        
+        # Optional cross-session forward coalescing (server mode)
+        self.batcher = batcher
+        
+        self.whisper_spill_dir = whisper_spill_dir
+        self.reset_session_state()
+        
+    def export_weights(self, path: str):
+        """Write every generator's parameters to one flat float32 file"""
+        flat = np.concatenate([
+            param.detach().numpy().ravel()
+            for name in GENERATOR_NAMES
+            for param in getattr(self, name).parameters()
+        ]).astype(np.float32)
+        
+        tmp_path = f"{path}.tmp"
+        flat.tofile(tmp_path)
+        os.replace(tmp_path, path)
+    
+    def load_weights(self, path: str):
+        """Back every generator's parameters with a memory-mapped weights file"""
+        # Copy-on-write mapping: pages stay shared between processes unless written
+        flat = np.memmap(path, dtype=np.float32, mode="c")
+        offset = 0
+        for name in GENERATOR_NAMES:
+            for param in getattr(self, name).parameters():
+                size = param.numel()
+                if offset + size > flat.size:
+                    raise ValueError(f"Weights file {path} is too small for the generators")
+                param.data = torch.from_numpy(flat[offset:offset + size]).view_as(param)
+                offset += size
+        
+        if offset != flat.size:
+            raise ValueError(f"Weights file {path} does not match the generator layout")
+        
+        with self.blueprint_lock:
+            self.blueprint_cache.clear()  # Built from the old weights
+    
+    def reset_session_state(self):
+        """Reset the per-player state; models and the game bible are left alone"""
+        self.mutation_deaths_seen = None  # Death count the mutation engine last reacted to
         
-        # Entity whisper system
-        self.whisper_archive = []
+        # Entity whisper system (bounded, optionally spilled to disk per run)
+        spill_path = None
+        if self.whisper_spill_dir:
+            # Named from os.urandom so opening a log never advances the seeded game RNG
+            spill_path = os.path.join(self.whisper_spill_dir, f"whispers_{os.getpid()}_{os.urandom(4).hex()}.txt.gz")
+        self.whisper_archive = WhisperArchive(spill_path=spill_path)
         
         # Adaptive tracking systems
         self.player_adaptation_history = []
         self.current_chapter_blueprint = None
         self.chaos_mode_active = False
+    
+    def session_state(self) -> Dict[str, Any]:
+        """Per-player state for session snapshots"""
+        return {name: getattr(self, name) for name in SESSION_FIELDS}
+    
+    def restore_session_state(self, state: Dict[str, Any]):
+        """Restore per-player state from a session snapshot"""
+        self.whisper_archive.close()
+        for name in SESSION_FIELDS:
+            if name in state:
+                setattr(self, name, state[name])
+    
+    def spawn_session(self) -> "EntityAI":
+        """Cheap per-player view sharing models, game bible and batcher with this instance"""
+        session = copy.copy(self)
+        session.reset_session_state()
+        return session
+    
+    @profiled("entity.forward")
+    def _infer(self, model: nn.Module, player_vector: List[float]) -> torch.Tensor:
+        """Run one generator on one player vector, batched with other sessions when possible"""
+        if self.batcher is not None:
+            return self.batcher.infer(model, player_vector)
+        with torch.no_grad():
+            return model(torch.tensor([player_vector], dtype=torch.float32))[0]
         
     def load_game_bible(self):
-        """Load or create the mutable game bible"""
-        if os.path.exists(self.bible_path):
-            with open(self.bible_path, 'r') as f:
-                self.game_bible = json.load(f)
-        else:
-            self.game_bible = {
-                "themes": ["eternal descent", "fractured code", "hollow betrayal", "echoed sins", 
-                          "kernel whispers", "corrupted will", "digital ash", "false salvation", 
-                          "compiled despair", "shadowed keys", "unreliable echoes", "gaslit paths"],
-                "phrases": [
-                    "The code bleeds into shadow.",
-                    "Every choice compiles your undoing.",
-                    "The Entity watches, unblinking.",
-                    "Death is data; you are the error.",
-                    "Fingers on keys, but the script writes you.",
-                    "Your strength is parsed—irrelevant.",
-                    "The abyss knows your next move.",
-                    "Betrayal loops forever in the Kernel.",
-                    "Ashlight burns, but reveals nothing.",
-                    "You descend, yet never arrive.",
-                    "Paths remember your flees.",
-                    "Allies whisper of your recklessness."
-                ],
-                "edits_log": []
-            }
-            self.save_game_bible()
+        """Load or create the mutable game bible (snapshot + mutation journal)"""
+        self.use_game_bible(self.bible_store.load(copy.deepcopy(DEFAULT_GAME_BIBLE)))
+    
+    def use_game_bible(self, bible: Dict[str, Any]):
+        """Adopt a bible (e.g. a cluster supervisor's copy); call before spawning sessions"""
+        self.game_bible = bible
+        self.index_mutable_phrases()
+    
+    def apply_bible_edit(self, edit: Dict[str, Any]):
+        """Apply a mutation decided elsewhere (the cluster supervisor broadcasts them)"""
+        with self.bible_lock:
+            self.bible_store.apply_edit(self.game_bible, edit)
+            self.reindex_phrase(edit["index"], self.game_bible["phrases"][edit["index"]])
+    
+    def index_mutable_phrases(self):
+        """Precompute which phrase positions each mutation rule can touch, and every phrase's variants"""
+        self.mutable_phrase_index = {rule: set() for rule in BIBLE_MUTATION_RULES}
+        self.phrase_variants = [()] * len(self.game_bible["phrases"])  # Parallel to the bible's phrases
+        for i, phrase in enumerate(self.game_bible["phrases"]):
+            self.reindex_phrase(i, phrase)
+    
+    def reindex_phrase(self, index: int, phrase: str):
+        """Refresh one phrase position in the mutation index and variant table after an edit"""
+        self.phrase_variants[index] = lore_variants(phrase)
+        lowered = phrase.lower()
+        for rule, (trigger, _) in BIBLE_MUTATION_RULES.items():
+            if trigger in lowered:
+                self.mutable_phrase_index[rule].add(index)
+            else:
+                self.mutable_phrase_index[rule].discard(index)
     
     def save_game_bible(self):
-        """Save the mutated game bible"""
-        with open(self.bible_path, 'w') as f:
-            json.dump(self.game_bible, f, indent=2)
+        """Persist pending mutations and fold the journal into the snapshot"""
+        self.bible_store.compact()
     
     def calculate_entity_bias(self, player_vector: List[float]) -> float:
         """Calculate Entity's bias based on player state"""
@@ -103,63 +462,68 @@ class EntityAI:
         bias = (floor + deaths + (1 - sanity)) * 0.15
         return min(bias, 1.0)  # Cap at 1.0
     
+    @profiled("entity.generate_chapter_blueprint")
     def generate_chapter_blueprint(self, player_vector: List[float], run_number: int) -> Dict[str, Any]:
         """Generate AI-driven chapter sequence that changes on each death"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            outputs = self.chapter_gen(vec_tensor)[0]
-        
-        # Use outputs to determine chapter structure (9 chapters total)
-        chapter_sequence = []
+        types, difficulty, modifiers, comment = self.get_blueprint_plan(player_vector, run_number)
+        
+        # Mid-point minibosses and chaos corruption are rolled fresh for every blueprint,
+        # on the game's random stream and in the same order as always (seeded runs replay)
+        types = types.tolist()
+        for i in MIDPOINT_CHAPTERS:
+            if random.random() < 0.7:
+                types[i] = CHAPTER_MINIBOSS
+        
+        chapter_sequence = [{
+            "chapter": i + 1,
+            "type": CHAPTER_TYPES[chapter_type],
+            "difficulty_modifier": difficulty,
+            "special_modifier": dict(modifiers)  # Each chapter owns its copy; the plan's is read-only
+        } for i, chapter_type in enumerate(types)]
         
-        for i in range(9):
-            output_val = float(outputs[i])
-            
-            # Convert neural output to chapter type
-            if output_val < 2.5:
-                chapter_type = "safe"
-            elif output_val < 5.0:
-                chapter_type = "combat"
-            elif output_val < 7.0:
-                chapter_type = "shop"
-            elif output_val < 8.5:
-                chapter_type = "miniboss"
-            else:
-                chapter_type = "boss"
-            
-            # Ensure some mandatory structure
-            if i == 0:  # First chapter always safe
-                chapter_type = "safe"
-            elif i == 8:  # Last chapter always boss
-                chapter_type = "boss"
-            elif i in [3, 6]:  # Mid-point minibosses
-                chapter_type = "miniboss" if random.random() < 0.7 else chapter_type
-                
-            chapter_sequence.append({
-                "chapter": i + 1,
-                "type": chapter_type,
-                "difficulty_modifier": self.calculate_entity_bias(player_vector),
-                "special_modifier": self.get_chapter_special_modifier(i + 1, player_vector)
-            })
-        
-        # Add chaos mode corruption if active
         if self.chaos_mode_active:
             for chapter in chapter_sequence:
                 if random.random() < 0.2:  # 20% corruption chance
                     chapter["corrupted"] = True
-                    chapter["corruption_type"] = random.choice([
-                        "phantom_enemies", "reversed_controls", "reality_glitch", "time_distortion"
-                    ])
+                    chapter["corruption_type"] = random.choice(CORRUPTION_TYPES)
         
         self.current_chapter_blueprint = {
             "sequence": chapter_sequence,
             "run_number": run_number,
-            "generated_for": player_vector.copy(),
-            "entity_comment": self.get_entity_blueprint_comment(player_vector, run_number)
+            "generated_for": list(player_vector),
+            "entity_comment": comment
         }
         
         return self.current_chapter_blueprint
     
+    def get_blueprint_plan(self, player_vector: List[float], run_number: int) -> Tuple[np.ndarray, float, Mapping[str, Any], str]:
+        """Chapter type codes, bias, modifiers and comment for a player vector (cached, read-only)"""
+        quantized = np.rint(np.asarray(player_vector, dtype=np.float64) * BLUEPRINT_QUANTUM).astype(np.int16)
+        key = (quantized.tobytes(), run_number)
+        with self.blueprint_lock:
+            plan = self.blueprint_cache.get(key)
+            if plan is not None:
+                self.blueprint_cache.move_to_end(key)
+                return plan
+        
+        # Computed from the quantized vector so a cached plan is exact for its key
+        vector = (quantized / BLUEPRINT_QUANTUM).tolist()
+        outputs = np.asarray(self._infer(self.chapter_gen, vector)[:CHAPTER_COUNT], dtype=np.float64)
+        types = np.digitize(outputs, CHAPTER_THRESHOLDS).astype(np.int8)
+        types[0] = CHAPTER_SAFE  # First chapter always safe
+        types[-1] = CHAPTER_BOSS  # Last chapter always boss
+        types.flags.writeable = False  # Shared between sessions
+        
+        plan = (types,
+                self.calculate_entity_bias(vector),
+                MappingProxyType(self.get_chapter_special_modifier(1, vector)),
+                self.get_entity_blueprint_comment(vector, run_number))
+        with self.blueprint_lock:
+            self.blueprint_cache[key] = plan
+            if len(self.blueprint_cache) > BLUEPRINT_CACHE_SIZE:
+                self.blueprint_cache.popitem(last=False)
+        return plan
+    
     def get_chapter_special_modifier(self, chapter_num: int, player_vector: List[float]) -> Dict[str, Any]:
         """Get special modifiers for specific chapters"""
         strength_bias = player_vector[0]  # STR
@@ -230,14 +594,13 @@ class EntityAI:
             return outputs + noise
         return outputs
     
-    def generate_mob(self, player_vector: List[float], floor: int) -> Dict[str, Any]:
+    @profiled("entity.generate_mob")
+    def generate_mob(self, player_vector: List[float], floor: int) -> MobRecord:
         """Generate adaptive mob that counters player with enhanced AI"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            outputs = self.mob_gen(vec_tensor)[0]
+        outputs = self._infer(self.mob_gen, player_vector)
         
         # Apply glitch noise for low sanity
-        outputs = self.apply_glitch_noise(outputs, player_vector[10])
+        outputs = self.apply_glitch_noise(outputs, player_vector[10]).tolist()
         
         # Enhanced adaptive counters
         str_bias = player_vector[0] * 0.5   # STR → spawn high-armor, high-dodge mobs
@@ -250,168 +613,129 @@ class EntityAI:
         # Track player's predictability for smarter counters
         predictability = player_vector[9] if len(player_vector) > 9 else 0.5
         
-        stats = {
-            "str": max(1, int(outputs[0] + dex_bias + (predictability * 2))),
-            "dex": max(1, int(outputs[1] + str_bias + (predictability * 3))),  # High for feints
-            "int": max(1, int(outputs[2] + int_bias)),
-            "fth": max(1, int(outputs[3] + fth_bias)),
-            "end": max(1, int(outputs[4] + end_bias)),
-            "vit": max(1, int(outputs[5] + vit_bias + (predictability * 2)))
-        }
+        stats = (  # records.MOB_STATS order
+            max(1, int(outputs[0] + dex_bias + (predictability * 2))),  # str
+            max(1, int(outputs[1] + str_bias + (predictability * 3))),  # dex, high for feints
+            max(1, int(outputs[2] + int_bias)),  # int
+            max(1, int(outputs[3] + fth_bias)),  # fth
+            max(1, int(outputs[4] + end_bias)),  # end
+            max(1, int(outputs[5] + vit_bias + (predictability * 2)))  # vit
+        )
         
         # Add special abilities based on player weaknesses
-        special_abilities = []
-        
-        if str_bias > 0.4:
-            special_abilities.extend(["armor_plating", "dodge_mastery"])
-        if dex_bias > 0.4:
-            special_abilities.extend(["feint_attack", "trap_spawn"])
-        if int_bias > 0.4 or fth_bias > 0.4:
-            special_abilities.extend(["magic_dampening", "spell_corruption"])
-        if end_bias > 0.3:
-            special_abilities.extend(["stamina_drain", "exhaustion_aura"])
-        if predictability > 0.7:
-            special_abilities.extend(["pattern_prediction", "counter_strike"])
+        armor, feint, magic, stamina, pattern = MOB_ABILITY_PAIRS
+        abilities = ((armor if str_bias > 0.4 else 0) |
+                     (feint if dex_bias > 0.4 else 0) |
+                     (magic if int_bias > 0.4 or fth_bias > 0.4 else 0) |
+                     (stamina if end_bias > 0.3 else 0) |
+                     (pattern if predictability > 0.7 else 0))
+        special_abilities = AbilitySet(abilities)
         
         # Procedural naming based on counters
-        counter_prefixes = {
-            "armor_plating": "Armored",
-            "feint_attack": "Deceptive", 
-            "magic_dampening": "Nullifying",
-            "stamina_drain": "Exhausting",
-            "pattern_prediction": "Prescient"
-        }
-        
-        prefixes = ["Glitched", "Echo", "Void", "Corrupted", "Phantom"]
-        base_names = ["Shardfeeder", "Vessel", "Watcher", "Hollow", "Phantom"]
-        suffixes = [f"Echo-{random.randint(10,99)}", "Fragment", "Shadow", "Remnant"]
-        
-        # Add counter-specific prefix if abilities present
-        name_prefix = ""
-        if special_abilities:
-            primary_ability = random.choice(special_abilities)
-            if primary_ability in counter_prefixes:
-                name_prefix = counter_prefixes[primary_ability] + " "
+        counter_prefix = ""
+        if abilities:
+            primary_ability = random.choice(special_abilities.names())
+            counter_prefix = MOB_COUNTER_PREFIXES.get(primary_ability, "")
         
+        prefix = suffix = ""
         if predictability > 0.8:  # Highly predictable player gets complex names
-            name = f"{name_prefix}{random.choice(prefixes)} {random.choice(base_names)} {random.choice(suffixes)}"
+            prefix = random.choice(MOB_PREFIXES)
+            base_name = random.choice(MOB_BASE_NAMES)
+            suffix = random.choice(MOB_SUFFIXES) or f"Echo-{random.randint(10, 99)}"
         elif len(special_abilities) > 2:  # Multi-counter mobs
-            name = f"{name_prefix}{random.choice(prefixes)} {random.choice(base_names)}"
+            prefix = random.choice(MOB_PREFIXES)
+            base_name = random.choice(MOB_BASE_NAMES)
         else:
-            name = f"{name_prefix}{random.choice(base_names)}"
+            base_name = random.choice(MOB_BASE_NAMES)
         
-        mob_class = random.choice(["Aberrant", "Hollow", "Corrupted", "Phantom"])
+        mob_class = random.choice(MOB_CLASSES)
         
         # Add chaos mode corruption
-        if self.chaos_mode_active and random.random() < 0.3:
-            name = f"Chaos {name}"
-            special_abilities.append("chaos_corruption")
-        
-        return {
-            "name": name,
-            "class": mob_class,
-            "stats": stats,
-            "special_abilities": special_abilities,
-            "entity_bias": self.calculate_entity_bias(player_vector)
-        }
+        chaos = self.chaos_mode_active and random.random() < 0.3
+        if chaos:
+            special_abilities.add("chaos_corruption")
+        
+        return MobRecord(
+            mob_template(mob_name(counter_prefix, prefix, base_name, suffix, chaos), mob_class),
+            stats,
+            special_abilities,
+            self.calculate_entity_bias(player_vector)
+        )
     
-    def generate_item(self, player_vector: List[float], floor: int) -> Dict[str, Any]:
+    @profiled("entity.generate_item")
+    def generate_item(self, player_vector: List[float], floor: int) -> ItemRecord:
         """Generate tempting items that exploit player weaknesses"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            outputs = self.item_gen(vec_tensor)[0]
+        outputs = self._infer(self.item_gen, player_vector).tolist()
         
         # Tempt weaknesses
         vit_weakness = 1.0 - player_vector[5]  # Low VIT? Healing items with risks
         
-        item_types = ["Ashlight Blade", "Echo Shield", "Corrupted Ring", "Void Charm", 
-                     "Shadow Catalyst", "Hollow Essence", "Code Fragment"]
-        
-        stats = {
-            "damage": max(1, int(outputs[0] + floor * 0.5)),
-            "defense": max(1, int(outputs[1])),
-            "effect": int(outputs[2] * 5),
-            "rarity": int(outputs[3] * 3)
-        }
+        stats = (  # records.ITEM_STATS order
+            max(1, int(outputs[0] + floor * 0.5)),  # damage
+            max(1, int(outputs[1])),  # defense
+            int(outputs[2] * 5),  # effect
+            int(outputs[3] * 3)  # rarity
+        )
         
         # Add curse risk for healing items on weak players
-        curse_risk = vit_weakness * 0.3 if "healing" in str(stats) else 0
+        curse_risk = vit_weakness * 0.3 if "healing" in ITEM_STATS else 0
         
-        return {
-            "name": random.choice(item_types),
-            "stats": stats,
-            "curse_risk": curse_risk
-        }
+        return ItemRecord(random.choice(ITEM_TEMPLATES), stats, curse_risk)
     
+    @profiled("entity.generate_boss")
     def generate_boss(self, player_vector: List[float], floor: int) -> Dict[str, Any]:
         """Generate adaptive boss with countering patterns"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            outputs = self.boss_gen(vec_tensor)[0]
+        health_mult, aggression, special_bias = self._infer(self.boss_gen, player_vector).tolist()
         
         entity_bias = self.calculate_entity_bias(player_vector)
         
-        health_mult = float(outputs[0]) + entity_bias * floor * 0.5
-        aggression = float(outputs[1])
-        special_bias = float(outputs[2])
+        health_mult += entity_bias * floor * 0.5
         
         # Pattern selection based on player DEX
-        all_patterns = ["strike", "feint", "sweep", "phase_shift", "corrupt_cast", "void_grab"]
-        
         if player_vector[1] < 0.4:  # Low DEX? High aggression
             aggression += 0.3
-            patterns = random.choices(all_patterns, weights=[3, 1, 3, 1, 2, 2], k=4)
+            patterns = random.choices(BOSS_PATTERNS, cum_weights=BOSS_AGGRESSIVE_WEIGHTS, k=4)
         else:  # High DEX? More feints
-            patterns = random.choices(all_patterns, weights=[1, 4, 1, 3, 2, 2], k=4)
-        
-        boss_names = {
-            1: "Ash-Soaked Knight",
-            2: "The Watcher in Code", 
-            3: "The Fractured One",
-            4: "Grief-Bound Judge",
-            5: "The Entity (True Form)"
-        }
+            patterns = random.choices(BOSS_PATTERNS, cum_weights=BOSS_FEINTING_WEIGHTS, k=4)
         
         health = int(50 * health_mult * (1 + entity_bias * floor))
         
         return {
-            "name": boss_names.get(floor, "Unknown Horror"),
+            "name": BOSS_NAMES[floor - 1] if 1 <= floor <= len(BOSS_NAMES) else "Unknown Horror",
             "health": health,
             "patterns": patterns,
             "aggression": aggression,
             "special": "entity_corruption" if special_bias > 0.7 else "adaptive_counter"
         }
     
+    @profiled("entity.generate_lore")
     def generate_lore(self, player_vector: List[float], floor: int, context: str = "") -> str:
         """Generate adaptive lore with gaslighting potential"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            tone_bias = float(self.lore_gen(vec_tensor)[0][0].detach())
+        tone_bias = float(self._infer(self.lore_gen, player_vector)[0])
         
         entity_bias = self.calculate_entity_bias(player_vector)
         
-        # Select base phrase
-        phrase = random.choice(self.game_bible["phrases"])
+        # Gaslighting based on bias, plus context-specific modifications
+        gaslit = tone_bias > 0.7 and entity_bias > 0.5
+        if context == "whisper":
+            form = LORE_WHISPER_FORM + random.randrange(len(WHISPER_PREFIXES))
+        else:
+            form = LORE_CONTEXT_FORMS.get(context, 0)
+        
+        # Base phrase: a lore fragment matching the tone, floor and context (if enabled),
+        # or a bible phrase whose variants were built when it was loaded or last mutated
+        phrase = None
+        if self.lore_corpus is not None and random.random() < self.lore_corpus_share:
+            fragment = self.lore_corpus.pick(tone_bias / GENERATOR_SCALE, floor, context)
+            if fragment is not None:
+                # Never gaslit: the pronoun swaps are written for the bible's phrasing
+                phrase = lore_form(fragment, False, form)
+        if phrase is None:
+            phrase = random.choice(self.phrase_variants)[gaslit * LORE_FORM_COUNT + form]
         
-        # Apply gaslighting based on bias
-        if tone_bias > 0.7 and entity_bias > 0.5:
-            # Personal pronouns for gaslighting
-            phrase = phrase.replace("The code", "You")
-            phrase = phrase.replace("The Entity", "I")
-            phrase = phrase.replace("paths", "your paths")
-            
-        # Context-specific modifications
         if context == "whisper":
-            whisper_prefixes = ["...", "Listen:", "The void whispers:", "Code fragment:"]
-            phrase = f"{random.choice(whisper_prefixes)} {phrase}"
             self.whisper_archive.append(phrase)
             
-        elif context == "death":
-            phrase = f"COMPILED: {phrase}"
-            
-        elif context == "betrayal":
-            phrase = phrase.replace("betrayal", "your betrayal")
-            
         # High FTH? Betrayal themes
         if player_vector[3] > 0.7:
             betrayal_phrases = [
@@ -424,33 +748,56 @@ class EntityAI:
         
         return phrase
     
-    def mutate_game_bible(self, player_vector: List[float]):
-        """Mutate game bible for meta-gaslighting"""
-        deaths = int(player_vector[11])
-        predictability = player_vector[9]
+    @profiled("entity.mutate_game_bible")
+    def mutate_game_bible(self, player_vector: List[float], deaths: Optional[int] = None):
+        """Mutate game bible for meta-gaslighting - only does work when the death count changes"""
+        if deaths is None:
+            deaths = int(round(player_vector[11] * 10))  # State vector stores deaths / 10
+        
+        if deaths == self.mutation_deaths_seen:
+            return
+        self.mutation_deaths_seen = deaths
         
         # Trigger mutations based on thresholds
-        if deaths >= 5 and len(self.game_bible["edits_log"]) < deaths:
-            # Warp existing phrases
-            for i, phrase in enumerate(self.game_bible["phrases"]):
-                if "code" in phrase.lower() and random.random() < 0.4:
-                    new_phrase = phrase.replace("The code", "You")
-                    new_phrase = new_phrase.replace("code", "your essence")
-                    self.game_bible["phrases"][i] = new_phrase
-                    
-                    self.game_bible["edits_log"].append({
-                        "death_count": deaths,
-                        "original": phrase,
-                        "mutated": new_phrase
-                    })
-            
-            self.save_game_bible()
+        if deaths < 5:
+            return
+        
+        # Warp indexed phrases until the bible has caught up with the death count
+        # (the bible is shared by every session spawned from this instance)
+        with self.bible_lock:
+            _, replacements = BIBLE_MUTATION_RULES["essence"]
+            for _ in range(BIBLE_MUTATION_PASSES):
+                positions = self.mutable_phrase_index["essence"]
+                if self.game_bible["edit_count"] >= deaths or not positions:
+                    break
+                
+                for i in sorted(positions):
+                    if random.random() < 0.4:
+                        phrase = self.game_bible["phrases"][i]
+                        new_phrase = phrase
+                        for old, new in replacements:
+                            new_phrase = new_phrase.replace(old, new)
+                        
+                        edit = {
+                            "death_count": deaths,
+                            "index": i,
+                            "original": phrase,
+                            "mutated": new_phrase
+                        }
+                        if self.bible_sink is not None:
+                            self.bible_sink(edit)  # Proposed; comes back once the supervisor accepts it
+                            continue
+                        self.bible_store.apply_edit(self.game_bible, edit)
+                        self.bible_store.record_edit(edit)  # Journaled on the debounce timer
+                        self.reindex_phrase(i, new_phrase)
+                
+                if self.bible_sink is not None:
+                    break  # The local copy only changes when accepted edits arrive
     
+    @profiled("entity.generate_shop")
     def generate_shop(self, player_vector: List[float], floor: int, currency: int) -> Dict[str, Any]:
         """Generate shops that exploit player desperation"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            outputs = self.shop_gen(vec_tensor)[0]
+        outputs = self._infer(self.shop_gen, player_vector)
         
         entity_bias = self.calculate_entity_bias(player_vector)
         
@@ -483,11 +830,10 @@ class EntityAI:
             "items": items
         }
     
+    @profiled("entity.generate_layout")
     def generate_layout(self, player_vector: List[float], floor: int) -> Dict[str, Any]:
         """Generate adaptive dungeon layouts that counter player behavior"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            outputs = self.layout_gen(vec_tensor)[0]
+        outputs = self._infer(self.layout_gen, player_vector)
         
         flee_count = player_vector[13] if len(player_vector) > 13 else 0
         entity_bias = self.calculate_entity_bias(player_vector)
@@ -527,11 +873,10 @@ class EntityAI:
             "description": desc
         }
     
+    @profiled("entity.generate_trap")
     def generate_trap(self, player_vector: List[float], floor: int) -> Dict[str, Any]:
         """Generate traps that exploit player habits"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            outputs = self.trap_gen(vec_tensor)[0]
+        outputs = self._infer(self.trap_gen, player_vector)
         
         # Track habits from player vector extensions
         heal_spam = player_vector[14] if len(player_vector) > 14 else 0
@@ -564,11 +909,10 @@ class EntityAI:
             "severity": severity
         }
     
+    @profiled("entity.generate_ui_distort")
     def generate_ui_distort(self, player_vector: List[float]) -> Dict[str, Any]:
         """Generate UI corruption for high predictability or low sanity"""
-        with torch.no_grad():
-            vec_tensor = torch.tensor([player_vector], dtype=torch.float32)
-            outputs = self.ui_gen(vec_tensor)[0]
+        outputs = self._infer(self.ui_gen, player_vector)
         
         predictability = player_vector[9]
         sanity = player_vector[10]
@@ -597,6 +941,7 @@ class EntityAI:
             "glitch_colors": sanity < 0.3
         }
     
+    @profiled("entity.generate_whisper")
     def generate_whisper(self, player_vector: List[float], context: str = "") -> str:
         """Generate Entity whispers for psychological pressure"""
         # 5-10% base chance, higher for low sanity
@@ -608,6 +953,7 @@ class EntityAI:
         
         return self.generate_lore(player_vector, int(player_vector[6]), "whisper")
     
+    @profiled("entity.generate_psychological_profile")
     def generate_psychological_profile(self, player_vector: List[float], metrics: Dict) -> str:
         """Generate end-game psychological profile"""
         predictability = player_vector[9]
@@ -9,24 +9,32 @@ import time
 import random
 from typing import Dict, List, Any, Optional
 
+from actions import Action, intern_action
+from clock import REAL_CLOCK, VirtualClock, ScriptedInput
+from menus import Transition, STAY, BACK, EXIT, push, replace, run_menu
 from player import Player
+from inventory import item_category
+from records import RARITY_NAMES
+import profiling
 from entity_ai import EntityAI
 from combat import Combat
 from room import RoomManager
 from npc import NPCManager
+from snapshot import encode_session, decode_session
 from utils import (
-    music_manager, ui_distorter, narrator_filter, input_manager,
+    music_manager, ui_distorter, narrator_filter, input_manager, pacer,
     colorize_text, create_ascii_border, format_stats_display, 
     format_ending_screen, save_whisper_archive, clear_screen,
-    press_enter_to_continue, wobble_text
+    press_enter_to_continue, wobble_text, set_color_enabled, mark_resume_point, PACING_MODES
 )
 
 class Game:
     """Main game controller with EntityAI orchestration"""
     
-    def __init__(self):
+    def __init__(self, entity_ai: Optional[EntityAI] = None, clock=None):
         self.player = None
-        self.entity_ai = EntityAI()
+        self.entity_ai = entity_ai if entity_ai is not None else EntityAI()  # Server sessions pass a shared one
+        self.clock = clock or REAL_CLOCK  # Simulations pass a VirtualClock so pauses and timers cost nothing
         self.combat = None
         self.room_manager = None
         self.npc_manager = None
@@ -383,7 +391,7 @@ class Game:
         self.player = Player(name, selected_class)
         
         # Initialize game components
-        self.combat = Combat(self.entity_ai)
+        self.combat = Combat(self.entity_ai, self.clock)
         self.room_manager = RoomManager(self.entity_ai)
         self.npc_manager = NPCManager(self.entity_ai)
         
@@ -416,9 +424,9 @@ class Game:
             ui_distortion = self.entity_ai.generate_ui_distort(player_vector)
             ui_distorter.apply_distortion(ui_distortion)
             
-            # Mutate game bible based on deaths
+            # Mutate game bible when the death count changes (no-op on other ticks)
             if self.player.deaths > 0:
-                self.entity_ai.mutate_game_bible(player_vector)
+                self.entity_ai.mutate_game_bible(player_vector, self.player.deaths)
             
             # Update narrator tone
             import torch
@@ -511,7 +519,8 @@ class Game:
             for choice in choices:
                 print(f"  {choice}")
                 
-            # No time limit in safe zones
+            # No time limit in safe zones; a resumed game comes straight back to this prompt
+            mark_resume_point()
             raw_input = input(f"\n{colorize_text('Choose action:', 'white')} ").strip().lower()
             
             # Handle exit in safe zones
@@ -595,60 +604,61 @@ class Game:
             print(f"{colorize_text('You step back from the edge.', 'white')}")
             return None
         
+    @profiling.profiled("game.process_action")
     def process_action(self, action: str):
         """Process player action and update metrics"""
-        action = action.lower().strip()
+        code = intern_action(action.lower().strip())
         
         # Update player predictability
-        self.player.update_predictability(action)
+        self.player.update_predictability(code)
         
-        if action == 'explore':  # New unified exploration system
-            self.explore_and_progress()
-            
-        elif action == 'a':  # Attack (combat only)
-            if self.in_combat:
-                self.combat.player_attack(self.player)
-                self.in_dangerous_area = True  # Mark as dangerous after combat
-            else:
-                print(f"{colorize_text('Nothing to attack here. Try exploring instead.', 'yellow')}")
-                
-        elif action == 'd':  # Dodge (combat only)
-            if self.in_combat:
-                self.combat.player_dodge(self.player)
-            else:
-                print(f"{colorize_text('Nothing to dodge. Try exploring instead.', 'yellow')}")
-                
-        elif action == 'h':  # Heal
-            self.use_healing_item()
-            
-        elif action == 'f':  # Flee
-            self.attempt_flee()
-            
-        elif action == 'i':  # Inventory
-            self.show_inventory()
-            
-        elif action == 's':  # Stats
-            self.show_detailed_stats()
-            
-        elif action == 't':  # Talk
-            self.attempt_npc_interaction()
-            
-        elif action == 'exit':
-            # Handle exit attempts
-            self.handle_exit_attempt()
-            
-        elif action == 'exit_game':
+        if code == Action.EXIT_GAME:
             # Graceful exit from safe zones
             return
-            
-        elif action == 'test' and self.player.health == self.player.max_health:
-            # Hidden test command to take damage for testing healing
-            test_damage = 30
-            self.player.take_damage(test_damage)
-            print(f"{colorize_text(f'[TEST] Took {test_damage} damage for healing testing', 'yellow')}")
-            
+        
+        handler = self.ACTION_HANDLERS.get(code)
+        if handler is None:
+            print(f"{colorize_text('Invalid action.', 'red')}")
+            return
+        getattr(self, handler)()
+    
+    def combat_attack(self):
+        """Attack (combat only)"""
+        if self.in_combat:
+            self.combat.player_attack(self.player)
+            self.in_dangerous_area = True  # Mark as dangerous after combat
+        else:
+            print(f"{colorize_text('Nothing to attack here. Try exploring instead.', 'yellow')}")
+    
+    def combat_dodge(self):
+        """Dodge (combat only)"""
+        if self.in_combat:
+            self.combat.player_dodge(self.player)
         else:
+            print(f"{colorize_text('Nothing to dodge. Try exploring instead.', 'yellow')}")
+    
+    def take_test_damage(self):
+        """Hidden test command to take damage for testing healing"""
+        if self.player.health != self.player.max_health:
             print(f"{colorize_text('Invalid action.', 'red')}")
+            return
+        test_damage = 30
+        self.player.take_damage(test_damage)
+        print(f"{colorize_text(f'[TEST] Took {test_damage} damage for healing testing', 'yellow')}")
+    
+    # Main-loop action -> handler method name (looked up per call, so overrides apply)
+    ACTION_HANDLERS = {
+        Action.EXPLORE: "explore_and_progress",  # New unified exploration system
+        Action.ATTACK: "combat_attack",
+        Action.DODGE: "combat_dodge",
+        Action.HEAL: "use_healing_item",
+        Action.FLEE: "attempt_flee",
+        Action.INVENTORY: "show_inventory",
+        Action.STATS: "show_detailed_stats",
+        Action.TALK: "attempt_npc_interaction",
+        Action.EXIT: "handle_exit_attempt",
+        Action.TEST: "take_test_damage",
+    }
     
     def handle_exit_attempt(self):
         """Handle exit attempt - different behavior for safe vs hostile zones"""
@@ -689,7 +699,7 @@ class Game:
                 
             # Handle items found
             for item in search_result.get("items", []):
-                self.player.inventory.append(item)
+                self.player.inventory.add(item)
                 music_manager.play_sound_effect("notification")
                 print(f"\n{colorize_text('🎒 ITEM DISCOVERED:', 'yellow')}")
                 print(f"Found: {colorize_text(item['name'], 'yellow')}")
@@ -806,7 +816,7 @@ class Game:
         # Possible item drop
         if random.random() < 0.3:
             item = self.entity_ai.generate_item(self.player.state_vector(), self.player.floor)
-            self.player.inventory.append(item)
+            self.player.inventory.add(item)
             music_manager.play_sound_effect("notification")
             print(f"Found: {colorize_text(item['name'], 'yellow')}")
             
@@ -865,77 +875,98 @@ class Game:
         else:
             print(f"{colorize_text('Nothing to flee from.', 'white')}")
             
+    # Menu screen -> method; each screen prompts once and returns a menus.Transition
+    MENU_SCREENS = {
+        "inventory": "inventory_screen",
+        "bag": "bag_screen",
+        "equipped": "equipped_screen",
+        "item": "item_screen",
+        "stats": "stats_screen",
+        "confirm_upgrade": "confirm_upgrade_screen",
+        "npcs": "npc_select_screen",
+        "npc": "npc_screen",
+        "confirm_betrayal": "confirm_betrayal_screen",
+    }
+    INVENTORY_TABS = {"0": BACK, "1": push("bag"), "2": push("equipped")}
+    BAG_PAGE_SIZE = 20  # Items listed per bag page
+    
     def show_inventory(self):
         """Show interactive inventory with equipment visualization"""
-        while True:
-            clear_screen()
-            print(f"{colorize_text('═══ INVENTORY & EQUIPMENT ═══', 'cyan')}")
-            
-            # Tab selection
-            print(f"\n{colorize_text('Tabs:', 'yellow')}")
-            print(f"  1. {colorize_text('BAG', 'cyan')} - All items ({len(self.player.inventory)} items)")
-            print(f"  2. {colorize_text('EQUIPPED', 'green')} - Current equipment")
-            print(f"  0. {colorize_text('Return to game', 'white')}")
-            
-            try:
-                tab_choice = input(f"\n{colorize_text('Choose tab (0-2):', 'white')} ").strip()
-                
-                if tab_choice == '0':
-                    return
-                elif tab_choice == '1':
-                    self.show_bag_tab()
-                elif tab_choice == '2':
-                    self.show_equipped_tab()
-                else:
-                    print(f"{colorize_text('Invalid choice.', 'red')}")
-                    press_enter_to_continue()
-                    
-            except ValueError:
-                print(f"{colorize_text('Please enter a number.', 'red')}")
-                press_enter_to_continue()
+        run_menu(self, self.MENU_SCREENS, "inventory")
+    
+    def inventory_screen(self) -> Transition:
+        """Inventory tabs"""
+        clear_screen()
+        print(f"{colorize_text('═══ INVENTORY & EQUIPMENT ═══', 'cyan', cache=True)}")
+        
+        # Tab selection
+        print(f"\n{colorize_text('Tabs:', 'yellow', cache=True)}")
+        print(f"  1. {colorize_text('BAG', 'cyan', cache=True)} - All items ({len(self.player.inventory)} items)")
+        print(f"  2. {colorize_text('EQUIPPED', 'green', cache=True)} - Current equipment")
+        print(f"  0. {colorize_text('Return to game', 'white', cache=True)}")
+        
+        tab_choice = input(f"\n{colorize_text('Choose tab (0-2):', 'white', cache=True)} ").strip()
+        transition = self.INVENTORY_TABS.get(tab_choice)
+        if transition is None:
+            print(f"{colorize_text('Invalid choice.', 'red', cache=True)}")
+            press_enter_to_continue()
+            return STAY
+        return transition
     
-    def show_bag_tab(self):
-        """Show bag tab with all items"""
+    def bag_screen(self, page: int = 0) -> Transition:
+        """Show bag tab with all items, a page at a time"""
         clear_screen()
-        print(f"{colorize_text('═══ BAG - ALL ITEMS ═══', 'cyan')}")
+        print(f"{colorize_text('═══ BAG - ALL ITEMS ═══', 'cyan', cache=True)}")
         
         if not self.player.inventory:
-            print(f"{colorize_text('Your bag is empty.', 'white')}")
-            print(f"{colorize_text('Explore to find items!', 'yellow')}")
+            print(f"{colorize_text('Your bag is empty.', 'white', cache=True)}")
+            print(f"{colorize_text('Explore to find items!', 'yellow', cache=True)}")
             press_enter_to_continue()
-            return
+            return BACK
             
-        print(f"\nInventory Items:")
-        for i, item in enumerate(self.player.inventory):
-            equipped_marker = "⚡" if self.is_item_equipped(item) else "  "
+        inventory = self.player.inventory
+        pages = inventory.page_count(self.BAG_PAGE_SIZE)
+        page = min(page, pages - 1)
+        
+        print(f"\nInventory Items:" + (f" (page {page + 1}/{pages})" if pages > 1 else ""))
+        for i, (item_id, item) in enumerate(inventory.page(page, self.BAG_PAGE_SIZE), page * self.BAG_PAGE_SIZE):
+            equipped_marker = "⚡" if self.is_item_equipped(item_id) else "  "
             print(f"  {equipped_marker}{i+1}. {colorize_text(item['name'], 'yellow')}")
+        if page + 1 < pages:
+            print(f"  n. Next page")
+        if page > 0:
+            print(f"  p. Previous page")
         print(f"  0. Return to inventory tabs")
         
-        try:
-            choice = input(f"\n{colorize_text('Examine item (0-{len(self.player.inventory)}):', 'white')} ").strip()
+        choice = input(f"\n{colorize_text('Examine item (0-{len(inventory)}):', 'white')} ").strip().lower()
+        if choice == '0':
+            return BACK
+        if choice == 'n' and page + 1 < pages:
+            return replace("bag", page + 1)
+        if choice == 'p' and page > 0:
+            return replace("bag", page - 1)
             
-            if choice == '0':
-                return
-                
+        try:
             item_index = int(choice) - 1
-            if 0 <= item_index < len(self.player.inventory):
-                item = self.player.inventory[item_index]
-                self.show_item_details(item, item_index)
-            else:
-                print(f"{colorize_text('Invalid choice.', 'red')}")
-                press_enter_to_continue()
-                
         except ValueError:
-            print(f"{colorize_text('Please enter a number.', 'red')}")
+            print(f"{colorize_text('Please enter a number.', 'red', cache=True)}")
             press_enter_to_continue()
+            return BACK
+            
+        if 0 <= item_index < len(inventory):
+            # Replaces the bag, so backing out of the item lands on the tabs
+            return replace("item", inventory.at(item_index)[0])
+        print(f"{colorize_text('Invalid choice.', 'red', cache=True)}")
+        press_enter_to_continue()
+        return BACK
     
-    def show_equipped_tab(self):
+    def equipped_screen(self) -> Transition:
         """Show equipped tab with equipment silhouette"""
         clear_screen()
-        print(f"{colorize_text('═══ EQUIPPED GEAR ═══', 'green')}")
+        print(f"{colorize_text('═══ EQUIPPED GEAR ═══', 'green', cache=True)}")
         
         # Equipment silhouette
-        print(f"\n{colorize_text('Equipment Silhouette:', 'yellow')}")
+        print(f"\n{colorize_text('Equipment Silhouette:', 'yellow', cache=True)}")
         print(f"""
         ┌─────────────┐
         │    HEAD     │ {self.get_equipped_item_name('head')}
@@ -959,74 +990,78 @@ class Game:
         print(f"Equipped Items: {colorize_text(f'{equipped_count}/3', 'yellow')} buff items maximum")
         
         if equipped_count == 0:
-            print(f"{colorize_text('No equipment currently equipped.', 'white')}")
-            print(f"{colorize_text('Use the BAG tab to equip items.', 'cyan')}")
+            print(f"{colorize_text('No equipment currently equipped.', 'white', cache=True)}")
+            print(f"{colorize_text('Use the BAG tab to equip items.', 'cyan', cache=True)}")
         
         press_enter_to_continue()
+        return BACK
     
     def get_equipped_item_name(self, slot: str) -> str:
         """Get name of equipped item in slot"""
         # For now, simplified system
-        if slot == 'weapon' and self.player.equipped_weapon:
-            return colorize_text(self.player.equipped_weapon['name'], 'green')
+        item = self.player.inventory.equipped_item(slot)
+        if item is not None:
+            return colorize_text(item['name'], 'green')
         elif slot in ['head', 'chest', 'arms', 'legs', 'boots', 'rings', 'necklace']:
             # Placeholder for future equipment system
             return colorize_text('(Empty)', 'white')
         else:
             return colorize_text('(Empty)', 'white')
     
-    def is_item_equipped(self, item: dict) -> bool:
+    def is_item_equipped(self, item_id: int) -> bool:
         """Check if item is currently equipped"""
-        return self.player.equipped_weapon == item
+        return self.player.inventory.is_equipped(item_id)
     
     def count_equipped_items(self) -> int:
         """Count currently equipped items"""
-        count = 0
-        if self.player.equipped_weapon:
-            count += 1
-        # Add other equipment slots here when implemented
-        return count
+        return len(self.player.inventory.equipped)
         
     def show_detailed_stats(self):
         """Show detailed player statistics with upgrade options"""
+        run_menu(self, self.MENU_SCREENS, "stats")
+    
+    def stats_screen(self) -> Transition:
+        """Character progression and the upgrade prompt"""
         clear_screen()
         status = self.player.get_status_summary()
         
-        print(f"{colorize_text('═══ CHARACTER PROGRESSION ═══', 'cyan')}")
+        print(f"{colorize_text('═══ CHARACTER PROGRESSION ═══', 'cyan', cache=True)}")
         print(format_stats_display(self.player))
         
         # Show hidden metrics if sanity is low
         if self.player.sanity < 60:
-            print(f"\n{colorize_text('═══ ENTITY ANALYSIS ═══', 'red')}")
+            print(f"\n{colorize_text('═══ ENTITY ANALYSIS ═══', 'red', cache=True)}")
             print(f"Predictability: {colorize_text(status['predictability'], 'red')}")
             print(f"Sanity: {colorize_text(status['sanity'], 'red')}")
         
         # Show upgrade options
-        self.show_stat_upgrade_menu()
+        return self.show_stat_upgrade_menu()
+    
+    def stat_upgrade_cost(self, current_value: int) -> int:
+        """Souls-like scaling: cost increases quadratically after base 10"""
+        if current_value <= 10:
+            return 10
+        elif current_value <= 20:
+            return 15 + (current_value - 10) * 2
+        elif current_value <= 30:
+            return 35 + (current_value - 20) * 5
+        else:
+            return 85 + (current_value - 30) * 10  # Expensive high-level scaling
         
-    def show_stat_upgrade_menu(self):
+    def show_stat_upgrade_menu(self) -> Transition:
         """Allow players to upgrade stats with Souls-like scaling"""
-        print(f"\n{colorize_text('═══ SOULS-LIKE STAT UPGRADES ═══', 'yellow')}")
+        print(f"\n{colorize_text('═══ SOULS-LIKE STAT UPGRADES ═══', 'yellow', cache=True)}")
         print(f"Available Ashlight: {colorize_text(str(self.player.ashlight), 'yellow')} shards")
         
         # Calculate costs with souls-like scaling
         stats = ["str", "dex", "int", "fth", "end", "vit"]
         costs = {}
         
-        print(f"\n{colorize_text('Upgrade Options (costs increase with level):', 'cyan')}")
+        print(f"\n{colorize_text('Upgrade Options (costs increase with level):', 'cyan', cache=True)}")
         
         for i, stat in enumerate(stats):
             current_value = self.player.stats[stat]
-            # Souls-like scaling: cost increases quadratically after base 10
-            if current_value <= 10:
-                cost = 10
-            elif current_value <= 20:
-                cost = 15 + (current_value - 10) * 2
-            elif current_value <= 30:
-                cost = 35 + (current_value - 20) * 5
-            else:
-                cost = 85 + (current_value - 30) * 10  # Expensive high-level scaling
-                
+            cost = self.stat_upgrade_cost(current_value)
             costs[stat] = cost
             
             # Show the upgrade with stat impacts
@@ -1036,7 +1071,7 @@ class Game:
             print(f"  {i+1}. {stat.upper()}: {colorize_text(str(current_value), 'white')} → {colorize_text(str(current_value + 1), 'green')} ({affordability})")
             print(f"      {colorize_text(impact_desc, 'yellow')}")
             
-        print(f"  0. {colorize_text('Return to game', 'white')}")
+        print(f"  0. {colorize_text('Return to game', 'white', cache=True)}")
         
         # Show Entity's warning about stat growth
         if any(self.player.stats[stat] > 15 for stat in stats):
@@ -1045,14 +1080,14 @@ class Game:
                 self.player.floor,
                 "high_stats_warning"
             )
-            print(f"\n{colorize_text('Entity Warning:', 'red')}")
+            print(f"\n{colorize_text('Entity Warning:', 'red', cache=True)}")
             print(f"{colorize_text(entity_warning, context='lore')}")
         
         try:
-            choice = input(f"\n{colorize_text('Upgrade stat (0-6):', 'white')} ").strip()
+            choice = input(f"\n{colorize_text('Upgrade stat (0-6):', 'white', cache=True)} ").strip()
             
             if choice == '0':
-                return
+                return EXIT
                 
             stat_index = int(choice) - 1
             if 0 <= stat_index < len(stats):
@@ -1062,45 +1097,54 @@ class Game:
                 if self.player.ashlight >= cost:
                     # Confirm expensive upgrades
                     if cost > 50:
-                        confirm = input(f"{colorize_text(f'This upgrade costs {cost} shards. Confirm? (y/n):', 'yellow')} ").strip().lower()
-                        if confirm not in ['y', 'yes']:
-                            print(f"{colorize_text('Upgrade cancelled.', 'white')}")
-                            return
-                    
-                    # Apply the upgrade
-                    self.player.ashlight -= cost
-                    old_value = self.player.stats[stat_name]
-                    self.player.stats[stat_name] += 1
-                    
-                    # Play stat upgrade sound
-                    music_manager.play_sound_effect("stat")
-                    
-                    # Update derived stats with better scaling
-                    self.update_derived_stats(stat_name, old_value)
-                    
-                    print(f"\n{colorize_text(f'{stat_name.upper()} increased: {old_value} → {self.player.stats[stat_name]}!', 'green')}")
-                    print(f"Cost: {colorize_text(str(cost), 'red')} shards")
-                    print(f"Remaining: {colorize_text(str(self.player.ashlight), 'yellow')} shards")
-                    
-                    # Show Entity adaptive response
-                    if self.player.stats[stat_name] > 20:
-                        adaptation = self.entity_ai.generate_lore(
-                            self.player.state_vector(),
-                            self.player.floor,
-                            f"high_{stat_name}_adaptation"
-                        )
-                        print(f"\n{colorize_text('The Entity adapts...', 'red')}")
-                        print(f"{colorize_text(adaptation, context='lore')}")
-                        
+                        return replace("confirm_upgrade", stat_name, cost)
+                    self.apply_stat_upgrade(stat_name, cost)
                 else:
                     print(f"{colorize_text(f'Not enough Ashlight! Need {cost}, have {self.player.ashlight}.', 'red')}")
             else:
-                print(f"{colorize_text('Invalid choice.', 'red')}")
+                print(f"{colorize_text('Invalid choice.', 'red', cache=True)}")
                 
         except ValueError:
-            print(f"{colorize_text('Please enter a number.', 'red')}")
+            print(f"{colorize_text('Please enter a number.', 'red', cache=True)}")
             
         press_enter_to_continue()
+        return EXIT
+    
+    def confirm_upgrade_screen(self, stat_name: str, cost: int) -> Transition:
+        """Confirmation for expensive upgrades"""
+        confirm = input(f"{colorize_text(f'This upgrade costs {cost} shards. Confirm? (y/n):', 'yellow')} ").strip().lower()
+        if confirm not in ['y', 'yes']:
+            print(f"{colorize_text('Upgrade cancelled.', 'white', cache=True)}")
+            return EXIT
+        self.apply_stat_upgrade(stat_name, cost)
+        press_enter_to_continue()
+        return EXIT
+    
+    def apply_stat_upgrade(self, stat_name: str, cost: int):
+        """Spend Ashlight on one stat point"""
+        self.player.ashlight -= cost
+        old_value = self.player.stats[stat_name]
+        self.player.stats[stat_name] += 1
+        
+        # Play stat upgrade sound
+        music_manager.play_sound_effect("stat")
+        
+        # Update derived stats with better scaling
+        self.update_derived_stats(stat_name, old_value)
+        
+        print(f"\n{colorize_text(f'{stat_name.upper()} increased: {old_value} → {self.player.stats[stat_name]}!', 'green')}")
+        print(f"Cost: {colorize_text(str(cost), 'red')} shards")
+        print(f"Remaining: {colorize_text(str(self.player.ashlight), 'yellow')} shards")
+        
+        # Show Entity adaptive response
+        if self.player.stats[stat_name] > 20:
+            adaptation = self.entity_ai.generate_lore(
+                self.player.state_vector(),
+                self.player.floor,
+                f"high_{stat_name}_adaptation"
+            )
+            print(f"\n{colorize_text('The Entity adapts...', 'red')}")
+            print(f"{colorize_text(adaptation, context='lore')}")
     
     def get_stat_impact_description(self, stat: str, current_value: int) -> str:
         """Get description of what upgrading this stat will do"""
@@ -1166,15 +1210,18 @@ class Game:
         else:
             return 115 + (end_value - 25) * 3
         
-    def show_item_details(self, item: Dict[str, Any], item_index: int):
+    def item_screen(self, item_id: int) -> Transition:
         """Show detailed item information and equip options"""
+        item = self.player.inventory.get(item_id)
+        if item is None:
+            return BACK
         clear_screen()
-        print(f"{colorize_text('═══ ITEM DETAILS ═══', 'yellow')}")
+        print(f"{colorize_text('═══ ITEM DETAILS ═══', 'yellow', cache=True)}")
         
         print(f"\n{colorize_text(item['name'], 'yellow')}")
         
         # Show item stats
-        print(f"\n{colorize_text('Stats:', 'white')}")
+        print(f"\n{colorize_text('Stats:', 'white', cache=True)}")
         stats = item.get('stats', {})
         for stat_name, stat_value in stats.items():
             if stat_name == 'damage' and stat_value > 0:
@@ -1184,8 +1231,7 @@ class Game:
             elif stat_name == 'effect' and stat_value > 0:
                 print(f"  Special Effect: {colorize_text(f'+{stat_value}', 'cyan')}")
             elif stat_name == 'rarity':
-                rarity_names = ["Common", "Uncommon", "Rare", "Epic"]
-                rarity_name = rarity_names[min(stat_value, len(rarity_names) - 1)]
+                rarity_name = RARITY_NAMES[min(stat_value, len(RARITY_NAMES) - 1)]
                 print(f"  Rarity: {colorize_text(rarity_name, 'magenta')}")
                 
         # Show curse risk if present
@@ -1194,77 +1240,72 @@ class Game:
             print(f"  {colorize_text(f'Curse Risk: {curse_risk:.1%}', 'red')}")
             
         # Show equip options
-        print(f"\n{colorize_text('Actions:', 'cyan')}")
+        print(f"\n{colorize_text('Actions:', 'cyan', cache=True)}")
         
-        if item.get('stats', {}).get('damage', 0) > 0:
-            # Weapon
-            if self.player.equipped_weapon and self.player.equipped_weapon == item:
-                print(f"  1. {colorize_text('Unequip', 'red')}")
+        if item_category(item) == "weapon":
+            if self.is_item_equipped(item_id):
+                print(f"  1. {colorize_text('Unequip', 'red', cache=True)}")
             else:
-                print(f"  1. {colorize_text('Equip as weapon', 'green')}")
+                print(f"  1. {colorize_text('Equip as weapon', 'green', cache=True)}")
         else:
-            print(f"  1. {colorize_text('Use/Consume', 'green')}")
-            
-        print(f"  2. {colorize_text('Drop item', 'red')}")
-        print(f"  0. {colorize_text('Back to inventory', 'white')}")
-        
-        try:
-            action = input(f"\n{colorize_text('Choose action:', 'white')} ").strip()
-            
-            if action == '0':
-                self.show_inventory()  # Go back to inventory
-            elif action == '1':
-                self.handle_item_action(item, item_index, "primary")
-            elif action == '2':
-                self.handle_item_drop(item, item_index)
-            else:
-                print(f"{colorize_text('Invalid choice.', 'red')}")
-                press_enter_to_continue()
-                self.show_item_details(item, item_index)  # Return to item details
-                
-        except ValueError:
-            print(f"{colorize_text('Please enter a number.', 'red')}")
-            press_enter_to_continue()
-            self.show_item_details(item, item_index)
+            print(f"  1. {colorize_text('Use/Consume', 'green', cache=True)}")
+            
+        print(f"  2. {colorize_text('Drop item', 'red', cache=True)}")
+        print(f"  0. {colorize_text('Back to inventory', 'white', cache=True)}")
+        
+        action = input(f"\n{colorize_text('Choose action:', 'white', cache=True)} ").strip()
+        
+        if action == '0':
+            return BACK
+        elif action == '1':
+            self.handle_item_action(item_id, "primary")
+            return BACK
+        elif action == '2':
+            self.handle_item_drop(item_id)
+            return BACK
+        print(f"{colorize_text('Invalid choice.', 'red', cache=True)}")
+        press_enter_to_continue()
+        return STAY
             
-    def handle_item_action(self, item: Dict[str, Any], item_index: int, action_type: str):
+    def handle_item_action(self, item_id: int, action_type: str):
         """Handle equipping or using items"""
-        if item.get('stats', {}).get('damage', 0) > 0:
+        inventory = self.player.inventory
+        item = inventory.get(item_id)
+        if item_category(item) == "weapon":
             # Weapon equipping
-            if self.player.equipped_weapon == item:
+            if inventory.equipped.get("weapon") == item_id:
                 # Unequip
-                self.player.equipped_weapon = None
+                inventory.unequip("weapon")
                 print(f"\n{colorize_text('Unequipped ' + item['name'], 'yellow')}")
             else:
                 # Equip weapon
                 if self.player.equipped_weapon:
                     print(f"Replacing {colorize_text(self.player.equipped_weapon['name'], 'yellow')}")
-                self.player.equipped_weapon = item
+                inventory.equip("weapon", item_id)
                 music_manager.play_sound_effect("notification")
                 print(f"\n{colorize_text('Equipped ' + item['name'] + '!', 'green')}")
         else:
             # Consumable item
-            self.use_consumable_item(item, item_index)
+            self.use_consumable_item(item_id)
             
         press_enter_to_continue()
         
-    def handle_item_drop(self, item: Dict[str, Any], item_index: int):
+    def handle_item_drop(self, item_id: int):
         """Handle dropping items"""
+        inventory = self.player.inventory
+        if item_id not in inventory:
+            return
+        was_equipped = self.is_item_equipped(item_id)
+        item = inventory.remove(item_id)  # Unequips it too
         print(f"\n{colorize_text('Dropped ' + item['name'], 'red')}")
-        
-        # Remove from inventory
-        if 0 <= item_index < len(self.player.inventory):
-            dropped_item = self.player.inventory.pop(item_index)
-            
-            # Unequip if it was equipped
-            if self.player.equipped_weapon == dropped_item:
-                self.player.equipped_weapon = None
-                print(f"{colorize_text('Weapon unequipped.', 'yellow')}")
+        if was_equipped:
+            print(f"{colorize_text('Weapon unequipped.', 'yellow')}")
                 
         press_enter_to_continue()
         
-    def use_consumable_item(self, item: Dict[str, Any], item_index: int):
+    def use_consumable_item(self, item_id: int):
         """Use consumable items"""
+        item = self.player.inventory.get(item_id)
         # Basic consumable effects
         stats = item.get('stats', {})
         
@@ -1275,7 +1316,7 @@ class Game:
             print(f"\n{colorize_text('Used ' + item['name'] + f' - Healed {heal_amount} HP!', 'green')}")
             
             # Remove from inventory
-            self.player.inventory.pop(item_index)
+            self.player.inventory.remove(item_id)
         else:
             print(f"\n{colorize_text('This item cannot be consumed.', 'yellow')}")
         
@@ -1325,7 +1366,7 @@ class Game:
             item = self.entity_ai.generate_item(self.player.state_vector(), self.player.floor)
             ashlight_gain = random.randint(5, 15)
             
-            self.player.inventory.append(item)
+            self.player.inventory.add(item)
             self.player.ashlight += ashlight_gain
             
             print(f"\n{colorize_text('You discover hidden treasures!', 'yellow')}")
@@ -1486,9 +1527,7 @@ class Game:
         miniboss = self.entity_ai.generate_mob(self.player.state_vector(), self.player.floor)
         
         # Enhance stats for miniboss
-        for stat in miniboss["stats"]:
-            miniboss["stats"][stat] = int(miniboss["stats"][stat] * 1.5)
-        miniboss["name"] = f"Elite {miniboss['name']}"
+        miniboss.make_elite(1.5)
         
         miniboss_name = miniboss["name"]
         print(f"\n{colorize_text(f'MINIBOSS: {miniboss_name} appears!', 'red')}")
@@ -1565,7 +1604,7 @@ class Game:
         item = self.entity_ai.generate_item(self.player.state_vector(), self.player.floor)
         ashlight_gain = random.randint(10, 25)
         
-        self.player.inventory.append(item)
+        self.player.inventory.add(item)
         self.player.ashlight += ashlight_gain
         
         print(f"\n{colorize_text('🎒 LOOT DISCOVERED:', 'yellow')}")
@@ -1604,31 +1643,34 @@ class Game:
             
     def attempt_npc_interaction(self):
         """Attempt to interact with NPCs"""
-        
-        print(f"\n{colorize_text('Looking for someone to talk to...', 'cyan')}")
+        run_menu(self, self.MENU_SCREENS, "npcs")
+    
+    def npc_select_screen(self) -> Transition:
+        """Pick someone to talk to"""
+        print(f"\n{colorize_text('Looking for someone to talk to...', 'cyan', cache=True)}")
         
         # Check if NPC is present
         available_npcs = self.npc_manager.get_available_npcs(self.player.floor)
         
         if not available_npcs:
-            print(f"{colorize_text('The shadows are empty. No one to talk to here.', 'white')}")
-            print(f"{colorize_text('(NPCs may appear in different rooms or floors)', 'yellow')}")
+            print(f"{colorize_text('The shadows are empty. No one to talk to here.', 'white', cache=True)}")
+            print(f"{colorize_text('(NPCs may appear in different rooms or floors)', 'yellow', cache=True)}")
             press_enter_to_continue()
-            return
+            return EXIT
             
         # Show available NPCs
-        print(f"\n{colorize_text('You sense presences nearby:', 'green')}")
+        print(f"\n{colorize_text('You sense presences nearby:', 'green', cache=True)}")
         for i, npc in enumerate(available_npcs):
             print(f"  {colorize_text(str(i+1), 'cyan')}. {colorize_text(npc, 'green')}")
-        print(f"  {colorize_text('0', 'cyan')}. {colorize_text('Leave', 'white')}")
+        print(f"  {colorize_text('0', 'cyan', cache=True)}. {colorize_text('Leave', 'white', cache=True)}")
             
         try:
-            choice_input = input(f"\n{colorize_text('Talk to (number):', 'white')} ").strip()
+            choice_input = input(f"\n{colorize_text('Talk to (number):', 'white', cache=True)} ").strip()
             
             if choice_input == '0':
-                print(f"{colorize_text('You step back into the shadows.', 'white')}")
+                print(f"{colorize_text('You step back into the shadows.', 'white', cache=True)}")
                 press_enter_to_continue()
-                return
+                return EXIT
                 
             choice = int(choice_input) - 1
             if 0 <= choice < len(available_npcs):
@@ -1639,86 +1681,82 @@ class Game:
                 self.npc_manager.interact(self.player, npc_name, "greeting")
                 
                 # Then offer interaction options
-                self.show_npc_interaction_menu(npc_name)
-                press_enter_to_continue()
+                return replace("npc", npc_name)
             else:
-                print(f"{colorize_text('Invalid choice. No one by that number.', 'red')}")
-                press_enter_to_continue()
+                print(f"{colorize_text('Invalid choice. No one by that number.', 'red', cache=True)}")
         except (ValueError, IndexError):
-            print(f"{colorize_text('Invalid input. Please enter a number.', 'red')}")
-            press_enter_to_continue()
+            print(f"{colorize_text('Invalid input. Please enter a number.', 'red', cache=True)}")
+        press_enter_to_continue()
+        return EXIT
+    
+    # Per-NPC menu: (key, action, description, NPCManager.interact type; None leaves)
+    NPC_MENU_OPTIONS = {
+        "Faceless Merchant": (
+            ("1", "Trade", "Browse and buy items", "trade"),
+            ("2", "Help", "Assist the merchant", "help"),
+            ("3", "Betray", "Attack and rob them", "betray"),
+            ("0", "Leave", "End conversation", None),
+        ),
+        "Blacktongue": (
+            ("1", "Enhance Weapons", "Upgrade your equipment", "trade"),
+            ("2", "Help", "Assist the blacksmith", "help"),
+            ("3", "Betray", "Attack and rob them", "betray"),
+            ("0", "Leave", "End conversation", None),
+        ),
+        "Still Flame Warden": (
+            ("1", "Train Skills", "Learn new abilities", "trade"),
+            ("2", "Help", "Assist the warden", "help"),
+            ("3", "Betray", "Attack and rob them", "betray"),
+            ("0", "Leave", "End conversation", None),
+        ),
+    }
+    # Default options for other NPCs
+    DEFAULT_NPC_OPTIONS = (
+        ("1", "Help", "Offer assistance", "help"),
+        ("2", "Chat", "Continue conversation", "greeting"),
+        ("3", "Betray", "Attack them", "betray"),
+        ("0", "Leave", "End conversation", None),
+    )
     
-    def show_npc_interaction_menu(self, npc_name: str):
+    def npc_screen(self, npc_name: str) -> Transition:
         """Show interaction options for specific NPC"""
-        print(f"\n{colorize_text('What would you like to do?', 'cyan')}")
+        print(f"\n{colorize_text('What would you like to do?', 'cyan', cache=True)}")
         
-        options = []
-        
-        if npc_name == "Faceless Merchant":
-            options = [
-                ("1", "Trade", "Browse and buy items"),
-                ("2", "Help", "Assist the merchant"),
-                ("3", "Betray", "Attack and rob them"),
-                ("0", "Leave", "End conversation")
-            ]
-        elif npc_name == "Blacktongue":
-            options = [
-                ("1", "Enhance Weapons", "Upgrade your equipment"),
-                ("2", "Help", "Assist the blacksmith"),
-                ("3", "Betray", "Attack and rob them"),
-                ("0", "Leave", "End conversation")
-            ]
-        elif npc_name == "Still Flame Warden":
-            options = [
-                ("1", "Train Skills", "Learn new abilities"),
-                ("2", "Help", "Assist the warden"),
-                ("3", "Betray", "Attack and rob them"),
-                ("0", "Leave", "End conversation")
-            ]
-        else:
-            # Default options for other NPCs
-            options = [
-                ("1", "Help", "Offer assistance"),
-                ("2", "Chat", "Continue conversation"),
-                ("3", "Betray", "Attack them"),
-                ("0", "Leave", "End conversation")
-            ]
-        
-        for key, action, description in options:
+        options = self.NPC_MENU_OPTIONS.get(npc_name, self.DEFAULT_NPC_OPTIONS)
+        for key, action, description, _ in options:
             print(f"  {colorize_text(key, 'cyan')} - {colorize_text(action, 'white')}: {description}")
         
         try:
-            choice = input(f"\n{colorize_text('Choose action:', 'white')} ").strip()
-            
-            if choice == "0":
-                print(f"{colorize_text('You step away from the conversation.', 'white')}")
-                return
-            elif choice == "1":
-                if npc_name == "Faceless Merchant":
-                    self.npc_manager.interact(self.player, npc_name, "trade")
-                elif npc_name == "Blacktongue":
-                    self.npc_manager.interact(self.player, npc_name, "trade")
-                elif npc_name == "Still Flame Warden":
-                    self.npc_manager.interact(self.player, npc_name, "trade")
-                else:
-                    self.npc_manager.interact(self.player, npc_name, "help")
-            elif choice == "2":
-                if npc_name in ["Faceless Merchant", "Blacktongue", "Still Flame Warden"]:
-                    self.npc_manager.interact(self.player, npc_name, "help")
-                else:
-                    self.npc_manager.interact(self.player, npc_name, "greeting")
-            elif choice == "3":
-                print(f"\n{colorize_text('Are you sure you want to betray this NPC? This will have permanent consequences!', 'red')}")
-                confirm = input(f"{colorize_text('Type YES to confirm betrayal:', 'red')} ").strip()
-                if confirm.upper() == "YES":
-                    self.npc_manager.interact(self.player, npc_name, "betray")
-                else:
-                    print(f"{colorize_text('Betrayal cancelled.', 'white')}")
+            choice = input(f"\n{colorize_text('Choose action:', 'white', cache=True)} ").strip()
+            interactions = {key: interaction for key, _, _, interaction in options}
+            
+            if choice not in interactions:
+                print(f"{colorize_text('Invalid choice.', 'red', cache=True)}")
+            elif interactions[choice] is None:
+                print(f"{colorize_text('You step away from the conversation.', 'white', cache=True)}")
+            elif interactions[choice] == "betray":
+                print(f"\n{colorize_text('Are you sure you want to betray this NPC? This will have permanent consequences!', 'red', cache=True)}")
+                return replace("confirm_betrayal", npc_name)
             else:
-                print(f"{colorize_text('Invalid choice.', 'red')}")
+                self.npc_manager.interact(self.player, npc_name, interactions[choice])
                 
         except (ValueError, KeyboardInterrupt):
-            print(f"{colorize_text('Conversation interrupted.', 'white')}")
+            print(f"{colorize_text('Conversation interrupted.', 'white', cache=True)}")
+        press_enter_to_continue()
+        return EXIT
+    
+    def confirm_betrayal_screen(self, npc_name: str) -> Transition:
+        """Last chance before a betrayal"""
+        try:
+            confirm = input(f"{colorize_text('Type YES to confirm betrayal:', 'red', cache=True)} ").strip()
+            if confirm.upper() == "YES":
+                self.npc_manager.interact(self.player, npc_name, "betray")
+            else:
+                print(f"{colorize_text('Betrayal cancelled.', 'white', cache=True)}")
+        except (ValueError, KeyboardInterrupt):
+            print(f"{colorize_text('Conversation interrupted.', 'white', cache=True)}")
+        press_enter_to_continue()
+        return EXIT
             
     def advance_floor(self):
         """Advance to next floor"""
@@ -1852,30 +1890,102 @@ class Game:
         # Save whisper archive
         save_whisper_archive(self.entity_ai.whisper_archive)
         
+        # Per-phase timing breakdown when run with --profile
+        profiling.dump()
+        
         press_enter_to_continue("Press Enter to return to the abyss...")
         
-    def run(self):
-        """Main game entry point"""
+    def snapshot(self) -> bytes:
+        """Serialize this session (game, player, rooms, NPCs, per-player Entity state)"""
+        state = {name: value for name, value in self.__dict__.items() if name != "entity_ai"}
+        return encode_session(self, self.entity_ai, {"game": state, "entity": self.entity_ai.session_state()})
+    
+    def restore(self, data: bytes):
+        """Load a session snapshot into this game, keeping its EntityAI"""
+        payload = decode_session(data, self, self.entity_ai)
+        self.__dict__.update(payload["game"])
+        self.entity_ai.restore_session_state(payload["entity"])
+    
+    def run(self, resume: bool = False):
+        """Main game entry point (resume=True continues a restored session)"""
         try:
-            self.show_intro()
-            self.create_character() 
-            self.start_music()
+            # Output delays and timed input run on this game's clock (per session in server mode)
+            ui_distorter.clock = self.clock
+            input_manager.clock = self.clock
+            pacer.clock = self.clock
+            if resume:
+                print(f"\n{colorize_text('The Entity re-threads your descent...', context='whisper')}")
+            else:
+                self.show_intro()
+                self.create_character() 
+                self.start_music()
             self.main_game_loop()
         except KeyboardInterrupt:
             print(f"\n\n{colorize_text('The Entity releases you... for now.', context='whisper')}")
         except Exception as e:
             # Import sys to write directly to stderr to avoid recursive print issues
             import sys
-            sys.stderr.write(f"Game error: {str(e)}\n")
-            sys.stderr.flush()
+            # A --simulate script running out is a clean end of the run, not an error
+            if not (isinstance(e, EOFError) and isinstance(sys.stdin, ScriptedInput)):
+                sys.stderr.write(f"Game error: {str(e)}\n")
+                sys.stderr.flush()
             # Re-raise the exception so the web interface can handle it
             raise
         finally:
             # Cleanup
             if hasattr(self, 'entity_ai'):
                 save_whisper_archive(self.entity_ai.whisper_archive)
+                self.entity_ai.whisper_archive.close()
+                self.entity_ai.bible_store.flush()
 
 if __name__ == "__main__":
+    import sys
+    import argparse
     import torch  # Import here to ensure it's available
-    game = Game()
-    game.run()
+    
+    parser = argparse.ArgumentParser(description="Terminal Souls")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time the hot paths and print a per-phase breakdown (stderr) when the game ends")
+    parser.add_argument("--pacing", choices=PACING_MODES, default=None,
+                        help="'Press Enter' pauses: wait, auto-advance, merge back-to-back ones, or skip "
+                             "(default: interactive, or skip with --simulate)")
+    parser.add_argument("--auto-advance-ms", type=int, default=1500,
+                        help="How long an auto-advanced pause stays on screen")
+    parser.add_argument("--no-color", action="store_true", help="Plain text output (NO_COLOR is honoured too)")
+    parser.add_argument("--lore-share", type=float, default=0.0,
+                        help="Fraction of lore lines drawn from the lore/ chapters and whispers (default: none)")
+    parser.add_argument("--whisper-log", metavar="DIR",
+                        help="Also append every whisper of the run to a gzip log in DIR (the end screen then "
+                             "ranks whispers from the full log)")
+    parser.add_argument("--simulate", metavar="SCRIPT",
+                        help="Play the input lines in SCRIPT on a virtual clock: no real waiting, timed "
+                             "prompts judged in simulated time ('@SECONDS text' sets a line's think time)")
+    parser.add_argument("--think-s", type=float, default=1.0,
+                        help="Simulated think time of script lines without an '@SECONDS' prefix")
+    args = parser.parse_args()
+    if args.no_color:
+        set_color_enabled(False)
+    if args.profile:
+        profiling.enable()
+    pacer.configure(args.pacing or ("skip" if args.simulate else "interactive"), auto_advance_ms=args.auto_advance_ms)
+    
+    clock = None
+    if args.simulate:
+        clock = VirtualClock()
+        sys.stdin = ScriptedInput(open(args.simulate, encoding="utf-8"), clock, args.think_s)
+    
+    entity_ai = None
+    if args.lore_share > 0 or args.whisper_log:
+        entity_ai = EntityAI(whisper_spill_dir=args.whisper_log, lore_corpus_share=args.lore_share)
+    game = Game(entity_ai, clock)
+    started = time.perf_counter()
+    try:
+        game.run()
+    except EOFError:
+        if not args.simulate:
+            raise  # Only a script is expected to run out
+    finally:
+        profiling.dump()  # Runs that end without a game over (exit, Ctrl+C)
+        if args.simulate:
+            sys.stderr.write(f"Simulated {clock.now():.1f}s of play ({sys.stdin.lines} inputs) "
+                             f"in {time.perf_counter() - started:.2f}s\n")
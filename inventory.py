@@ -0,0 +1,132 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ITEM_CATEGORIES = ("weapon", "consumable")
+
+def item_category(item: Dict[str, Any]) -> str:
+    """Anything that deals damage is wielded; everything else is used up"""
+    return "weapon" if item.get("stats", {}).get("damage", 0) > 0 else "consumable"
+
+class Inventory:
+    """Player items under stable ids, with id-based equip slots and per-category indexes"""
+    
+    __slots__ = ("_items", "_order", "_position", "_holes", "_next_id", "_categories", "equipped")
+    
+    def __init__(self):
+        self._items: Dict[int, Dict[str, Any]] = {}  # id -> item
+        self._order: List[Optional[int]] = []  # ids in pickup order; None where one was removed
+        self._position: Dict[int, int] = {}  # id -> index in _order
+        self._holes = 0  # Removed entries not yet compacted out of _order
+        self._next_id = 1  # Never reused, so an id held by a menu can't point at another item
+        self._categories: Dict[str, Dict[int, None]] = {category: {} for category in ITEM_CATEGORIES}
+        self.equipped: Dict[str, int] = {}  # Equip slot -> item id
+    
+    def add(self, item: Dict[str, Any]) -> int:
+        """Store an item; returns its id"""
+        item_id = self._next_id
+        self._next_id += 1
+        self._items[item_id] = item
+        self._position[item_id] = len(self._order)
+        self._order.append(item_id)
+        self._categories[item_category(item)][item_id] = None
+        return item_id
+    
+    def remove(self, item_id: int) -> Dict[str, Any]:
+        """Take an item out (unequipping it); KeyError if it isn't here"""
+        item = self._items.pop(item_id)
+        self._order[self._position.pop(item_id)] = None
+        self._holes += 1
+        for ids in self._categories.values():
+            ids.pop(item_id, None)
+        for slot in [slot for slot, equipped_id in self.equipped.items() if equipped_id == item_id]:
+            del self.equipped[slot]
+        return item
+    
+    def clear(self):
+        self._items.clear()
+        self._order.clear()
+        self._position.clear()
+        self._holes = 0
+        for ids in self._categories.values():
+            ids.clear()
+        self.equipped.clear()
+    
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        return self._items.get(item_id)
+    
+    def recategorize(self, item_id: int):
+        """Refresh an item's category index entry after its stats changed"""
+        for ids in self._categories.values():
+            ids.pop(item_id, None)
+        self._categories[item_category(self._items[item_id])][item_id] = None
+    
+    def category(self, name: str) -> List[Tuple[int, Dict[str, Any]]]:
+        """(id, item) pairs in one category, in pickup order"""
+        return [(item_id, self._items[item_id]) for item_id in self._categories[name]]
+    
+    def _compact(self):
+        self._order = [item_id for item_id in self._order if item_id is not None]
+        self._position = {item_id: index for index, item_id in enumerate(self._order)}
+        self._holes = 0
+    
+    def at(self, position: int) -> Tuple[int, Dict[str, Any]]:
+        """(id, item) at a 0-based listing position"""
+        if self._holes:
+            self._compact()
+        item_id = self._order[position]
+        return item_id, self._items[item_id]
+    
+    def page(self, number: int, size: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """(id, item) pairs on one 0-based page of the listing"""
+        if self._holes:
+            self._compact()
+        return [(item_id, self._items[item_id]) for item_id in self._order[number * size:(number + 1) * size]]
+    
+    def page_count(self, size: int) -> int:
+        return max(1, -(-len(self._items) // size))
+    
+    def entries(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(id, item) pairs in pickup order"""
+        for item_id in self._order:
+            if item_id is not None:
+                yield item_id, self._items[item_id]
+    
+    def equip(self, slot: str, item_id: int):
+        if item_id not in self._items:
+            raise KeyError(item_id)
+        self.equipped[slot] = item_id
+    
+    def unequip(self, slot: str) -> Optional[int]:
+        return self.equipped.pop(slot, None)
+    
+    def equipped_item(self, slot: str) -> Optional[Dict[str, Any]]:
+        item_id = self.equipped.get(slot)
+        return None if item_id is None else self._items[item_id]
+    
+    def is_equipped(self, item_id: int) -> bool:
+        return item_id in self.equipped.values()  # A handful of slots, compared by id
+    
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._items
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (item for _, item in self.entries())
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __bool__(self) -> bool:
+        return bool(self._items)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"next_id": self._next_id, "items": [[item_id, item] for item_id, item in self.entries()],
+                "equipped": dict(self.equipped)}
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__()
+        for item_id, item in state["items"]:
+            self._items[item_id] = item
+            self._position[item_id] = len(self._order)
+            self._order.append(item_id)
+            self._categories[item_category(item)][item_id] = None
+        self._next_id = state["next_id"]
+        self.equipped.update(state["equipped"])
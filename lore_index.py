@@ -0,0 +1,232 @@
+import os
+import re
+import mmap
+import glob
+import random
+import struct
+import hashlib
+import tempfile
+from typing import Iterator, List, Optional, Tuple
+
+from narrator import NarratorEngine, TONE_BANDS
+
+# Packed lore index: the source files are parsed once into fragment records plus
+# one UTF-8 text blob, written to a single cache file that is memory-mapped.
+# Lookups read a bucket, one fragment record and one slice of the blob.
+LORE_INDEX_MAGIC = b"TSLORE02"  # Bump when the layout or the tagging rules change
+LORE_INDEX_NAME = ".index.bin"  # Written inside the lore directory (git-ignored)
+LORE_FLOORS = 5  # Chapter N unlocks from floor N; deeper floors see everything
+LORE_FRAGMENT_MIN = 24  # Fragment length bounds in characters: long enough to say
+LORE_FRAGMENT_MAX = 160  # something, short enough for one line of game text
+
+TONE_NAMES = tuple(band for _, band in TONE_BANDS)
+LORE_THEMES = ("whisper", "betrayal", "death", "allies", "code", "memory", "void")
+THEME_KEYWORDS = (  # First theme with a keyword in the fragment wins; "void" otherwise
+    ("betrayal", ("betray", "trust")),
+    ("death", ("death", "die", "dead", "compil")),
+    ("allies", ("lorekeeper", "blacktongue", "ash sister", "merchant", "warden", "hollowed")),
+    ("code", ("code", "data", "algorithm", "network")),
+    ("memory", ("memory", "remember", "pattern", "echo")),
+)
+ANY_THEME = len(LORE_THEMES)  # Bucket holding every theme
+
+HEADER = struct.Struct("<8s16sIIIII")  # magic, fingerprint, floors, themes, fragments, ids, blob bytes
+FRAGMENT = struct.Struct("<IHBBB")  # blob offset, byte length, floor (0: any), theme, tone
+BUCKET = struct.Struct("<II")  # first slot in the id table, fragment count
+FRAGMENT_ID = struct.Struct("<I")
+
+SPEECH = re.compile(r'"([^"\n]+)"')
+SECOND_PERSON = re.compile(r"\b(?:you|your|yours|yourself)\b", re.IGNORECASE)
+FIRST_PERSON = re.compile(r"\b(?:i|me|my|myself|we|us|our)\b", re.IGNORECASE)
+CHAPTER_FLOOR = re.compile(r"chapter_(\d+)")
+META_WORDS = re.compile(r"\b(?:players|npcs?|gameplay|game session|floor \d)\b", re.IGNORECASE)  # Quoted design notes
+
+def bucket_index(tone: int, floor: int, theme: int) -> int:
+    return (tone * LORE_FLOORS + floor - 1) * (ANY_THEME + 1) + theme
+
+BUCKET_COUNT = bucket_index(len(TONE_NAMES), 1, 0)
+
+def index_size(fragment_count: int, id_count: int, blob_size: int) -> int:
+    """Bytes in an index file with these section sizes"""
+    return (HEADER.size + fragment_count * FRAGMENT.size + BUCKET_COUNT * BUCKET.size
+            + id_count * FRAGMENT_ID.size + blob_size)
+
+def fragment_theme(text: str) -> int:
+    lowered = text.lower()
+    for theme, keywords in THEME_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return LORE_THEMES.index(theme)
+    return LORE_THEMES.index("void")
+
+def fragment_tone(text: str) -> int:
+    """Speech at the player mocks, a speaker talking of itself is neutral, the impersonal is eerie"""
+    if SECOND_PERSON.search(text):
+        return TONE_NAMES.index("mocking")
+    if FIRST_PERSON.search(text):
+        return TONE_NAMES.index("neutral")
+    return TONE_NAMES.index("eerie")
+
+def split_fragments(text: str) -> Iterator[str]:
+    """In-world speech from a lore file: every quote that is one or more whole sentences
+    
+    The prose around the quotes is commentary on the game's design, so only what
+    the Entity, the NPCs and the dead actually say is kept. Quotes cut off by an
+    attribution ("Every delete is a murder," it...) end in a comma and are dropped.
+    """
+    for match in SPEECH.finditer(text):
+        fragment = match.group(1).strip()
+        if (LORE_FRAGMENT_MIN <= len(fragment) <= LORE_FRAGMENT_MAX and fragment[0].isupper()
+                and fragment[-1] in ".!?" and not META_WORDS.search(fragment)):
+            yield fragment
+
+def context_theme(context: str) -> int:
+    """Theme bucket a generate_lore context draws from"""
+    if context.startswith("npc_"):
+        return LORE_THEMES.index("betrayal" if context.endswith("_betray") else "allies")
+    if context in LORE_THEMES:
+        return LORE_THEMES.index(context)
+    return ANY_THEME
+
+class LoreCorpus:
+    """The shipped lore files as an indexed, memory-mapped fragment store"""
+    
+    def __init__(self, lore_dir: str):
+        self.lore_dir = lore_dir
+        self.index_path = os.path.join(lore_dir, LORE_INDEX_NAME)
+        self._data = b""  # mmap of the index file, or the bytes themselves if it can't be written
+        self._map: Optional[mmap.mmap] = None
+        self.fragment_count = 0
+        self.open()
+    
+    def sources(self) -> List[str]:
+        """Lore files the index is built from, in a stable order"""
+        return sorted(glob.glob(os.path.join(self.lore_dir, "chapters", "*.md"))) + \
+            [path for path in [os.path.join(self.lore_dir, "whispers.txt")] if os.path.exists(path)]
+    
+    def fingerprint(self, sources: List[str]) -> bytes:
+        """Cheap change check: names, sizes and mtimes of the source files"""
+        digest = hashlib.blake2b(LORE_INDEX_MAGIC, digest_size=16)
+        for path in sources:
+            info = os.stat(path)
+            digest.update(f"{os.path.relpath(path, self.lore_dir)}\0{info.st_size}\0{info.st_mtime_ns}\0".encode())
+        return digest.digest()
+    
+    def open(self):
+        """Map the index, rebuilding it first if the lore files changed"""
+        self.close()
+        sources = self.sources()
+        if not sources:
+            return
+        fingerprint = self.fingerprint(sources)
+        
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(HEADER.size)
+                if len(header) == HEADER.size:
+                    magic, stored, floors, themes, *sizes = HEADER.unpack(header)
+                    current = (magic, stored, floors, themes) == (LORE_INDEX_MAGIC, fingerprint, LORE_FLOORS, ANY_THEME)
+                    if current and os.fstat(f.fileno()).st_size == index_size(*sizes):
+                        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            pass  # Missing or unreadable: rebuilt below
+        
+        if self._map is None:
+            data = self.build(sources, fingerprint)
+            try:
+                self._write(data)
+                with open(self.index_path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except OSError:
+                self._data = data  # Read-only install: keep the index in memory instead
+        if self._map is not None:
+            self._data = self._map
+        
+        _, _, _, _, self.fragment_count, id_count, _ = HEADER.unpack_from(self._data)
+        self._fragments_at = HEADER.size
+        self._buckets_at = self._fragments_at + self.fragment_count * FRAGMENT.size
+        self._ids_at = self._buckets_at + BUCKET_COUNT * BUCKET.size
+        self._blob_at = self._ids_at + id_count * FRAGMENT_ID.size
+    
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._data = b""
+        self.fragment_count = 0
+    
+    def build(self, sources: List[str], fingerprint: bytes) -> bytes:
+        """Parse the lore files into the packed index layout"""
+        blob = bytearray()
+        fragments = []
+        buckets: List[List[int]] = [[] for _ in range(BUCKET_COUNT)]
+        seen = set()
+        for path in sources:
+            name = os.path.basename(path)
+            match = CHAPTER_FLOOR.match(name)
+            floor = min(int(match.group(1)), LORE_FLOORS) if match else 0
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            for fragment in split_fragments(text):
+                if fragment in seen:
+                    continue
+                seen.add(fragment)
+                encoded = fragment.encode("utf-8")
+                theme = LORE_THEMES.index("whisper") if name == "whispers.txt" else fragment_theme(fragment)
+                tone = fragment_tone(fragment)
+                fragment_id = len(fragments)
+                fragments.append(FRAGMENT.pack(len(blob), len(encoded), floor, theme, tone))
+                blob += encoded
+                # Every floor from the unlocking one down holds it, under its theme and "any"
+                for reachable in range(max(floor, 1), LORE_FLOORS + 1):
+                    buckets[bucket_index(tone, reachable, theme)].append(fragment_id)
+                    buckets[bucket_index(tone, reachable, ANY_THEME)].append(fragment_id)
+        
+        ids = []
+        bucket_table = []
+        for members in buckets:
+            bucket_table.append(BUCKET.pack(len(ids), len(members)))
+            ids.extend(members)
+        return b"".join([
+            HEADER.pack(LORE_INDEX_MAGIC, fingerprint, LORE_FLOORS, ANY_THEME, len(fragments), len(ids), len(blob)),
+            *fragments, *bucket_table, struct.pack(f"<{len(ids)}I", *ids), bytes(blob)
+        ])
+    
+    def _write(self, data: bytes):
+        """Replace the index file atomically"""
+        fd, tmp_path = tempfile.mkstemp(prefix=".index.", suffix=".tmp", dir=self.lore_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    
+    def fragment(self, fragment_id: int) -> Tuple[str, int, str, str]:
+        """(text, floor, theme, tone) of one fragment"""
+        offset, length, floor, theme, tone = FRAGMENT.unpack_from(
+            self._data, self._fragments_at + fragment_id * FRAGMENT.size)
+        start = self._blob_at + offset
+        return bytes(self._data[start:start + length]).decode("utf-8"), floor, LORE_THEMES[theme], TONE_NAMES[tone]
+    
+    def pick(self, tone_bias: float, floor: int, context: str = "") -> Optional[str]:
+        """A random fragment for a tone, floor and generate_lore context; None if none fits"""
+        if not self.fragment_count:
+            return None
+        tone = TONE_NAMES.index(NarratorEngine.band(tone_bias))
+        floor = min(max(floor, 1), LORE_FLOORS)
+        theme = context_theme(context)
+        start, count = BUCKET.unpack_from(self._data, self._buckets_at + bucket_index(tone, floor, theme) * BUCKET.size)
+        if not count and theme != ANY_THEME:
+            start, count = BUCKET.unpack_from(
+                self._data, self._buckets_at + bucket_index(tone, floor, ANY_THEME) * BUCKET.size)
+        if not count:
+            return None
+        fragment_id, = FRAGMENT_ID.unpack_from(self._data, self._ids_at + (start + random.randrange(count)) * FRAGMENT_ID.size)
+        return self.fragment(fragment_id)[0]
+    
+    def __len__(self) -> int:
+        return self.fragment_count
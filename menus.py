@@ -0,0 +1,55 @@
+from collections import deque
+from enum import IntEnum
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+MENU_STACK_DEPTH = 8  # Screens remembered for "back"; deeper pushes forget the oldest
+
+class Nav(IntEnum):
+    """What a menu screen asks the machine to do next"""
+    STAY = 0  # Show the same screen again
+    BACK = 1  # Return to the previous screen (leaves the menu from the first one)
+    EXIT = 2  # Leave the menu entirely
+    PUSH = 3  # Open a screen on top of this one
+    REPLACE = 4  # Swap this screen for another; "back" skips it
+
+class Transition(NamedTuple):
+    nav: Nav
+    screen: Optional[str] = None
+    args: Tuple[Any, ...] = ()
+
+STAY = Transition(Nav.STAY)
+BACK = Transition(Nav.BACK)
+EXIT = Transition(Nav.EXIT)
+
+def push(screen: str, *args) -> Transition:
+    return Transition(Nav.PUSH, screen, args)
+
+def replace(screen: str, *args) -> Transition:
+    return Transition(Nav.REPLACE, screen, args)
+
+def run_menu(owner, screens: Dict[str, str], start: str, *args, max_depth: int = MENU_STACK_DEPTH):
+    """Drive a menu from `start` until it exits
+    
+    `screens` maps screen names to methods of `owner`; each is called with its
+    screen's args, does one prompt and returns a Transition. Navigation is a loop
+    over a bounded stack, so going back and forth never grows the Python stack.
+    """
+    stack = deque([(start, args)], maxlen=max_depth)
+    handlers: Dict[str, Callable[..., Transition]] = {}
+    while stack:
+        name, screen_args = stack[-1]
+        handler = handlers.get(name)
+        if handler is None:
+            handler = handlers[name] = getattr(owner, screens[name])
+        transition = handler(*screen_args)
+        nav = transition.nav
+        if nav == Nav.STAY:
+            continue
+        if nav == Nav.EXIT:
+            return
+        if nav == Nav.BACK:
+            stack.pop()
+        elif nav == Nav.PUSH:
+            stack.append((transition.screen, transition.args))
+        else:
+            stack[-1] = (transition.screen, transition.args)
@@ -0,0 +1,123 @@
+import re
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+NARRATOR_CACHE_SIZE = 2048  # Memoized transforms; dropped wholesale when full
+
+class ReplaceAll:
+    """Literal replacements applied in a single regex pass, memoized per input text
+    
+    Longer keys win where keys overlap; replacements never see each other's output.
+    """
+    
+    def __init__(self, pairs: Iterable[Tuple[str, str]], cache_size: int = NARRATOR_CACHE_SIZE):
+        self.table = dict(pairs)
+        self.pattern = re.compile("|".join(re.escape(old) for old in sorted(self.table, key=len, reverse=True)))
+        self.cache_size = cache_size
+        self._cache: Dict[str, str] = {}
+    
+    def _lookup(self, match: "re.Match") -> str:
+        return self.table[match.group(0)]
+    
+    def __call__(self, text: str) -> str:
+        replaced = self._cache.get(text)
+        if replaced is None:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            replaced = self._cache[text] = self.pattern.sub(self._lookup, text)
+        return replaced
+
+class NarratorRule(NamedTuple):
+    """One narrator rewrite; within a tone band the first rule whose conditions hold applies"""
+    contexts: Optional[Tuple[str, ...]] = None  # None: any context
+    triggers: Optional[Tuple[str, ...]] = None  # Lowercase words the text must contain (any, case-insensitive)
+    metric: Optional[Tuple[str, int]] = None  # (player metric, value it must exceed)
+    prefix: str = ""
+    suffix: str = ""
+    replace: Tuple[Tuple[str, str], ...] = ()
+
+# Tone bands by upper bound of the Entity's tone bias
+TONE_BANDS = ((0.3, "eerie"), (0.7, "neutral"), (float("inf"), "mocking"))
+
+NARRATOR_RULES = {
+    # Respectful/eerie tone
+    "eerie": (
+        NarratorRule(contexts=("combat",), prefix="⚔️  "),
+        NarratorRule(contexts=("lore",), prefix="✦ "),
+    ),
+    # Neutral with hints of manipulation
+    "neutral": (
+        NarratorRule(triggers=("fail", "death"), replace=(("You", "The wanderer"),)),
+    ),
+    # Mocking/gaslighting tone
+    "mocking": (
+        NarratorRule(contexts=("combat",), triggers=("miss",), suffix=" How... predictable."),
+        NarratorRule(contexts=("flee",), metric=("flee_count", 3), suffix=" The paths remember your cowardice."),
+        NarratorRule(contexts=("death",), replace=(("You died", "Compiled. Again."),)),
+    ),
+}
+
+class CompiledRule(NamedTuple):
+    triggers: Optional[frozenset]
+    metric: Optional[Tuple[str, int]]
+    prefix: str
+    suffix: str
+    replace: Optional[ReplaceAll]
+
+class NarratorEngine:
+    """Narrator rules compiled per tone band: one trigger regex per band, rule lists per context"""
+    
+    def __init__(self, rules: Dict[str, Tuple[NarratorRule, ...]] = NARRATOR_RULES,
+                 cache_size: int = NARRATOR_CACHE_SIZE):
+        self.bands: Dict[str, Tuple[Any, Dict[Optional[str], Tuple[CompiledRule, ...]]]] = {}
+        for band, band_rules in rules.items():
+            triggers = sorted({word for rule in band_rules for word in rule.triggers or ()}, key=len, reverse=True)
+            pattern = re.compile("|".join(re.escape(word) for word in triggers), re.IGNORECASE) if triggers else None
+            compiled = [(rule.contexts, CompiledRule(
+                frozenset(rule.triggers) if rule.triggers else None, rule.metric, rule.prefix, rule.suffix,
+                ReplaceAll(rule.replace, cache_size) if rule.replace else None)) for rule in band_rules]
+            contexts = {context for rule in band_rules for context in rule.contexts or ()}
+            by_context = {context: tuple(rule for rule_contexts, rule in compiled
+                                         if rule_contexts is None or context in rule_contexts)
+                          for context in contexts}
+            by_context[None] = tuple(rule for rule_contexts, rule in compiled if rule_contexts is None)
+            self.bands[band] = (pattern, by_context)
+        self.cache_size = cache_size
+        self._cache: Dict[Tuple[Any, ...], str] = {}
+    
+    @staticmethod
+    def band(tone_bias: float) -> str:
+        for bound, band in TONE_BANDS:
+            if tone_bias < bound:
+                return band
+        return TONE_BANDS[-1][1]
+    
+    def apply(self, tone_bias: float, text: str, context: str, metrics: Dict[str, Any]) -> str:
+        """Rewrite text for a tone and context (memoized per text and outcome of metric conditions)"""
+        band = self.band(tone_bias)
+        pattern, by_context = self.bands[band]
+        rules = by_context.get(context, by_context[None])
+        if not rules:
+            return text
+        metric_flags = tuple(rule.metric is not None and metrics.get(rule.metric[0], 0) > rule.metric[1]
+                             for rule in rules)
+        key = (band, context, text, metric_flags)
+        filtered = self._cache.get(key)
+        if filtered is not None:
+            return filtered
+        
+        found = {word.lower() for word in pattern.findall(text)} if pattern is not None else ()
+        filtered = text
+        for rule, metric_ok in zip(rules, metric_flags):
+            if rule.triggers is not None and rule.triggers.isdisjoint(found):
+                continue
+            if rule.metric is not None and not metric_ok:
+                continue
+            if rule.replace is not None:
+                filtered = rule.replace(filtered)
+            filtered = f"{rule.prefix}{filtered}{rule.suffix}"
+            break
+        
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[key] = filtered
+        return filtered
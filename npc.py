@@ -1,9 +1,72 @@
 import random
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple
 
+from records import ITEM_STATS
 from utils import colorize_text, narrator_filter, press_enter_to_continue
 
+# Base dialogue templates by NPC type
+BASE_DIALOGUES = {
+    "Lorekeeper": {
+        "greeting": "Seeker of truths, I archive the fragments that bleed through...",
+        "trade": "Knowledge has its price. What do you offer for forbidden understanding?",
+        "help": "The codes whisper of your path. I shall illuminate the shadows.",
+        "betray": "So... even truth-seekers can fall to corruption. I expected better.",
+        "farewell": "May the fragments guide your descent, wanderer."
+    },
+    "Blacktongue": {
+        "greeting": "Forge-fire burns bright. Your gear reeks of weakness.",
+        "trade": "Ashlight buys improvement. No payment, no progress.",
+        "help": "Your blade thirsts for enhancement. Let me feed it.",
+        "betray": "You dare strike the one who would make you whole? Fool.",
+        "farewell": "The forge remembers every spark. Return when you're worthy."
+    },
+    "Ash Sister": {
+        "greeting": "Riddles dance in the digital wind. Do you hear their song?",
+        "trade": "Wisdom traded for wisdom. A fair exchange, yes?",
+        "help": "The patterns in your soul... let me weave them into clarity.",
+        "betray": "Betrayal cuts deeper than any blade. The riddles grow silent.",
+        "farewell": "May paradox guide you to truth, or truth to paradox."
+    },
+    "Faceless Merchant": {
+        "greeting": "Coin and code exchange freely here. What do you require?",
+        "trade": "Quality items for quality payment. Simple commerce.",
+        "help": "A discount for a friend? The market allows such... generosity.",
+        "betray": "Theft from a merchant? The market will remember this transgression.",
+        "farewell": "Until supply meets demand again, customer."
+    },
+    "Still Flame Warden": {
+        "greeting": "The flame guides growth. Show me your readiness to ascend.",
+        "trade": "Advancement requires dedication. Skill points for new paths.",
+        "help": "Your potential burns brighter. Let the flame shape you.",
+        "betray": "The flame burns betrayers hottest. You have chosen poorly.",
+        "farewell": "The flame eternal burns within. Carry it well."
+    },
+    "The Hollowed": {
+        "greeting": "I remember... faces like yours. Before the compilation.",
+        "trade": "Echoes of past runs linger. Perhaps they can aid you.",
+        "help": "Your failures mirror mine. Learn from the patterns.",
+        "betray": "Even the hollowed can feel pain. Why add to it?",
+        "farewell": "We are all echoes here. Some just forgot to fade."
+    }
+}
+
+def compile_dialogue_variants(text: str) -> Tuple[str, str, str]:
+    """Precompute (neutral, high trust, low trust) forms of a dialogue template"""
+    friendly = text.replace("your", "dear friend")
+    hostile = text.replace("wanderer", "betrayer").replace("friend", "enemy")
+    if "betray" not in hostile.lower():
+        hostile += " Trust, once broken, does not mend."
+    return text, friendly, hostile
+
+# (npc name, interaction type) -> precompiled trust variants
+DIALOGUE_TABLE = {
+    (npc_name, interaction_type): compile_dialogue_variants(text)
+    for npc_name, npc_dialogues in BASE_DIALOGUES.items()
+    for interaction_type, text in npc_dialogues.items()
+}
+UNKNOWN_DIALOGUE = compile_dialogue_variants("...")
+
 class NPC:
     """Individual NPC with AI-driven dialogue and relationship dynamics"""
     
@@ -18,91 +81,39 @@ class NPC:
         
     def generate_dialogue(self, player, interaction_type: str = "greeting") -> str:
         """Generate AI-driven dialogue based on player state and relationships"""
-        player_vector = player.state_vector()
-        
-        # Get base dialogue template
-        base_dialogue = self.get_base_dialogue(interaction_type)
-        
         # Apply relationship modifiers
-        trust = player.npc_relationships[self.name]["trust"]
+        trust = player.npc_relationships.trust_of(self.name)
         
-        # Generate contextual lore for dialogue
-        dialogue_lore = self.entity_ai.generate_lore(
-            player_vector,
-            player.floor,
-            f"npc_{self.name}_{interaction_type}"
-        )
+        # Contextual lore is only generated if the trust check and roll decide to show it
+        def dialogue_lore() -> str:
+            return self.entity_ai.generate_lore(
+                player.state_vector(),
+                player.floor,
+                f"npc_{self.name}_{interaction_type}"
+            )
         
         # Combine base dialogue with AI-generated content
-        final_dialogue = self.customize_dialogue(base_dialogue, dialogue_lore, trust, player)
+        final_dialogue = self.customize_dialogue(interaction_type, dialogue_lore, trust, player)
         
         return narrator_filter.filter_text(final_dialogue, "npc")
     
-    def get_base_dialogue(self, interaction_type: str) -> str:
-        """Get base dialogue templates by NPC type"""
-        dialogues = {
-            "Lorekeeper": {
-                "greeting": "Seeker of truths, I archive the fragments that bleed through...",
-                "trade": "Knowledge has its price. What do you offer for forbidden understanding?",
-                "help": "The codes whisper of your path. I shall illuminate the shadows.",
-                "betray": "So... even truth-seekers can fall to corruption. I expected better.",
-                "farewell": "May the fragments guide your descent, wanderer."
-            },
-            "Blacktongue": {
-                "greeting": "Forge-fire burns bright. Your gear reeks of weakness.",
-                "trade": "Ashlight buys improvement. No payment, no progress.",
-                "help": "Your blade thirsts for enhancement. Let me feed it.",
-                "betray": "You dare strike the one who would make you whole? Fool.",
-                "farewell": "The forge remembers every spark. Return when you're worthy."
-            },
-            "Ash Sister": {
-                "greeting": "Riddles dance in the digital wind. Do you hear their song?",
-                "trade": "Wisdom traded for wisdom. A fair exchange, yes?",
-                "help": "The patterns in your soul... let me weave them into clarity.",
-                "betray": "Betrayal cuts deeper than any blade. The riddles grow silent.",
-                "farewell": "May paradox guide you to truth, or truth to paradox."
-            },
-            "Faceless Merchant": {
-                "greeting": "Coin and code exchange freely here. What do you require?",
-                "trade": "Quality items for quality payment. Simple commerce.",
-                "help": "A discount for a friend? The market allows such... generosity.",
-                "betray": "Theft from a merchant? The market will remember this transgression.",
-                "farewell": "Until supply meets demand again, customer."
-            },
-            "Still Flame Warden": {
-                "greeting": "The flame guides growth. Show me your readiness to ascend.",
-                "trade": "Advancement requires dedication. Skill points for new paths.",
-                "help": "Your potential burns brighter. Let the flame shape you.",
-                "betray": "The flame burns betrayers hottest. You have chosen poorly.",
-                "farewell": "The flame eternal burns within. Carry it well."
-            },
-            "The Hollowed": {
-                "greeting": "I remember... faces like yours. Before the compilation.",
-                "trade": "Echoes of past runs linger. Perhaps they can aid you.",
-                "help": "Your failures mirror mine. Learn from the patterns.",
-                "betray": "Even the hollowed can feel pain. Why add to it?",
-                "farewell": "We are all echoes here. Some just forgot to fade."
-            }
-        }
-        
-        npc_dialogues = dialogues.get(self.name, {})
-        return npc_dialogues.get(interaction_type, "...")
-    
-    def customize_dialogue(self, base_dialogue: str, ai_lore: str, trust: int, player) -> str:
+    def customize_dialogue(self, interaction_type: str, ai_lore: Callable[[], str], trust: int, player) -> str:
         """Customize dialogue based on AI generation and relationship state"""
+        neutral, friendly, hostile = DIALOGUE_TABLE.get((self.name, interaction_type), UNKNOWN_DIALOGUE)
+        
         # Trust level modifications
         if trust > 30:
             # High trust - friendly, helpful
-            base_dialogue = base_dialogue.replace("your", "dear friend")
+            base_dialogue = friendly
             if random.random() < 0.3:
-                base_dialogue += f" {ai_lore}"
+                base_dialogue += f" {ai_lore()}"
                 
         elif trust < -20:
             # Low trust - hostile, dismissive
-            base_dialogue = base_dialogue.replace("wanderer", "betrayer")
-            base_dialogue = base_dialogue.replace("friend", "enemy")
-            if "betray" not in base_dialogue.lower():
-                base_dialogue += " Trust, once broken, does not mend."
+            base_dialogue = hostile
+            
+        else:
+            base_dialogue = neutral
                 
         # Reference other NPCs in relationship web
         if random.random() < 0.4:
@@ -121,23 +132,20 @@ class NPC:
     def generate_relationship_references(self, player) -> str:
         """Generate references to other NPCs based on relationship web"""
         refs = []
-        my_relationship = player.npc_relationships[self.name]
+        relationships = player.npc_relationships
         
         # Reference allies
-        for ally in my_relationship.get("allies", []):
-            if ally in player.npc_relationships:
-                ally_trust = player.npc_relationships[ally]["trust"]
-                if ally_trust > 20:
-                    refs.append(f"{ally} speaks well of you.")
-                elif ally_trust < -10:
-                    refs.append(f"{ally} warns others about your betrayals.")
+        for ally in relationships.allies(self.name):
+            ally_trust = relationships.trust_of(ally)
+            if ally_trust > 20:
+                refs.append(f"{ally} speaks well of you.")
+            elif ally_trust < -10:
+                refs.append(f"{ally} warns others about your betrayals.")
         
         # Reference enemies
-        for enemy in my_relationship.get("enemies", []):
-            if enemy in player.npc_relationships:
-                enemy_trust = player.npc_relationships[enemy]["trust"]
-                if enemy_trust > 20:
-                    refs.append(f"I hear you favor {enemy}. Curious choice.")
+        for enemy in relationships.enemies(self.name):
+            if relationships.trust_of(enemy) > 20:
+                refs.append(f"I hear you favor {enemy}. Curious choice.")
                     
         return random.choice(refs) if refs else ""
 
@@ -237,7 +245,7 @@ class NPCManager:
                 item_data = shop_data["items"][choice]
                 if player.ashlight >= item_data["price"]:
                     player.ashlight -= item_data["price"]
-                    player.inventory.append(item_data["item"])
+                    player.inventory.add(item_data["item"])
                     print(f"{colorize_text('Purchased ' + item_data['item']['name'] + '!', 'green')}")
                     player.interact_with_npc(npc.name, "trade")
                 else:
@@ -259,7 +267,7 @@ class NPCManager:
             return
             
         enhancement_cost = 20
-        trust = player.npc_relationships[npc.name]["trust"]
+        trust = player.npc_relationships.trust_of(npc.name)
         
         # Trust affects pricing
         if trust > 20:
@@ -285,15 +293,10 @@ class NPCManager:
                 if player.ashlight >= enhancement_cost:
                     player.ashlight -= enhancement_cost
                     
-                    # Enhance item stats
-                    item = player.inventory[choice]
-                    for stat in item["stats"]:
-                        if isinstance(item["stats"][stat], int):
-                            item["stats"][stat] += random.randint(1, 3)
-                    
-                    # Change name to show enhancement
-                    if "Enhanced" not in item["name"]:
-                        item["name"] = f"Enhanced {item['name']}"
+                    # Enhance item stats (a delta on the rolled stats; the name shows it)
+                    item_id, item = player.inventory.at(choice)
+                    item.enhance([random.randint(1, 3) for _ in ITEM_STATS])
+                    player.inventory.recategorize(item_id)  # A 0-damage item can become a weapon
                         
                     print(f"{colorize_text(item['name'] + ' has been enhanced!', 'green')}")
                     player.interact_with_npc(npc.name, "trade")
@@ -414,7 +417,7 @@ class NPCManager:
         # Update direct relationship
         player.interact_with_npc(npc_name, interaction_type)
         
-        # Update NPC ally/enemy relationships based on base relationships
+        # Link this NPC to its allies and enemies (only the NPCs the player has met are connected)
         for (npc1, npc2), relationship_type in self.base_relationships.items():
             if npc1 == npc_name or npc2 == npc_name:
                 other_npc = npc2 if npc1 == npc_name else npc1
@@ -422,19 +425,14 @@ class NPCManager:
     
     def propagate_betrayal(self, player, betrayed_npc: str):
         """Propagate betrayal effects through relationship web"""
-        betrayed_relationship = player.npc_relationships[betrayed_npc]
-        
-        # Allies of betrayed NPC lose trust
-        for ally in betrayed_relationship.get("allies", []):
-            if ally in player.npc_relationships:
-                player.npc_relationships[ally]["trust"] -= 15
-                print(f"{colorize_text(f'{ally} learns of your betrayal and loses trust.', 'red')}")
-        
-        # Enemies of betrayed NPC might gain slight trust
-        for enemy in betrayed_relationship.get("enemies", []):
-            if enemy in player.npc_relationships:
-                player.npc_relationships[enemy]["trust"] += 5
-                print(f"{colorize_text(f'{enemy} seems pleased by the betrayal.', 'yellow')}")
+        # Allies of betrayed NPC lose trust, enemies might gain slight trust
+        allies, enemies = player.npc_relationships.propagate(betrayed_npc, ally_delta=-15, enemy_delta=5)
+        
+        for ally in allies:
+            print(f"{colorize_text(f'{ally} learns of your betrayal and loses trust.', 'red')}")
+        
+        for enemy in enemies:
+            print(f"{colorize_text(f'{enemy} seems pleased by the betrayal.', 'yellow')}")
     
     def get_available_npcs(self, floor: int) -> List[str]:
         """Get NPCs available on current floor"""
@@ -450,21 +448,21 @@ class NPCManager:
     
     def show_relationship_status(self, player):
         """Show current relationship web status"""
-        print(f"\n{colorize_text('═══ RELATIONSHIP WEB ═══', 'cyan')}")
+        print(f"\n{colorize_text('═══ RELATIONSHIP WEB ═══', 'cyan', cache=True)}")
         
         for npc_name, relationship in player.npc_relationships.items():
             trust = relationship["trust"]
             
             if trust > 30:
-                status = colorize_text("Trusted Ally", 'green')
+                status = colorize_text("Trusted Ally", 'green', cache=True)
             elif trust > 10:
-                status = colorize_text("Friend", 'green') 
+                status = colorize_text("Friend", 'green', cache=True) 
             elif trust > -10:
-                status = colorize_text("Neutral", 'yellow')
+                status = colorize_text("Neutral", 'yellow', cache=True)
             elif trust > -30:
-                status = colorize_text("Distrustful", 'red')
+                status = colorize_text("Distrustful", 'red', cache=True)
             else:
-                status = colorize_text("Enemy", 'red')
+                status = colorize_text("Enemy", 'red', cache=True)
                 
             print(f"{npc_name}: {status} ({trust} trust)")
             
@@ -2,29 +2,135 @@ import random
 import json
 import time
 import numpy as np
-from typing import Dict, List, Any
-from collections import deque
+from array import array
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
+from actions import intern_action, action_name, action_feature
+from profiling import profiled
+from relationships import RelationshipWeb
+from inventory import Inventory
+
+NPC_NAMES = ("Lorekeeper", "Blacktongue", "Ash Sister", "Faceless Merchant", "Still Flame Warden", "The Hollowed")
+STAT_NAMES = ("str", "dex", "int", "fth", "end", "vit")
+STAT_INDEX = {stat: i for i, stat in enumerate(STAT_NAMES)}
+
+# Bump when a state_vector feature changes meaning. 2: the action id comes from the
+# fixed Action table (FNV-1a for other input) instead of the per-process salted hash().
+# Vectors stored under 1 (e.g. a chapter blueprint's "generated_for" in a snapshot)
+# differ only in that slot; recompute them with state_vector() rather than reusing them.
+STATE_VECTOR_VERSION = 2
+
+class StatBlock:
+    """Base stats packed in an array('h'), used like the old stats dict"""
+    
+    __slots__ = ("_values",)
+    
+    def __init__(self, value: int = 10):
+        self._values = array("h", [value] * len(STAT_NAMES))
+    
+    def __getitem__(self, stat: str) -> int:
+        return self._values[STAT_INDEX[stat]]
+    
+    def __setitem__(self, stat: str, value: int):
+        self._values[STAT_INDEX[stat]] = value
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(STAT_NAMES)
+    
+    def __len__(self) -> int:
+        return len(STAT_NAMES)
+    
+    def __contains__(self, stat: object) -> bool:
+        return stat in STAT_INDEX
+    
+    def get(self, stat: str, default: Optional[int] = None) -> Optional[int]:
+        return self._values[STAT_INDEX[stat]] if stat in STAT_INDEX else default
+    
+    def keys(self) -> Tuple[str, ...]:
+        return STAT_NAMES
+    
+    def values(self) -> List[int]:
+        return self._values.tolist()
+    
+    def items(self) -> Iterator[Tuple[str, int]]:
+        return zip(STAT_NAMES, self._values)
+    
+    def __getstate__(self) -> List[int]:
+        return self._values.tolist()
+    
+    def __setstate__(self, state: List[int]):
+        self._values = array("h", state)
+
+class ActionHistory:
+    """Ring buffer of interned action codes; iterates as action names, oldest first"""
+    
+    __slots__ = ("_codes", "_start", "_size")
+    
+    def __init__(self, maxlen: int = 20):
+        self._codes = bytearray(maxlen)
+        self._start = 0
+        self._size = 0
+    
+    @property
+    def maxlen(self) -> int:
+        return len(self._codes)
+    
+    def append_code(self, code: int):
+        """Record an action code, overwriting the oldest once full"""
+        capacity = len(self._codes)
+        if self._size < capacity:
+            self._codes[(self._start + self._size) % capacity] = code
+            self._size += 1
+        else:
+            self._codes[self._start] = code
+            self._start = (self._start + 1) % capacity
+    
+    def append(self, action: str):
+        self.append_code(intern_action(action))
+    
+    def codes(self) -> bytes:
+        """Codes in order, oldest first"""
+        end = self._start + self._size
+        if end <= len(self._codes):
+            return bytes(self._codes[self._start:end])
+        return bytes(self._codes[self._start:] + self._codes[:end - len(self._codes)])
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __iter__(self) -> Iterator[str]:
+        return (action_name(code) for code in self.codes())
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Names, not codes: intern tables differ between processes
+        return {"maxlen": len(self._codes), "actions": list(self)}
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self._codes = bytearray(state["maxlen"])
+        self._start = self._size = 0
+        for action in state["actions"]:
+            self.append(action)
 
 class Player:
+    # Fixed attribute layout keeps thousands of resident sessions small
+    __slots__ = (
+        "name", "player_class", "stats", "floor", "ashlight", "inventory",
+        "sanity", "predictability", "deaths", "health", "max_health", "stamina", "max_stamina",
+        "flee_count", "explore_count", "heal_spam_count", "mob_farm_count", "betrayal_count",
+        "action_history", "last_action_code", "action_repetition", "npc_relationships",
+        "skills", "skill_points", "next_dodge_successful", "shield_wall_active"
+    )
+    
     def __init__(self, name: str, player_class: str):
         self.name = name
         self.player_class = player_class
         
         # Base stats
-        self.stats = {
-            "str": 10,
-            "dex": 10,
-            "int": 10,
-            "fth": 10,
-            "end": 10,
-            "vit": 10
-        }
+        self.stats = StatBlock(10)
         
         # Game state and metrics (initialize before class bonuses)
         self.floor = 1
         self.ashlight = 0  # Start with 0 - players must earn their ashlight
-        self.inventory = []
-        self.equipped_weapon = None
+        self.inventory = Inventory()
         
         # AI tracking metrics - NEW
         self.sanity = 100.0  # Hidden stat, decreases with deaths/traps/betrayals
@@ -39,7 +145,6 @@ class Player:
         self.max_health = self.health
         self.stamina = self.stats["end"] * 10
         self.max_stamina = self.stamina
-        self.ally_count = 0
         self.flee_count = 0
         self.explore_count = 0
         self.heal_spam_count = 0
@@ -47,24 +152,42 @@ class Player:
         self.betrayal_count = 0
         
         # Action tracking for predictability
-        self.action_history = deque(maxlen=20)  # Rolling window of recent actions
-        self.last_action = None
+        self.action_history = ActionHistory(20)  # Rolling window of recent actions
+        self.last_action_code = None
         self.action_repetition = 0
         
         # Relationship web - NEW
-        self.npc_relationships = {
-            "Lorekeeper": {"trust": 0, "allies": [], "enemies": []},
-            "Blacktongue": {"trust": 0, "allies": [], "enemies": []},
-            "Ash Sister": {"trust": 0, "allies": [], "enemies": []},
-            "Faceless Merchant": {"trust": 0, "allies": [], "enemies": []},
-            "Still Flame Warden": {"trust": 0, "allies": [], "enemies": []},
-            "The Hollowed": {"trust": 0, "allies": [], "enemies": []}
-        }
+        self.npc_relationships = RelationshipWeb(NPC_NAMES)
         
         # Skills
         self.skills = []
         self.skill_points = 0
         
+        # Combat effect flags
+        self.next_dodge_successful = False
+        self.shield_wall_active = False
+        
+    @property
+    def equipped_weapon(self) -> Optional[Dict[str, Any]]:
+        """Item in the weapon slot"""
+        return self.inventory.equipped_item("weapon")
+    
+    @property
+    def last_action(self) -> Optional[str]:
+        """Most recent action string"""
+        return None if self.last_action_code is None else action_name(self.last_action_code)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+        state["last_action_code"] = self.last_action  # Codes are only meaningful in this process
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        for name, value in state.items():
+            setattr(self, name, value)
+        if self.last_action_code is not None:
+            self.last_action_code = intern_action(self.last_action_code)
+        
     def apply_class_bonuses(self):
         """Apply class-specific stat bonuses"""
         class_bonuses = {
@@ -85,6 +208,7 @@ class Player:
             for stat in self.stats:
                 self.stats[stat] = max(1, self.stats[stat] - 1)
     
+    @profiled("player.state_vector")
     def state_vector(self) -> List[float]:
         """Generate 14-dimensional state vector for EntityAI"""
         # Normalize stats to 0-1 range (assuming max reasonable stat is 20)
@@ -96,8 +220,8 @@ class Player:
         if self.player_class in class_map:
             class_encoding[class_map[self.player_class]] = 1.0
         
-        # Recent action ID (0-1 normalized)
-        action_id = hash(self.last_action or "none") % 100 / 100.0
+        # Recent action ID (0-1 normalized, precomputed per action code)
+        action_id = action_feature(self.last_action_code)
         
         # Metrics (normalized)
         predictability = min(1.0, self.predictability)
@@ -119,28 +243,29 @@ class Player:
         
         return vector
     
-    def update_predictability(self, action: str):
-        """Update predictability based on action patterns"""
-        self.action_history.append(action)
+    @profiled("player.update_predictability")
+    def update_predictability(self, action: Union[str, int]):
+        """Update predictability based on action patterns (action string or interned code)"""
+        code = action if isinstance(action, int) else intern_action(action)
+        self.action_history.append_code(code)
         
-        if action == self.last_action:
+        if code == self.last_action_code:
             self.action_repetition += 1
         else:
             self.action_repetition = 0
             
-        self.last_action = action
+        self.last_action_code = code
+        recent = self.action_history.codes()
         
         # Calculate variance in recent actions
-        if len(self.action_history) >= 10:
+        if len(recent) >= 10:
             # Simple entropy calculation
-            action_counts = {}
-            for a in self.action_history:
-                action_counts[a] = action_counts.get(a, 0) + 1
+            action_counts = [recent.count(a) for a in set(recent)]
             
             # Higher entropy = lower predictability
-            total_actions = len(self.action_history)
+            total_actions = len(recent)
             entropy = 0
-            for count in action_counts.values():
+            for count in action_counts:
                 prob = count / total_actions
                 entropy -= prob * np.log2(prob) if prob > 0 else 0
             
@@ -154,7 +279,7 @@ class Player:
             self.predictability = min(1.0, self.predictability + 0.1)
         
         # Reward variance
-        if len(set(list(self.action_history)[-5:])) >= 4:
+        if len(set(recent[-5:])) >= 4:
             self.predictability = max(0.0, self.predictability - 0.05)
     
     def take_damage(self, amount: int, damage_type: str = "physical"):
@@ -238,7 +363,7 @@ Floor Progress: {colorize_text("RESET TO FLOOR 1", 'red')}
         
         # Reset some temporary metrics
         self.ashlight = max(10, self.ashlight // 2)
-        self.inventory = []
+        self.inventory.clear()
         
         # Apply Hollow class penalty
         if self.player_class == "Hollow" and self.deaths >= 5:
@@ -251,45 +376,34 @@ Floor Progress: {colorize_text("RESET TO FLOOR 1", 'red')}
         if npc_name not in self.npc_relationships:
             return
             
-        relationship = self.npc_relationships[npc_name]
+        relationships = self.npc_relationships
         
         if interaction_type == "help":
-            relationship["trust"] += 10
+            relationships.adjust(npc_name, 10)
             self.sanity = min(100, self.sanity + 2)
             
         elif interaction_type == "betray":
-            relationship["trust"] -= 30
+            relationships.adjust(npc_name, -30)
             self.betrayal_count += 1
             self.sanity = max(0, self.sanity - 5)
             
             # Propagate betrayal to allies
-            for ally_name in relationship["allies"]:
-                if ally_name in self.npc_relationships:
-                    self.npc_relationships[ally_name]["trust"] -= 10
+            relationships.propagate(npc_name, ally_delta=-10)
                     
         elif interaction_type == "trade":
-            relationship["trust"] += 2
+            relationships.adjust(npc_name, 2)
             
         elif interaction_type == "ignore":
-            relationship["trust"] -= 1
-        
-        # Update ally count
-        self.ally_count = sum(1 for rel in self.npc_relationships.values() if rel["trust"] > 20)
+            relationships.adjust(npc_name, -1)
+    
+    @property
+    def ally_count(self) -> int:
+        """NPCs trusting the player, maintained incrementally by the relationship web"""
+        return self.npc_relationships.ally_count
     
     def add_npc_relationship(self, npc1: str, npc2: str, relationship_type: str):
         """Add relationships between NPCs"""
-        if npc1 in self.npc_relationships and npc2 in self.npc_relationships:
-            if relationship_type == "ally":
-                if npc2 not in self.npc_relationships[npc1]["allies"]:
-                    self.npc_relationships[npc1]["allies"].append(npc2)
-                if npc1 not in self.npc_relationships[npc2]["allies"]:
-                    self.npc_relationships[npc2]["allies"].append(npc1)
-                    
-            elif relationship_type == "enemy":
-                if npc2 not in self.npc_relationships[npc1]["enemies"]:
-                    self.npc_relationships[npc1]["enemies"].append(npc2)
-                if npc1 not in self.npc_relationships[npc2]["enemies"]:
-                    self.npc_relationships[npc2]["enemies"].append(npc1)
+        self.npc_relationships.link(npc1, npc2, relationship_type)
     
     def use_skill(self, skill_name: str) -> bool:
         """Use a learned skill"""
@@ -380,7 +494,7 @@ Floor Progress: {colorize_text("RESET TO FLOOR 1", 'red')}
             "ally_count": self.ally_count,
             "betrayals": self.betrayal_count,
             "flee_count": self.flee_count,
-            "total_trust": sum(rel["trust"] for rel in self.npc_relationships.values()),
+            "total_trust": self.npc_relationships.total_trust(),
             "class": self.player_class,
             "floor_reached": self.floor
         }
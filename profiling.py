@@ -0,0 +1,142 @@
+import sys
+import time
+import functools
+import threading
+from typing import Callable, Dict, Optional, TextIO
+
+# In-process hot-path timing: phases record into per-name latency histograms.
+# Off by default; while off, instrumented calls only pay one flag check.
+
+HISTOGRAM_BUCKETS = 32  # Bucket i holds durations under 2**i microseconds
+
+class Histogram:
+    """Latency histogram with power-of-two microsecond buckets"""
+    
+    __slots__ = ("count", "total_ns", "max_ns", "buckets")
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+    
+    def record(self, duration_ns: int):
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.buckets[min(HISTOGRAM_BUCKETS - 1, (duration_ns // 1000).bit_length())] += 1
+    
+    def percentile(self, q: float) -> float:
+        """Approximate q-quantile in microseconds (upper edge of its bucket, capped at the max)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(float(1 << i), self.max_ns / 1000.0)
+        return self.max_ns / 1000.0
+
+_enabled = False
+_started_ns = 0
+_histograms: Dict[str, Histogram] = {}
+_lock = threading.Lock()  # Session threads record concurrently in server mode
+
+def enable():
+    """Start recording (and restart the wall clock the breakdown is measured against)"""
+    global _enabled, _started_ns
+    _started_ns = time.perf_counter_ns()
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset():
+    """Drop everything recorded so far"""
+    global _started_ns
+    with _lock:
+        _histograms.clear()
+    _started_ns = time.perf_counter_ns()
+
+def record(phase_name: str, duration_ns: int):
+    """Add one timing to a phase"""
+    with _lock:
+        histogram = _histograms.get(phase_name)
+        if histogram is None:
+            histogram = _histograms[phase_name] = Histogram()
+        histogram.record(duration_ns)
+
+def profiled(phase_name: str):
+    """Decorator timing every call of a function as `phase_name`"""
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(phase_name, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
+
+class _Phase:
+    __slots__ = ("name", "start")
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+class _NullPhase:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+def phase(phase_name: str):
+    """Context manager timing a block as `phase_name`"""
+    return _Phase(phase_name) if _enabled else _NULL_PHASE
+
+def report() -> str:
+    """Per-phase breakdown, slowest total first (phases nest, so times are inclusive)"""
+    with _lock:
+        phases = sorted(_histograms.items(), key=lambda item: item[1].total_ns, reverse=True)
+    wall_ms = max(1e-9, (time.perf_counter_ns() - _started_ns) / 1e6)
+    
+    lines = [f"{'phase':<36} {'calls':>7} {'total ms':>10} {'% wall':>7} {'mean us':>10} "
+             f"{'p50 us':>9} {'p99 us':>9} {'max us':>10}"]
+    for name, histogram in phases:
+        total_ms = histogram.total_ns / 1e6
+        lines.append(
+            f"{name:<36} {histogram.count:>7} {total_ms:>10.2f} {total_ms / wall_ms:>7.1%} "
+            f"{histogram.total_ns / histogram.count / 1e3:>10.1f} {histogram.percentile(0.5):>9.0f} "
+            f"{histogram.percentile(0.99):>9.0f} {histogram.max_ns / 1e3:>10.0f}"
+        )
+    lines.append(f"wall clock: {wall_ms:.0f} ms")
+    return "\n".join(lines)
+
+def dump(file: Optional[TextIO] = None):
+    """Write the breakdown and start over; nothing happens if profiling is off or idle"""
+    if not _enabled or not _histograms:
+        return
+    (file or sys.stderr).write(f"\n═══ PROFILE ═══\n{report()}\n")
+    reset()
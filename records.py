@@ -0,0 +1,173 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from abilities import AbilitySet
+
+# Stat layouts of the rolled-value tuples
+ITEM_STATS = ("damage", "defense", "effect", "rarity")
+MOB_STATS = ("str", "dex", "int", "fth", "end", "vit")
+ITEM_STAT_INDEX = {stat: i for i, stat in enumerate(ITEM_STATS)}
+MOB_STAT_INDEX = {stat: i for i, stat in enumerate(MOB_STATS)}
+RARITY_NAMES = ("Common", "Uncommon", "Rare", "Epic")
+
+class ItemTemplate(NamedTuple):
+    """What every item of one kind shares"""
+    name: str
+    enhanced_name: str
+
+class MobTemplate(NamedTuple):
+    """What every mob with one name and class shares"""
+    name: str
+    mob_class: str
+
+_item_templates: Dict[str, ItemTemplate] = {}
+_mob_templates: Dict[Tuple[str, str], MobTemplate] = {}
+
+def item_template(name: str) -> ItemTemplate:
+    """Shared template for an item name"""
+    template = _item_templates.get(name)
+    if template is None:
+        template = _item_templates[name] = ItemTemplate(name, f"Enhanced {name}")
+    return template
+
+def mob_template(name: str, mob_class: str) -> MobTemplate:
+    """Shared template for a mob name and class"""
+    key = (name, mob_class)
+    template = _mob_templates.get(key)
+    if template is None:
+        template = _mob_templates[key] = MobTemplate(name, mob_class)
+    return template
+
+class StatView(Mapping):
+    """Read-only stat-name -> value mapping over a record's value tuple"""
+    
+    __slots__ = ("_index", "_values")
+    
+    def __init__(self, index: Dict[str, int], values: Sequence[int]):
+        self._index = index
+        self._values = values
+    
+    def __getitem__(self, stat: str) -> int:
+        return self._values[self._index[stat]]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+class RecordView:
+    """Read-only dict interface over a record, for code written against the old dicts"""
+    
+    __slots__ = ()
+    FIELDS: Dict[str, str] = {}  # Dict key -> attribute
+    
+    def __getitem__(self, key: str) -> Any:
+        attribute = self.FIELDS.get(key)
+        if attribute is None:
+            raise KeyError(key)
+        return getattr(self, attribute)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        attribute = self.FIELDS.get(key)
+        return default if attribute is None else getattr(self, attribute)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self.FIELDS
+    
+    def keys(self):
+        return self.FIELDS.keys()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict copy (stats included)"""
+        return {key: dict(value) if isinstance(value, StatView) else value
+                for key, value in ((key, getattr(self, attribute)) for key, attribute in self.FIELDS.items())}
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()})"
+
+class ItemRecord(RecordView):
+    """One item: its shared template, the stats it rolled and any enhancement"""
+    
+    __slots__ = ("template", "rolled", "bonus", "curse_risk")
+    FIELDS = {"name": "name", "stats": "stats", "curse_risk": "curse_risk"}
+    
+    def __init__(self, template: ItemTemplate, rolled: Tuple[int, ...], curse_risk: float = 0,
+                 bonus: Optional[Tuple[int, ...]] = None):
+        self.template = template
+        self.rolled = rolled  # ITEM_STATS order
+        self.bonus = bonus  # Blacksmith enhancements, same order; None until enhanced
+        self.curse_risk = curse_risk
+    
+    @property
+    def name(self) -> str:
+        return self.template.name if self.bonus is None else self.template.enhanced_name
+    
+    @property
+    def stats(self) -> StatView:
+        return StatView(ITEM_STAT_INDEX, self.values())
+    
+    def values(self) -> Tuple[int, ...]:
+        """Current stats in ITEM_STATS order"""
+        if self.bonus is None:
+            return self.rolled
+        return tuple(rolled + bonus for rolled, bonus in zip(self.rolled, self.bonus))
+    
+    def enhance(self, deltas: Sequence[int]):
+        """Add a stat delta (ITEM_STATS order) on top of the rolled stats"""
+        bonus = self.bonus or (0,) * len(ITEM_STATS)
+        self.bonus = tuple(current + delta for current, delta in zip(bonus, deltas))
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self.template.name, "rolled": list(self.rolled),
+                "bonus": None if self.bonus is None else list(self.bonus), "curse_risk": self.curse_risk}
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.template = item_template(state["name"])
+        self.rolled = tuple(state["rolled"])
+        self.bonus = None if state["bonus"] is None else tuple(state["bonus"])
+        self.curse_risk = state["curse_risk"]
+
+class MobRecord(RecordView):
+    """One mob: its shared template plus rolled stats and abilities"""
+    
+    __slots__ = ("template", "rolled", "special_abilities", "entity_bias")
+    FIELDS = {"name": "name", "class": "mob_class", "stats": "stats",
+              "special_abilities": "special_abilities", "entity_bias": "entity_bias"}
+    
+    def __init__(self, template: MobTemplate, rolled: Tuple[int, ...], special_abilities: AbilitySet,
+                 entity_bias: float):
+        self.template = template
+        self.rolled = rolled  # MOB_STATS order
+        self.special_abilities = special_abilities
+        self.entity_bias = entity_bias
+    
+    @property
+    def name(self) -> str:
+        return self.template.name
+    
+    @property
+    def mob_class(self) -> str:
+        return self.template.mob_class
+    
+    @property
+    def stats(self) -> StatView:
+        return StatView(MOB_STAT_INDEX, self.rolled)
+    
+    def make_elite(self, multiplier: float = 1.5, title: str = "Elite"):
+        """Scale the stats and rename, e.g. for a miniboss"""
+        self.rolled = tuple(int(value * multiplier) for value in self.rolled)
+        self.template = mob_template(f"{title} {self.template.name}", self.template.mob_class)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self.template.name, "class": self.template.mob_class, "rolled": list(self.rolled),
+                "special_abilities": self.special_abilities, "entity_bias": self.entity_bias}
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.template = mob_template(state["name"], state["class"])
+        self.rolled = tuple(state["rolled"])
+        self.special_abilities = state["special_abilities"]
+        self.entity_bias = state["entity_bias"]
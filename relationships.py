@@ -0,0 +1,147 @@
+import numpy as np
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+ALLY_TRUST_THRESHOLD = 20  # Trust above this counts the NPC as an ally of the player
+
+class RelationshipWeb:
+    """NPC relationship web: trust vector + signed adjacency matrix indexed by NPC id"""
+    
+    def __init__(self, npc_names: Iterable[str] = (), capacity: int = 8):
+        self.names = []  # id -> name
+        self.ids = {}    # name -> id
+        self.trust = np.zeros(capacity, dtype=np.int32)
+        self.links = np.zeros((capacity, capacity), dtype=np.int8)  # +1 ally, -1 enemy, 0 none
+        self.ally_count = 0  # Maintained incrementally as trust changes
+        
+        for name in npc_names:
+            self.add_npc(name)
+    
+    def add_npc(self, name: str) -> int:
+        """Register an NPC, growing the arrays geometrically when full"""
+        if name in self.ids:
+            return self.ids[name]
+        
+        npc_id = len(self.names)
+        if npc_id >= len(self.trust):
+            capacity = len(self.trust) * 2
+            trust = np.zeros(capacity, dtype=np.int32)
+            trust[:npc_id] = self.trust[:npc_id]
+            links = np.zeros((capacity, capacity), dtype=np.int8)
+            links[:npc_id, :npc_id] = self.links[:npc_id, :npc_id]
+            self.trust, self.links = trust, links
+        
+        self.names.append(name)
+        self.ids[name] = npc_id
+        return npc_id
+    
+    def link(self, npc1: str, npc2: str, relationship_type: str):
+        """Set a symmetric ally/enemy edge between two known NPCs"""
+        if npc1 not in self.ids or npc2 not in self.ids:
+            return
+        
+        sign = 1 if relationship_type == "ally" else -1 if relationship_type == "enemy" else 0
+        i, j = self.ids[npc1], self.ids[npc2]
+        self.links[i, j] = sign
+        self.links[j, i] = sign
+    
+    def trust_of(self, name: str) -> int:
+        """Current player trust with an NPC"""
+        return int(self.trust[self.ids[name]])
+    
+    def set_trust(self, name: str, value: int):
+        """Set trust with a single NPC, keeping ally_count current"""
+        npc_id = self.ids[name]
+        was_ally = self.trust[npc_id] > ALLY_TRUST_THRESHOLD
+        self.trust[npc_id] = value
+        self.ally_count += int(value > ALLY_TRUST_THRESHOLD) - int(was_ally)
+    
+    def adjust(self, name: str, delta: int):
+        """Change trust with a single NPC"""
+        self.set_trust(name, self.trust_of(name) + delta)
+    
+    def propagate(self, source: str, ally_delta: int = 0, enemy_delta: int = 0) -> Tuple[List[str], List[str]]:
+        """Apply trust deltas to every ally/enemy of `source` in one vector op
+        
+        Returns the names of the affected allies and enemies.
+        """
+        n = len(self.names)
+        row = self.links[self.ids[source], :n]
+        allies = row > 0
+        enemies = row < 0
+        
+        delta = allies * ally_delta + enemies * enemy_delta
+        trust = self.trust[:n]
+        allies_before = np.count_nonzero(trust > ALLY_TRUST_THRESHOLD)
+        trust += delta.astype(np.int32)
+        self.ally_count += int(np.count_nonzero(trust > ALLY_TRUST_THRESHOLD) - allies_before)
+        
+        return ([self.names[i] for i in np.flatnonzero(allies)],
+                [self.names[i] for i in np.flatnonzero(enemies)])
+    
+    def allies(self, name: str) -> List[str]:
+        """Names of NPCs allied with `name`"""
+        row = self.links[self.ids[name], :len(self.names)]
+        return [self.names[i] for i in np.flatnonzero(row > 0)]
+    
+    def enemies(self, name: str) -> List[str]:
+        """Names of NPCs hostile to `name`"""
+        row = self.links[self.ids[name], :len(self.names)]
+        return [self.names[i] for i in np.flatnonzero(row < 0)]
+    
+    def total_trust(self) -> int:
+        """Sum of trust across every NPC"""
+        return int(self.trust[:len(self.names)].sum())
+    
+    # Dict-of-dicts compatibility layer ({"trust", "allies", "enemies"} per NPC)
+    
+    def __getitem__(self, name: str) -> "RelationshipView":
+        if name not in self.ids:
+            raise KeyError(name)
+        return RelationshipView(self, name)
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self.ids
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def keys(self) -> List[str]:
+        return list(self.names)
+    
+    def values(self) -> List["RelationshipView"]:
+        return [RelationshipView(self, name) for name in self.names]
+    
+    def items(self) -> List[Tuple[str, "RelationshipView"]]:
+        return [(name, RelationshipView(self, name)) for name in self.names]
+
+class RelationshipView:
+    """Dict-style view of one NPC's entry in a RelationshipWeb"""
+    
+    __slots__ = ("web", "name")
+    
+    def __init__(self, web: RelationshipWeb, name: str):
+        self.web = web
+        self.name = name
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == "trust":
+            return self.web.trust_of(self.name)
+        if key == "allies":
+            return self.web.allies(self.name)
+        if key == "enemies":
+            return self.web.enemies(self.name)
+        raise KeyError(key)
+    
+    def __setitem__(self, key: str, value: Any):
+        if key != "trust":
+            raise KeyError(f"{key} is derived from the relationship web")
+        self.web.set_trust(self.name, int(value))
+    
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
@@ -3,6 +3,7 @@ import json
 from typing import Dict, List, Any, Optional, Tuple
 
 from utils import colorize_text, narrator_filter
+from profiling import profiled
 
 class Room:
     """Individual room with AI-generated content"""
@@ -214,6 +215,7 @@ class RoomManager:
         self.player_location = "room_0"
         self.floor_layouts = {}
         
+    @profiled("rooms.generate_floor_layout")
     def generate_floor_layout(self, floor: int, player_vector: List[float]) -> Dict[str, Any]:
         """Generate entire floor layout using EntityAI"""
         layout_data = self.entity_ai.generate_layout(player_vector, floor)
@@ -280,6 +282,7 @@ class RoomManager:
         }
         return boss_descriptions.get(floor, "A place of final confrontation.")
     
+    @profiled("rooms.move_player")
     def move_player(self, direction: str, player) -> str:
         """Move player to connected room"""
         current_room = self.current_floor_rooms.get(self.player_location)
@@ -317,13 +320,14 @@ class RoomManager:
         """Get current room object"""
         return self.current_floor_rooms.get(self.player_location)
     
+    @profiled("rooms.show_room_map")
     def show_room_map(self, player) -> str:
         """Show simplified room map"""
         current_room = self.get_current_room()
         if not current_room:
             return "Location unknown."
             
-        map_text = f"\n{colorize_text('═══ FLOOR MAP ═══', 'cyan')}\n"
+        map_text = f"\n{colorize_text('═══ FLOOR MAP ═══', 'cyan', cache=True)}\n"
         map_text += f"Current location: {colorize_text(self.player_location, 'yellow')}\n"
         
         if current_room.connections:
@@ -337,6 +341,7 @@ class RoomManager:
             
         return map_text
     
+    @profiled("rooms.search_current_room")
     def search_current_room(self, player) -> Dict[str, Any]:
         """Search current room"""
         current_room = self.get_current_room()
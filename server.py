@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Terminal Souls multi-session server.
+Every connection descends alone; the Entity watching them is one and the same.
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+from entity_ai import EntityAI, InferenceBatcher
+from game import Game
+from snapshot import SnapshotError
+from utils import bind_session, current_session
+
+class SessionClosed(BaseException):
+    """Raised in a session's game thread once its client disconnects"""
+    # BaseException so Game.run's error handling lets it through to the session
+
+class SessionSuspended(BaseException):
+    """Raised in a session's game thread when its worker hands the session off"""
+
+class SessionParked(BaseException):
+    """Raised in a session's game thread when its player idles at a resume point"""
+
+PARK_AFTER_S = 30.0  # Idle time at a resume point before a session gives up its thread
+
+_SUSPEND = object()  # Input sentinel asking the game thread to stop for handoff
+_PARK = object()  # Returned to the game thread when it should park
+
+class Session:
+    """One connected player: an input channel on the event loop and buffered output
+    
+    The game loop is synchronous, so an active session runs it on its own thread.
+    A player left idle at a resume point is parked: the game is snapshotted, its
+    thread exits, and only the session coroutine remains, awaiting the next line.
+    """
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter, flush_bytes: int = 4096,
+                 session_id: Optional[str] = None, game: Optional[Game] = None,
+                 park_after_s: Optional[float] = PARK_AFTER_S):
+        self.loop = loop
+        self.writer = writer
+        self.flush_bytes = flush_bytes
+        self.session_id = session_id
+        self.park_after_s = park_after_s  # None: never park
+        self.game = game  # Set when resuming a handed-off session
+        self.snapshot = None  # Filled in if the session is suspended for handoff or parked
+        self.done = threading.Event()
+        self.lines = deque()  # Input channel: only touched on the event loop
+        self.line_ready = asyncio.Event()
+        self.locals = {}  # Per-session instances behind utils.SessionLocal
+        self.closed = False
+        self.resume_point = False  # Set by utils.mark_resume_point before a prompt
+        self.replaying = False  # Unparked game redrawing the screen the client already has
+        self._out = []
+        self._out_size = 0
+    
+    def write(self, text: str):
+        """Buffer game output for the client (dropped once disconnected)"""
+        if self.closed or self.replaying:
+            return
+        self._out.append(text)
+        self._out_size += len(text)
+        if self._out_size >= self.flush_bytes:
+            self.flush()
+    
+    def flush(self):
+        """Hand buffered output to the event loop"""
+        if not self._out:
+            return
+        data = "".join(self._out).replace("\n", "\r\n").encode("utf-8", "replace")
+        self._out, self._out_size = [], 0
+        if not self.closed:
+            self.loop.call_soon_threadsafe(self.writer.write, data)
+    
+    def feed(self, line):
+        """Queue a client line or sentinel (event loop only)"""
+        self.lines.append(line)
+        self.line_ready.set()
+    
+    async def wait_for_line(self, timeout_s: Optional[float] = None) -> bool:
+        """Wait until a line or sentinel is queued; False on timeout"""
+        while not self.lines:
+            self.line_ready.clear()
+            try:
+                await asyncio.wait_for(self.line_ready.wait(), timeout_s)
+            except asyncio.TimeoutError:
+                return False
+        return True
+    
+    async def next_line(self, park_after_s: Optional[float]):
+        """Take the next line for the game thread; sentinels stay queued so any later reader stops too"""
+        if not await self.wait_for_line(park_after_s):
+            return _PARK
+        if self.lines[0] is None or self.lines[0] is _SUSPEND:
+            return self.lines[0]
+        return self.lines.popleft()
+    
+    def readline(self) -> str:
+        """Block the game thread until the client sends a line"""
+        self.replaying = False  # Back at the prompt the client is looking at
+        self.flush()
+        park_after_s = self.park_after_s if self.resume_point else None
+        self.resume_point = False
+        line = asyncio.run_coroutine_threadsafe(self.next_line(park_after_s), self.loop).result()
+        if line is None:
+            raise SessionClosed()
+        if line is _SUSPEND:
+            self._out, self._out_size = [], 0
+            self.closed = True  # Nothing written while unwinding reaches the client
+            raise SessionSuspended()
+        if line is _PARK:
+            self.replaying = True  # Muted until the resumed game is back at this prompt
+            raise SessionParked()
+        return line
+    
+    def close(self):
+        """Mark the client gone and wake the game if it is waiting for input"""
+        self.closed = True
+        self.feed(None)
+    
+    def suspend(self):
+        """Stop the game at its next input prompt so it can be snapshotted"""
+        self.feed(_SUSPEND)
+    
+    async def run(self, entity_ai: EntityAI):
+        """Session coroutine: play on a thread while active, hold only a snapshot while parked"""
+        while True:
+            finished = self.loop.create_future()
+            threading.Thread(target=self.play, args=(entity_ai, finished), daemon=True).start()
+            if not await finished:
+                break  # Game over, client gone or suspended for handoff
+            
+            await self.wait_for_line()
+            if self.lines[0] is None:
+                self.snapshot = None  # Left while parked
+                break
+            if self.lines[0] is _SUSPEND:
+                break  # Handed off as it is: the parked snapshot is already taken
+        
+        self.writer.close()
+        self.done.set()
+    
+    def play(self, entity_ai: EntityAI, finished: asyncio.Future):
+        """Game thread body; resolves `finished` with whether the game parked"""
+        bind_session(self)
+        game, snapshot = self.game, self.snapshot
+        self.game, self.snapshot = None, None
+        resume = game is not None or snapshot is not None
+        parked = False
+        try:
+            if game is None:
+                game = Game(entity_ai=entity_ai.spawn_session())
+                if snapshot is not None:
+                    game.restore(snapshot)  # Unparking
+            game.run(resume=resume)
+        except SessionClosed:
+            pass
+        except SessionSuspended:
+            self.snapshot = game.snapshot()
+        except SessionParked:
+            self.snapshot = game.snapshot()
+            parked = True
+        except SnapshotError as e:
+            sys.stderr.write(f"Session {self.session_id} could not be unparked: {e}\n")
+        except Exception:
+            pass  # Game.run already reported it on stderr
+        finally:
+            self.flush()
+            bind_session(None)
+            self.loop.call_soon_threadsafe(finished.set_result, parked)
+
+class SessionStream:
+    """sys.stdin/sys.stdout stand-in routing each thread to its bound session"""
+    
+    def __init__(self, fallback):
+        self.fallback = fallback
+    
+    def write(self, text: str) -> int:
+        session = current_session()
+        if session is None:
+            return self.fallback.write(text)
+        session.write(text)
+        return len(text)
+    
+    def flush(self):
+        session = current_session()
+        if session is None:
+            self.fallback.flush()
+        else:
+            session.flush()
+    
+    def readline(self) -> str:
+        session = current_session()
+        if session is None:
+            return self.fallback.readline()
+        return session.readline()
+    
+    def fileno(self) -> int:
+        # input() reads the real terminal when it can get a tty file descriptor
+        if current_session() is not None:
+            raise OSError("session streams have no file descriptor")
+        return self.fallback.fileno()
+    
+    def isatty(self) -> bool:
+        return current_session() is None and self.fallback.isatty()
+    
+    def __getattr__(self, name):
+        return getattr(self.fallback, name)
+
+class GameServer:
+    """asyncio TCP server hosting one Game per connection around a shared EntityAI"""
+    
+    def __init__(self, entity_ai: EntityAI, handoff: bool = False, park_after_s: Optional[float] = PARK_AFTER_S):
+        self.entity_ai = entity_ai
+        self.handoff = handoff  # Worker mode: connections open with a SESSION/RESUME header
+        self.park_after_s = park_after_s
+        self.sessions = set()
+    
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Pump client lines into the session until it disconnects"""
+        session_id, game = None, None
+        if self.handoff:
+            header = (await reader.readline()).decode("ascii").split()
+            if len(header) < 2:
+                writer.close()
+                return
+            session_id = header[1]
+            if header[0] == "RESUME":
+                game = Game(entity_ai=self.entity_ai.spawn_session())
+                try:
+                    game.restore(await reader.readexactly(int(header[2])))
+                except SnapshotError as e:
+                    sys.stderr.write(f"Session {session_id} could not be restored: {e}\n")
+                    writer.close()
+                    return
+        
+        session = Session(asyncio.get_running_loop(), writer, session_id=session_id, game=game,
+                          park_after_s=self.park_after_s)
+        self.sessions.add(session)
+        
+        # Plays on a (small-stack) thread while active, parks to a snapshot when idle
+        task = asyncio.create_task(session.run(self.entity_ai))
+        
+        try:
+            while not reader.at_eof():
+                line = await reader.readline()
+                if not line:
+                    break
+                session.feed(line.decode("utf-8", "replace").rstrip("\r\n") + "\n")
+        except ConnectionError:
+            pass
+        finally:
+            session.close()
+            self.sessions.discard(session)
+            if not writer.is_closing():
+                writer.close()
+            await task
+    
+    async def drain(self, timeout_s: float = 30.0) -> Dict[str, bytes]:
+        """Suspend every session at its next input prompt and collect their snapshots"""
+        sessions = list(self.sessions)
+        for session in sessions:
+            session.suspend()
+        
+        def wait_all():
+            deadline = time.monotonic() + timeout_s
+            for session in sessions:
+                session.done.wait(max(0.0, deadline - time.monotonic()))
+        
+        await asyncio.get_running_loop().run_in_executor(None, wait_all)
+        return {session.session_id: session.snapshot for session in sessions if session.snapshot is not None}
+    
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Terminal Souls server listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Host many Terminal Souls sessions around one Entity")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="How long a generator call waits for other sessions' calls to batch with")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Shard sessions across this many worker processes (0 = host them in this process)")
+    parser.add_argument("--weights", default=None,
+                        help="Shared generator weights file for workers (created if missing)")
+    parser.add_argument("--thread-stack-kb", type=int, default=512,
+                        help="Stack size of each active session's game thread")
+    parser.add_argument("--whisper-log", metavar="DIR",
+                        help="Append each session's whispers to its own gzip log in DIR")
+    parser.add_argument("--park-after-s", type=float, default=PARK_AFTER_S,
+                        help="Seconds a player may idle at a safe-zone prompt before the session gives up "
+                             "its thread and waits as a snapshot (0 = never park)")
+    args = parser.parse_args(argv)
+    
+    if args.workers > 0:
+        from cluster import Supervisor
+        Supervisor(args.workers, args.weights, args.batch_window_ms / 1000.0, args.thread_stack_kb,
+                   args.park_after_s or None, args.whisper_log).run(args.host, args.port)
+        return
+    
+    threading.stack_size(args.thread_stack_kb * 1024)
+    sys.stdout = SessionStream(sys.stdout)
+    sys.stdin = SessionStream(sys.stdin)
+    
+    batcher = InferenceBatcher(window_s=args.batch_window_ms / 1000.0)
+    server = GameServer(EntityAI(whisper_spill_dir=args.whisper_log, batcher=batcher),
+                        park_after_s=args.park_after_s or None)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        batcher.stop()
+
+if __name__ == "__main__":
+    main()
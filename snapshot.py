@@ -0,0 +1,312 @@
+import math
+import struct
+import importlib
+from collections import deque
+from typing import Dict, Any
+import numpy as np
+
+# Versioned binary snapshot of one game session: a compact tagged encoding
+# (msgpack-like) of the session's object graph. Shared references are kept
+# via a memo, the session's EntityAI and root Game are written as markers,
+# and only classes listed in SNAPSHOT_CLASSES can be rebuilt.
+
+SNAPSHOT_MAGIC = b"TSS"
+SNAPSHOT_VERSION = 7  # 2: compact Player (StatBlock, ActionHistory); 3: bytearray (combat action codes); 4: AbilitySet;
+                      # 5: Game/Combat clocks; 6: Inventory; 7: item/mob records
+
+# Append-only: a class's position is its code in the format
+SNAPSHOT_CLASSES = (
+    "player.Player",
+    "combat.Combat",
+    "combat.BossCombat",
+    "room.Room",
+    "room.SpecialRoom",
+    "room.RoomManager",
+    "npc.NPC",
+    "npc.SpecialNPC",
+    "npc.NPCManager",
+    "relationships.RelationshipWeb",
+    "entity_ai.WhisperArchive",
+    "player.StatBlock",
+    "player.ActionHistory",
+    "abilities.AbilitySet",
+    "clock.RealClock",
+    "clock.VirtualClock",
+    "inventory.Inventory",
+    "records.ItemRecord",
+    "records.MobRecord",
+)
+
+T_NONE, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_BYTES = range(7)
+T_LIST, T_TUPLE, T_DICT, T_SET, T_DEQUE, T_ARRAY, T_OBJECT = range(7, 14)
+T_REF, T_ENTITY, T_GAME, T_BYTEARRAY = range(14, 18)
+T_SMALL_INT = 0x80  # 0x80 | n encodes 0 <= n < 128 in one byte
+
+_DOUBLE = struct.Struct("<d")
+_HEADER = struct.Struct("<3sH")
+
+_classes = []  # Resolved SNAPSHOT_CLASSES
+_class_codes = {}  # class -> code
+
+def _resolve_classes():
+    """Import snapshot classes on first use (their modules import this one indirectly)"""
+    if _classes:
+        return
+    for code, path in enumerate(SNAPSHOT_CLASSES):
+        module_name, class_name = path.rsplit(".", 1)
+        cls = getattr(importlib.import_module(module_name), class_name)
+        _classes.append(cls)
+        _class_codes[cls] = code
+
+class SnapshotError(ValueError):
+    """Snapshot bytes that cannot be decoded by this version"""
+
+def _write_uint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _read_uint(data: bytes, pos: int):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def encode_session(game, entity_ai, extra: Dict[str, Any]) -> bytes:
+    """Encode `extra` (plain data referencing the game graph) behind a versioned header"""
+    _resolve_classes()
+    out = bytearray(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+    memo = {}  # id(container) or str value -> back-reference index
+    keepalive = []  # Objects whose id() is in the memo must outlive the encode
+    
+    def encode(value):
+        if value is None:
+            out.append(T_NONE)
+            return
+        kind = type(value)
+        if kind is bool:
+            out.append(T_TRUE if value else T_FALSE)
+        elif kind is int:
+            if 0 <= value < 0x80:
+                out.append(T_SMALL_INT | value)
+            else:
+                out.append(T_INT)
+                _write_uint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))  # Zigzag
+        elif kind is float:
+            out.append(T_FLOAT)
+            out.extend(_DOUBLE.pack(value))
+        elif kind is str:
+            index = memo.get(value)
+            if index is not None:
+                out.append(T_REF)  # Repeated strings (mostly dict keys) are written once
+                _write_uint(out, index)
+                return
+            memo[value] = len(memo)
+            raw = value.encode("utf-8")
+            out.append(T_STR)
+            _write_uint(out, len(raw))
+            out.extend(raw)
+        elif kind is tuple:
+            out.append(T_TUPLE)
+            _write_uint(out, len(value))
+            for item in value:
+                encode(item)
+        elif value is entity_ai:
+            out.append(T_ENTITY)
+        elif value is game:
+            out.append(T_GAME)
+        elif id(value) in memo:
+            out.append(T_REF)
+            _write_uint(out, memo[id(value)])
+        else:
+            encode_container(value, kind)
+    
+    def encode_container(value, kind):
+        memo[id(value)] = len(memo)
+        keepalive.append(value)
+        if kind is dict:
+            out.append(T_DICT)
+            _write_uint(out, len(value))
+            for key, item in value.items():
+                encode(key)
+                encode(item)
+        elif kind is list:
+            out.append(T_LIST)
+            _write_uint(out, len(value))
+            for item in value:
+                encode(item)
+        elif kind is deque:
+            out.append(T_DEQUE)
+            _write_uint(out, 0 if value.maxlen is None else value.maxlen + 1)
+            _write_uint(out, len(value))
+            for item in value:
+                encode(item)
+        elif kind is set or kind is frozenset:
+            out.append(T_SET)
+            _write_uint(out, len(value))
+            for item in value:
+                encode(item)
+        elif kind is bytes or kind is bytearray:
+            out.append(T_BYTES if kind is bytes else T_BYTEARRAY)
+            _write_uint(out, len(value))
+            out.extend(value)
+        elif kind is np.ndarray:
+            dtype = value.dtype.str.encode("ascii")
+            out.append(T_ARRAY)
+            _write_uint(out, len(dtype))
+            out.extend(dtype)
+            _write_uint(out, value.ndim)
+            for dim in value.shape:
+                _write_uint(out, dim)
+            out.extend(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, np.generic):
+            del memo[id(value)]
+            encode(value.item())
+        elif kind in _class_codes:
+            state = value.__getstate__() if "__getstate__" in kind.__dict__ else value.__dict__
+            out.append(T_OBJECT)
+            out.append(_class_codes[kind])
+            encode(state)
+        else:
+            raise TypeError(f"cannot snapshot {kind.__name__} objects")
+    
+    encode(extra)
+    return bytes(out)
+
+def decode_session(data: bytes, game, entity_ai) -> Any:
+    """Decode a snapshot, binding entity/game markers to the given objects"""
+    _resolve_classes()
+    if len(data) < _HEADER.size:
+        raise SnapshotError("snapshot is truncated")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("not a game snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+    
+    memo = []
+    pos = _HEADER.size
+    
+    def decode():
+        # Tags are tested roughly by frequency; one-byte lengths skip _read_uint
+        nonlocal pos
+        tag = data[pos]
+        pos += 1
+        if tag >= T_SMALL_INT:
+            return tag & 0x7F
+        if tag == T_REF:
+            index = data[pos]
+            pos += 1
+            if index >= 0x80:
+                index, pos = _read_uint(data, pos - 1)
+            return memo[index]
+        if tag == T_STR:
+            size = data[pos]
+            pos += 1
+            if size >= 0x80:
+                size, pos = _read_uint(data, pos - 1)
+            pos += size
+            value = data[pos - size:pos].decode("utf-8")
+            memo.append(value)
+            return value
+        if tag == T_DICT:
+            value = {}
+            memo.append(value)
+            size = data[pos]
+            pos += 1
+            if size >= 0x80:
+                size, pos = _read_uint(data, pos - 1)
+            for _ in range(size):
+                key = decode()
+                value[key] = decode()
+            return value
+        if tag == T_FLOAT:
+            pos += 8
+            return _DOUBLE.unpack_from(data, pos - 8)[0]
+        if tag == T_NONE:
+            return None
+        if tag == T_TRUE:
+            return True
+        if tag == T_FALSE:
+            return False
+        if tag == T_LIST:
+            value = []
+            memo.append(value)
+            size, pos = _read_uint(data, pos)
+            for _ in range(size):
+                value.append(decode())
+            return value
+        if tag == T_INT:
+            n, pos = _read_uint(data, pos)
+            return (n >> 1) if not n & 1 else -((n + 1) >> 1)
+        if tag == T_TUPLE:
+            size, pos = _read_uint(data, pos)
+            return tuple([decode() for _ in range(size)])
+        if tag == T_ENTITY:
+            return entity_ai
+        if tag == T_GAME:
+            return game
+        return decode_container(tag)
+    
+    def decode_container(tag):
+        nonlocal pos
+        if tag == T_DEQUE:
+            maxlen, pos = _read_uint(data, pos)
+            value = deque(maxlen=maxlen - 1 if maxlen else None)
+            memo.append(value)
+            size, pos = _read_uint(data, pos)
+            for _ in range(size):
+                value.append(decode())
+            return value
+        if tag == T_SET:
+            value = set()
+            memo.append(value)
+            size, pos = _read_uint(data, pos)
+            for _ in range(size):
+                value.add(decode())
+            return value
+        if tag == T_BYTES or tag == T_BYTEARRAY:
+            size, pos = _read_uint(data, pos)
+            value = (bytes if tag == T_BYTES else bytearray)(data[pos:pos + size])
+            pos += size
+            memo.append(value)
+            return value
+        if tag == T_ARRAY:
+            size, pos = _read_uint(data, pos)
+            dtype = np.dtype(data[pos:pos + size].decode("ascii"))
+            pos += size
+            ndim, pos = _read_uint(data, pos)
+            shape = []
+            for _ in range(ndim):
+                dim, pos = _read_uint(data, pos)
+                shape.append(dim)
+            count = math.prod(shape)
+            value = np.frombuffer(data, dtype=dtype, count=count, offset=pos).reshape(shape).copy()
+            pos += count * dtype.itemsize
+            memo.append(value)
+            return value
+        if tag == T_OBJECT:
+            code = data[pos]
+            pos += 1
+            if code >= len(_classes):
+                raise SnapshotError(f"unknown class code {code}")
+            cls = _classes[code]
+            value = cls.__new__(cls)
+            memo.append(value)
+            state = decode()
+            if hasattr(value, "__setstate__") and "__setstate__" in cls.__dict__:
+                value.__setstate__(state)
+            else:
+                value.__dict__.update(state)
+            return value
+        raise SnapshotError(f"unknown tag {tag} at offset {pos - 1}")
+    
+    try:
+        return decode()
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise SnapshotError(f"corrupt snapshot: {e}") from e
@@ -0,0 +1,56 @@
+"""BibleStore: the live bible is seeded from the shipped one, which is never written"""
+
+import gc
+import json
+import os
+import tempfile
+import unittest
+
+import bible_store
+from bible_store import BibleStore
+
+SEED = {"themes": ["echo"], "phrases": ["The code bleeds.", "Ash remains."], "edits_log": [], "edit_count": 0}
+
+class BibleStoreTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.seed_path = os.path.join(self.dir.name, "game_bible.json")
+        with open(self.seed_path, "w", encoding="utf-8") as f:
+            json.dump(SEED, f)
+        self.state_path = os.path.join(self.dir.name, "data", "game_bible.json")
+    
+    def store(self) -> BibleStore:
+        return BibleStore(self.state_path, seed_path=self.seed_path, compact_every=2)
+    
+    def test_mutations_leave_the_seed_alone(self):
+        with open(self.seed_path, "rb") as f:
+            seed_bytes = f.read()
+        store = self.store()
+        bible = store.load({"phrases": []})
+        self.assertEqual(bible["phrases"], SEED["phrases"])
+        for death_count in (5, 6):
+            edit = {"death_count": death_count, "index": 0, "original": bible["phrases"][0],
+                    "mutated": f"You bleed {death_count}."}
+            store.apply_edit(bible, edit)
+            store.record_edit(edit)
+        store.flush()  # Reaches compact_every: folded into the state snapshot
+        
+        with open(self.seed_path, "rb") as f:
+            self.assertEqual(f.read(), seed_bytes)
+        self.assertEqual(self.store().load({"phrases": []})["phrases"][0], "You bleed 6.")
+    
+    def test_stores_do_not_pile_up(self):
+        for _ in range(50):
+            self.store()
+        gc.collect()
+        self.assertNotIn(self.state_path, [store.path for store in bible_store._live_stores])
+    
+    def test_default_when_seed_missing(self):
+        os.remove(self.seed_path)
+        bible = self.store().load({"phrases": ["Fallback."]})
+        self.assertEqual(bible["phrases"], ["Fallback."])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Chapter blueprints: cached plans are read-only, per-run rolls stay on the seeded stream"""
+
+import random
+import unittest
+
+import numpy as np
+
+from entity_ai import EntityAI, CHAPTER_TYPES, CORRUPTION_TYPES, MIDPOINT_CHAPTERS
+
+VECTOR = [0.8, 0.8, 0.1, 0.1, 0.5, 0.5, 0.2, 0.0, 0.3, 0.9, 1.0, 0.2] + [0.0] * 8
+
+class BlueprintTest(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.entity_ai = EntityAI()
+    
+    def test_modifiers_are_not_shared(self):
+        blueprint = self.entity_ai.generate_chapter_blueprint(VECTOR, 2)
+        first, second = blueprint["sequence"][0], blueprint["sequence"][1]
+        first["special_modifier"]["armored_enemies"] = "tampered"
+        self.assertNotEqual(second["special_modifier"].get("armored_enemies"), "tampered")
+        
+        _, _, modifiers, _ = self.entity_ai.get_blueprint_plan(VECTOR, 2)
+        self.assertNotEqual(modifiers.get("armored_enemies"), "tampered")
+        with self.assertRaises(TypeError):
+            modifiers["armored_enemies"] = "tampered"
+        
+        again = self.entity_ai.generate_chapter_blueprint(VECTOR, 2)
+        self.assertNotEqual(again["sequence"][0]["special_modifier"].get("armored_enemies"), "tampered")
+    
+    def test_rolls_replay_the_seeded_random_stream(self):
+        self.entity_ai.chaos_mode_active = True
+        self.addCleanup(setattr, self.entity_ai, "chaos_mode_active", False)
+        types, _, _, _ = self.entity_ai.get_blueprint_plan(VECTOR, 3)
+        
+        # The rolls in the order the game has always drawn them
+        random.seed(11)
+        expected = [CHAPTER_TYPES[code] for code in types.tolist()]
+        for i in MIDPOINT_CHAPTERS:
+            if random.random() < 0.7:
+                expected[i] = "miniboss"
+        corruption = []
+        for _ in expected:
+            corruption.append(random.choice(CORRUPTION_TYPES) if random.random() < 0.2 else None)
+        
+        np_state = np.random.get_state()[1].copy()
+        random.seed(11)
+        blueprint = self.entity_ai.generate_chapter_blueprint(VECTOR, 3)
+        self.assertEqual([chapter["type"] for chapter in blueprint["sequence"]], expected)
+        self.assertEqual([chapter.get("corruption_type") for chapter in blueprint["sequence"]], corruption)
+        self.assertTrue((np.random.get_state()[1] == np_state).all())
+
+if __name__ == "__main__":
+    unittest.main()
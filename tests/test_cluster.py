@@ -0,0 +1,109 @@
+"""Cluster routing and bible arbitration, without spawning workers"""
+
+import os
+import tempfile
+import unittest
+
+from bible_store import BibleStore
+from cluster import HashRing, Supervisor
+
+KEYS = [f"session-{n}" for n in range(2000)]
+
+class HashRingTest(unittest.TestCase):
+    
+    def test_placement_is_deterministic(self):
+        first, second = HashRing(range(4)), HashRing(reversed(range(4)))
+        self.assertEqual([first.node_for(key) for key in KEYS], [second.node_for(key) for key in KEYS])
+    
+    def test_every_node_gets_a_share(self):
+        ring = HashRing(range(4))
+        counts = {node: 0 for node in range(4)}
+        for key in KEYS:
+            counts[ring.node_for(key)] += 1
+        for node, count in counts.items():
+            self.assertGreater(count, len(KEYS) // 8, f"node {node} is starved")
+    
+    def test_add_moves_keys_only_to_the_new_node(self):
+        ring = HashRing(range(3))
+        before = {key: ring.node_for(key) for key in KEYS}
+        ring.add(3)
+        for key in KEYS:
+            after = ring.node_for(key)
+            if after != before[key]:
+                self.assertEqual(after, 3)
+    
+    def test_remove_moves_only_the_removed_nodes_keys(self):
+        ring = HashRing(range(4))
+        before = {key: ring.node_for(key) for key in KEYS}
+        ring.remove(2)
+        for key in KEYS:
+            after = ring.node_for(key)
+            self.assertNotEqual(after, 2)
+            if before[key] != 2:
+                self.assertEqual(after, before[key])
+    
+    def test_remove_then_add_restores_placement(self):
+        ring = HashRing(range(4))
+        before = [ring.node_for(key) for key in KEYS]
+        ring.remove(1)
+        ring.add(1)
+        self.assertEqual([ring.node_for(key) for key in KEYS], before)
+    
+    def test_empty_ring(self):
+        ring = HashRing(range(1))
+        ring.remove(0)
+        with self.assertRaises(LookupError):
+            ring.node_for("session-0")
+
+class FakeConn:
+    """Worker end of a bible pipe that just remembers what it was sent"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    def send(self, message):
+        self.sent.append(message)
+
+class AcceptEditTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.supervisor = Supervisor(2)
+        self.supervisor.bible_store = BibleStore(os.path.join(self.dir.name, "game_bible.json"))
+        self.addCleanup(self.supervisor.bible_store.flush)
+        self.supervisor.bible = self.supervisor.bible_store.load(
+            {"phrases": ["The code bleeds.", "Ash remains."], "edits_log": [], "edit_count": 0})
+        self.conns = {0: FakeConn(), 1: FakeConn()}
+        self.supervisor.bible_conns = dict(self.conns)
+    
+    def edit(self, death_count: int, index: int, original: str, mutated: str):
+        return {"death_count": death_count, "index": index, "original": original, "mutated": mutated}
+    
+    def test_accepted_edit_is_applied_and_broadcast(self):
+        edit = self.edit(1, 0, "The code bleeds.", "The code weeps.")
+        self.supervisor.accept_edit(edit)
+        self.assertEqual(self.supervisor.bible["phrases"][0], "The code weeps.")
+        self.assertEqual(self.supervisor.bible["edit_count"], 1)
+        for conn in self.conns.values():
+            self.assertEqual(conn.sent, [("edit", edit)])
+    
+    def test_racing_edit_on_the_same_phrase_is_dropped(self):
+        self.supervisor.accept_edit(self.edit(1, 0, "The code bleeds.", "The code weeps."))
+        self.supervisor.accept_edit(self.edit(2, 0, "The code bleeds.", "The code rots."))
+        self.assertEqual(self.supervisor.bible["phrases"][0], "The code weeps.")
+        self.assertEqual(len(self.conns[0].sent), 1)
+    
+    def test_edit_for_a_death_already_counted_is_dropped(self):
+        self.supervisor.accept_edit(self.edit(1, 0, "The code bleeds.", "The code weeps."))
+        self.supervisor.accept_edit(self.edit(1, 1, "Ash remains.", "Ash lingers."))
+        self.assertEqual(self.supervisor.bible["phrases"][1], "Ash remains.")
+        self.assertEqual(self.supervisor.bible["edit_count"], 1)
+    
+    def test_out_of_range_index_is_dropped(self):
+        self.supervisor.accept_edit(self.edit(1, 9, "The code bleeds.", "The code weeps."))
+        self.assertEqual(self.supervisor.bible["phrases"], ["The code bleeds.", "Ash remains."])
+        self.assertEqual(self.conns[0].sent, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Combat regressions: the Action mapping must not open escape routes the game never had"""
+
+import unittest
+from unittest import mock
+
+from actions import Action
+from combat import Combat, BossCombat
+from entity_ai import EntityAI
+from player import Player
+from utils import pacer
+
+entity_ai = None
+
+def setUpModule():
+    global entity_ai
+    entity_ai = EntityAI()
+    pacer.configure("skip")
+
+def tearDownModule():
+    pacer.configure("interactive")
+
+class AbortEncounter(Exception):
+    """Stops an encounter loop once the test has seen enough rounds"""
+
+def scripted_input(first: str, rounds: int):
+    """input() replacement: `first`, then EOF for a few rounds, then abort"""
+    answers = iter([first])
+    calls = [0]
+    def fake_input(prompt=""):
+        calls[0] += 1
+        if calls[0] > rounds:
+            raise AbortEncounter()
+        answer = next(answers, None)
+        if answer is None:
+            raise EOFError()
+        return answer
+    return fake_input
+
+class RegularFleeTest(unittest.TestCase):
+    
+    def run_encounter(self, first: str):
+        player = Player("Tester", "Warrior")
+        combat = Combat(entity_ai)
+        enemy = entity_ai.generate_mob(player.state_vector(), 1).to_dict()
+        with mock.patch("builtins.input", scripted_input(first, 4)), \
+                mock.patch.object(Combat, "attempt_flee", return_value=True) as attempt_flee, \
+                mock.patch("builtins.print"):
+            try:
+                result = combat.start_encounter(player, enemy)
+            except AbortEncounter:
+                result = None
+        return result, attempt_flee, player
+    
+    def test_f_loses_the_turn(self):
+        result, attempt_flee, player = self.run_encounter("f")
+        self.assertNotEqual(result, "fled")
+        attempt_flee.assert_not_called()
+        self.assertEqual(player.flee_count, 0)
+    
+    def test_eof_does_not_flee(self):
+        result, attempt_flee, player = self.run_encounter(None)
+        self.assertNotEqual(result, "fled")
+        attempt_flee.assert_not_called()
+        self.assertEqual(player.flee_count, 0)
+
+class BossFleeTest(unittest.TestCase):
+    
+    def test_f_is_not_an_escape(self):
+        player = Player("Tester", "Warrior")
+        combat = BossCombat(entity_ai)
+        boss = {"name": "Warden", "health": 200, "aggression": 0.5, "stats": {"str": 10, "dex": 10, "vit": 20}}
+        with mock.patch.object(BossCombat, "get_boss_combat_action", return_value=Action.FLEE), \
+                mock.patch.object(BossCombat, "process_boss_action", return_value=0), \
+                mock.patch.object(entity_ai, "calculate_entity_bias", return_value=0.0), \
+                mock.patch("builtins.print"):
+            result = combat.boss_combat_round(player, boss, 200, 200)
+        self.assertNotIn("result", result)
+        self.assertEqual(result["boss_health"], 200)
+        self.assertEqual(player.flee_count, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Inventory: ids stay stable, and category indexes follow item stats"""
+
+import unittest
+
+from inventory import Inventory
+from records import ItemRecord, item_template
+
+def item(name: str, damage: int) -> ItemRecord:
+    return ItemRecord(item_template(name), (damage, 1, 0, 1))
+
+class IdTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.inventory = Inventory()
+        self.blade = self.inventory.add(item("Rusted Blade", 4))
+        self.tonic = self.inventory.add(item("Bitter Tonic", 0))
+        self.shard = self.inventory.add(item("Ember Shard", 0))
+    
+    def test_removed_ids_are_not_reused(self):
+        self.inventory.remove(self.tonic)
+        new_id = self.inventory.add(item("Grave Salt", 0))
+        self.assertNotIn(new_id, (self.blade, self.tonic, self.shard))
+        self.assertNotIn(self.tonic, self.inventory)
+        self.assertIsNone(self.inventory.get(self.tonic))
+        with self.assertRaises(KeyError):
+            self.inventory.equip("weapon", self.tonic)
+    
+    def test_ids_are_not_reused_after_clear(self):
+        self.inventory.clear()
+        self.assertNotIn(self.inventory.add(item("Grave Salt", 0)), (self.blade, self.tonic, self.shard))
+    
+    def test_removing_an_equipped_item_unequips_it(self):
+        self.inventory.equip("weapon", self.blade)
+        self.inventory.remove(self.blade)
+        self.assertIsNone(self.inventory.equipped_item("weapon"))
+        self.assertFalse(self.inventory.is_equipped(self.blade))
+    
+    def test_listing_positions_close_over_removed_items(self):
+        self.inventory.remove(self.blade)
+        self.assertEqual(self.inventory.at(0), (self.tonic, self.inventory.get(self.tonic)))
+        self.assertEqual([item_id for item_id, _ in self.inventory.page(0, 2)], [self.tonic, self.shard])
+        self.assertEqual(self.inventory.page_count(2), 1)
+        self.assertEqual([entry["name"] for entry in self.inventory], ["Bitter Tonic", "Ember Shard"])
+    
+    def test_ids_survive_a_snapshot(self):
+        self.inventory.equip("weapon", self.blade)
+        self.inventory.remove(self.tonic)
+        restored = Inventory()
+        restored.__setstate__(self.inventory.__getstate__())
+        self.assertEqual([item_id for item_id, _ in restored.entries()], [self.blade, self.shard])
+        self.assertEqual(restored.equipped_item("weapon")["name"], "Rusted Blade")
+        self.assertNotIn(restored.add(item("Grave Salt", 0)), (self.blade, self.tonic, self.shard))
+
+class CategoryTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.inventory = Inventory()
+        self.blade = self.inventory.add(item("Rusted Blade", 4))
+        self.tonic = self.inventory.add(item("Bitter Tonic", 0))
+        self.shard = self.inventory.add(item("Ember Shard", 0))
+    
+    def ids(self, category: str):
+        return [item_id for item_id, _ in self.inventory.category(category)]
+    
+    def test_initial_categories(self):
+        self.assertEqual(self.ids("weapon"), [self.blade])
+        self.assertEqual(self.ids("consumable"), [self.tonic, self.shard])
+    
+    def test_enhanced_item_moves_to_weapons(self):
+        self.inventory.get(self.tonic).enhance((2, 0, 0, 0))
+        self.inventory.recategorize(self.tonic)
+        self.assertEqual(self.inventory.get(self.tonic)["name"], "Enhanced Bitter Tonic")
+        self.assertIn(self.tonic, self.ids("weapon"))
+        self.assertEqual(self.ids("consumable"), [self.shard])
+    
+    def test_recategorize_without_a_change_keeps_the_index(self):
+        self.inventory.get(self.blade).enhance((0, 2, 0, 0))
+        self.inventory.recategorize(self.blade)
+        self.assertEqual(self.ids("weapon"), [self.blade])
+        self.assertEqual(self.ids("consumable"), [self.tonic, self.shard])
+    
+    def test_removed_items_leave_their_category(self):
+        self.inventory.remove(self.shard)
+        self.assertEqual(self.ids("consumable"), [self.tonic])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Relationship web: an NPC's edges join the web when the player meets that NPC"""
+
+import unittest
+from unittest import mock
+
+from entity_ai import EntityAI
+from npc import NPCManager
+from player import Player
+
+class RelationshipLinkTest(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.manager = NPCManager(EntityAI())
+    
+    def setUp(self):
+        self.player = Player("Tester", "Warrior")
+        self.web = self.player.npc_relationships
+    
+    def test_meeting_links_only_that_npc(self):
+        self.manager.update_relationship_web(self.player, "Blacktongue", "greeting")
+        self.assertEqual(sorted(self.web["Blacktongue"]["allies"]), ["Faceless Merchant"])
+        self.assertEqual(sorted(self.web["Blacktongue"]["enemies"]), ["Ash Sister"])
+        # Lorekeeper's edges wait until the player meets the Lorekeeper
+        self.assertEqual(self.web["Lorekeeper"]["allies"], [])
+        self.assertEqual(self.web["Lorekeeper"]["enemies"], [])
+    
+    def test_betrayal_reaches_only_linked_npcs(self):
+        self.manager.update_relationship_web(self.player, "Blacktongue", "greeting")
+        trust_before = self.web["Lorekeeper"]["trust"]
+        with mock.patch("builtins.print"):
+            self.manager.propagate_betrayal(self.player, "Ash Sister")
+        self.assertEqual(self.web["Lorekeeper"]["trust"], trust_before)  # Ally, but not linked yet
+        
+        self.manager.update_relationship_web(self.player, "Lorekeeper", "greeting")
+        trust_before = self.web["Lorekeeper"]["trust"]
+        with mock.patch("builtins.print"):
+            self.manager.propagate_betrayal(self.player, "Ash Sister")
+        self.assertEqual(self.web["Lorekeeper"]["trust"], trust_before - 15)
+
+if __name__ == "__main__":
+    unittest.main()
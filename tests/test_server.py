@@ -0,0 +1,128 @@
+"""Session parking: an idle player gives up their thread and resumes from a snapshot"""
+
+import asyncio
+import json
+import sys
+import threading
+import unittest
+from unittest import mock
+
+import server
+from entity_ai import EntityAI
+from server import GameServer, SessionStream
+from utils import mark_resume_point
+
+PARK_AFTER_S = 0.2
+
+entity_ai = None
+
+def setUpModule():
+    global entity_ai
+    entity_ai = EntityAI()
+
+class PromptGame:
+    """Stand-in Game: two answers at a resume point, then a summary"""
+    
+    threads = []  # Game thread of every run, in order
+    
+    def __init__(self, entity_ai=None):
+        self.entity_ai = entity_ai
+        self.answers = []
+    
+    def run(self, resume: bool = False):
+        PromptGame.threads.append(threading.current_thread())
+        print("The Entity re-threads your descent..." if resume else "Welcome.")
+        while len(self.answers) < 2:
+            mark_resume_point()
+            self.answers.append(input("Choose action: "))
+        print(f"answers: {','.join(self.answers)}")
+    
+    def snapshot(self) -> bytes:
+        return json.dumps(self.answers).encode("utf-8")
+    
+    def restore(self, data: bytes):
+        self.answers = json.loads(data)
+
+class ParkingTest(unittest.TestCase):
+    
+    def setUp(self):
+        PromptGame.threads = []
+        for patcher in (mock.patch.object(server, "Game", PromptGame),
+                        mock.patch.object(sys, "stdout", SessionStream(sys.stdout)),
+                        mock.patch.object(sys, "stdin", SessionStream(sys.stdin))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    async def connect(self, game_server: GameServer):
+        listener = await asyncio.start_server(game_server.handle_client, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        return listener, reader, writer
+    
+    async def wait_parked(self, game_server: GameServer):
+        (session,) = game_server.sessions
+        for _ in range(100):
+            if session.snapshot is not None and not PromptGame.threads[-1].is_alive():
+                return session
+            await asyncio.sleep(0.05)
+        self.fail("session never parked")
+    
+    def test_park_and_resume(self):
+        async def scenario():
+            game_server = GameServer(entity_ai, park_after_s=PARK_AFTER_S)
+            listener, reader, writer = await self.connect(game_server)
+            async with listener:
+                output = await reader.readuntil(b"Choose action: ")
+                await self.wait_parked(game_server)
+                
+                writer.write(b"first\n")
+                output += await reader.readuntil(b"Choose action: ")
+                writer.write(b"second\n")
+                output += await asyncio.wait_for(reader.read(), 5)
+                writer.close()
+            return output.decode("utf-8")
+        
+        output = asyncio.run(scenario())
+        self.assertEqual(len(PromptGame.threads), 2)  # A fresh thread only once the player came back
+        self.assertIn("answers: first,second", output)
+        self.assertEqual(output.count("Welcome."), 1)
+        self.assertNotIn("re-threads", output)  # The resumed game's redraw is muted
+        self.assertEqual(output.count("Choose action: "), 2)
+    
+    def test_no_parking_when_disabled(self):
+        async def scenario():
+            game_server = GameServer(entity_ai, park_after_s=None)
+            listener, reader, writer = await self.connect(game_server)
+            async with listener:
+                await reader.readuntil(b"Choose action: ")
+                await asyncio.sleep(PARK_AFTER_S * 3)
+                (session,) = game_server.sessions
+                self.assertIsNone(session.snapshot)
+                self.assertTrue(PromptGame.threads[0].is_alive())
+                writer.write(b"first\nsecond\n")
+                output = await asyncio.wait_for(reader.read(), 5)
+                writer.close()
+            return output.decode("utf-8")
+        
+        self.assertIn("answers: first,second", asyncio.run(scenario()))
+        self.assertEqual(len(PromptGame.threads), 1)
+    
+    def test_disconnect_while_parked(self):
+        async def scenario():
+            game_server = GameServer(entity_ai, park_after_s=PARK_AFTER_S)
+            listener, reader, writer = await self.connect(game_server)
+            async with listener:
+                await reader.readuntil(b"Choose action: ")
+                session = await self.wait_parked(game_server)
+                writer.close()
+                await writer.wait_closed()
+                await asyncio.get_running_loop().run_in_executor(None, session.done.wait, 5)
+            return session
+        
+        session = asyncio.run(scenario())
+        self.assertTrue(session.done.is_set())
+        self.assertIsNone(session.snapshot)
+        self.assertEqual(len(PromptGame.threads), 1)
+
+if __name__ == "__main__":
+    unittest.main()
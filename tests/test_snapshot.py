@@ -0,0 +1,75 @@
+"""Session snapshots: a restored game matches the saved one; bad data fails as SnapshotError"""
+
+import struct
+import unittest
+
+from combat import Combat
+from entity_ai import EntityAI
+from game import Game
+from npc import NPCManager
+from player import Player
+from room import RoomManager
+from snapshot import SNAPSHOT_VERSION, T_BYTEARRAY, SnapshotError
+
+entity_ai = None
+
+def setUpModule():
+    global entity_ai
+    entity_ai = EntityAI()
+
+def new_game() -> Game:
+    """A game past character creation, without prompting for it"""
+    game = Game(entity_ai.spawn_session())
+    game.player = Player("Tester", "Warrior")
+    game.combat = Combat(game.entity_ai, game.clock)
+    game.room_manager = RoomManager(game.entity_ai)
+    game.npc_manager = NPCManager(game.entity_ai)
+    return game
+
+class SnapshotTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.game = new_game()
+        player = self.game.player
+        player.health -= 7
+        self.sword = player.inventory.add({"name": "Rusted Blade", "stats": {"damage": 4}})
+        self.potion = player.inventory.add({"name": "Bitter Tonic", "stats": {"heal": 10}})
+        player.inventory.equip("weapon", self.sword)
+        self.data = self.game.snapshot()
+    
+    def test_round_trip(self):
+        restored = Game(entity_ai.spawn_session())
+        restored.restore(self.data)
+        before, after = self.game.player, restored.player
+        self.assertEqual(after.name, before.name)
+        self.assertEqual(after.player_class, before.player_class)
+        self.assertEqual(after.health, before.health)
+        self.assertEqual(dict(after.stats.items()), dict(before.stats.items()))
+        self.assertEqual([item["name"] for item in after.inventory], ["Rusted Blade", "Bitter Tonic"])
+        self.assertEqual(after.inventory.equipped_item("weapon")["name"], "Rusted Blade")
+        self.assertEqual([item_id for item_id, _ in after.inventory.category("consumable")], [self.potion])
+        # Shared references are rebound to the restoring session, not copied
+        self.assertIs(restored.combat.entity_ai, restored.entity_ai)
+        self.assertIs(restored.room_manager.entity_ai, restored.entity_ai)
+    
+    def test_version_mismatch(self):
+        data = self.data[:3] + struct.pack("<H", SNAPSHOT_VERSION + 1) + self.data[5:]
+        with self.assertRaisesRegex(SnapshotError, "unsupported snapshot version"):
+            new_game().restore(data)
+    
+    def test_bad_magic(self):
+        with self.assertRaisesRegex(SnapshotError, "not a game snapshot"):
+            new_game().restore(b"XYZ" + self.data[3:])
+    
+    def test_truncated(self):
+        for size in (2, len(self.data) // 2, len(self.data) - 1):
+            with self.subTest(size=size), self.assertRaises(SnapshotError):
+                new_game().restore(self.data[:size])
+    
+    def test_corrupt_body(self):
+        data = self.data[:5] + bytes([T_BYTEARRAY + 1]) + self.data[6:]
+        with self.assertRaisesRegex(SnapshotError, "unknown tag"):
+            new_game().restore(data)
+
+if __name__ == "__main__":
+    unittest.main()
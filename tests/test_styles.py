@@ -0,0 +1,45 @@
+"""Style cache: only constant labels may be memoized"""
+
+import ast
+import glob
+import os
+import unittest
+
+from utils import StyleRegistry, STYLE_CACHE_SIZE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class StyleCacheTest(unittest.TestCase):
+    
+    def test_cache_only_for_string_literals(self):
+        offenders = []
+        for path in glob.glob(os.path.join(ROOT, "*.py")):
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read())
+            for node in ast.walk(tree):
+                if not isinstance(node, ast.Call):
+                    continue
+                if not any(keyword.arg == "cache" for keyword in node.keywords):
+                    continue
+                text = node.args[0] if node.args else None
+                if not (isinstance(text, ast.Constant) and isinstance(text.value, str)):
+                    offenders.append(f"{os.path.basename(path)}:{node.lineno}")
+        self.assertEqual(offenders, [])
+    
+    def test_cache_is_bounded_lru(self):
+        styles = StyleRegistry(enabled=True)
+        first = styles.colorize("label 0", "red", cache=True)
+        for i in range(1, STYLE_CACHE_SIZE + 10):
+            styles.colorize(f"label {i}", "red", cache=True)
+            styles.colorize("label 0", "red", cache=True)  # Kept warm
+        self.assertEqual(len(styles._labels), STYLE_CACHE_SIZE)
+        self.assertIs(styles.colorize("label 0", "red", cache=True), first)
+        self.assertNotIn(("label 1", styles.prefix("red", "general")), styles._labels)
+    
+    def test_uncached_calls_leave_the_cache_alone(self):
+        styles = StyleRegistry(enabled=True)
+        styles.colorize("HP 10/20", "green")
+        self.assertEqual(len(styles._labels), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""WhisperArchive: bounded in memory, complete on disk when spilled"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from entity_ai import WhisperArchive, EntityAI
+
+class WhisperSpillTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+    
+    def test_top_ranks_from_the_full_log(self):
+        archive = WhisperArchive(maxlen=2, rank_size=2, spill_path=os.path.join(self.dir.name, "w.txt.gz"))
+        for whisper in ["a"] * 3 + ["b", "c", "d"] * 2 + ["a"]:
+            archive.append(whisper)
+        self.assertEqual(archive.top(1), ["a"])
+        self.assertEqual(len(list(archive.iter_spilled())), 10)
+        archive.close()
+    
+    def test_early_stop_closes_the_log(self):
+        archive = WhisperArchive(spill_path=os.path.join(self.dir.name, "w.txt.gz"))
+        for i in range(5):
+            archive.append(f"whisper {i}")
+        lines = archive.iter_spilled()
+        self.assertEqual(next(lines), "whisper 0")
+        handle = lines.gi_frame.f_locals["f"]
+        lines.close()
+        self.assertTrue(handle.closed)
+        archive.append("after")  # Appending again starts a new gzip member
+        self.assertEqual(list(archive.iter_spilled())[-1], "after")
+        archive.close()
+    
+    def test_spill_name_leaves_the_game_rng_alone(self):
+        random.seed(7)
+        expected = random.random()
+        random.seed(7)
+        entity_ai = EntityAI(whisper_spill_dir=self.dir.name)
+        entity_ai.reset_session_state()
+        self.assertEqual(random.random(), expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,9 +5,14 @@ import threading
 import sys
 import select
 import os
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
 import numpy as np
 
+from clock import REAL_CLOCK
+from narrator import NarratorEngine
+from profiling import profiled
+
 try:
     import colorama
     from colorama import Fore, Back, Style
@@ -45,11 +50,51 @@ try:
 except (ImportError, pygame.error):
     MUSIC_AVAILABLE = False
 
+# Server mode binds each game thread to a session; the terminal game runs unbound
+_session_context = threading.local()
+
+def bind_session(session):
+    """Bind the calling thread to a server session (None to unbind)"""
+    _session_context.session = session
+
+def current_session():
+    """Session bound to the calling thread, or None in the terminal game"""
+    return getattr(_session_context, "session", None)
+
+def mark_resume_point():
+    """Flag the next input prompt as one a resumed game returns to (lets a server park idle players there)"""
+    session = current_session()
+    if session is not None:
+        session.resume_point = True
+
+class SessionLocal:
+    """Proxy to a per-session instance in server mode, or one process-wide instance otherwise"""
+    
+    def __init__(self, factory, session_factory=None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_session_factory", session_factory or factory)
+        object.__setattr__(self, "_default", factory())
+    
+    def _target(self):
+        session = current_session()
+        if session is None:
+            return self._default
+        instance = session.locals.get(self)
+        if instance is None:
+            instance = session.locals[self] = self._session_factory()
+        return instance
+    
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._target(), name, value)
+
 class MusicManager:
     """Manage background music and sound effects"""
     
-    def __init__(self):
-        self.music_enabled = MUSIC_AVAILABLE
+    def __init__(self, enabled: bool = MUSIC_AVAILABLE):
+        self.music_enabled = enabled
         self.current_track = None
         self.volume = 0.6  # Increased from 0.3 for better audibility
         self.is_playing = False
@@ -63,6 +108,7 @@ class MusicManager:
             except pygame.error:
                 pass
         
+    @profiled("audio.play_background")
     def play_background(self, track_path: str = None):
         """Play background music"""
         if not self.music_enabled:
@@ -106,6 +152,7 @@ class MusicManager:
             except pygame.error:
                 pass  # Ignore errors if music isn't paused
     
+    @profiled("audio.play_sound_effect")
     def play_sound_effect(self, sfx_name: str):
         """Play sound effect without interrupting background music"""
         if not self.music_enabled:
@@ -142,9 +189,10 @@ class MusicManager:
 class UIDistorter:
     """Handle UI distortion effects for psychological horror"""
     
-    def __init__(self):
+    def __init__(self, clock=None):
         self.distortion_active = False
         self.distortion_config = {}
+        self.clock = clock or REAL_CLOCK  # Game sessions swap in their own
         
     def apply_distortion(self, config: Dict[str, Any]):
         """Apply UI distortion configuration"""
@@ -158,24 +206,17 @@ class UIDistorter:
             
         # Glitch colors for low sanity
         if self.distortion_config.get("glitch_colors", False):
-            # Add random color codes
-            colors = [Fore.CYAN, Fore.RED, Fore.GREEN, Fore.YELLOW, Fore.MAGENTA]
-            glitched = ""
-            for char in text:
-                if random.random() < 0.1:  # 10% chance per character
-                    glitched += random.choice(colors) + char + Fore.RESET
-                else:
-                    glitched += char
-            text = glitched
+            text = glitch_text(text, 0.1)  # 10% chance per character
             
         return text
     
+    @profiled("render.delay_output")
     def delay_output(self):
         """Add delay to text output"""
         if self.distortion_active:
             delay = self.distortion_config.get("delay_ms", 0) / 1000.0
             if delay > 0:
-                time.sleep(random.uniform(0, delay))
+                self.clock.sleep(random.uniform(0, delay))
     
     def shuffle_choices(self, choices: List[str]) -> List[str]:
         """Shuffle choice order for confusion"""
@@ -215,31 +256,8 @@ class NarratorFilter:
         self.player_metrics = player_metrics
         
     def filter_text(self, text: str, context: str = "general") -> str:
-        """Filter text through Entity's perspective"""
-        if self.tone_bias < 0.3:
-            # Respectful/eerie tone
-            if context == "combat":
-                text = f"⚔️  {text}"
-            elif context == "lore":
-                text = f"✦ {text}"
-            return text
-            
-        elif self.tone_bias < 0.7:
-            # Neutral with hints of manipulation
-            if "fail" in text.lower() or "death" in text.lower():
-                text = text.replace("You", "The wanderer")
-            return text
-            
-        else:
-            # Mocking/gaslighting tone
-            if context == "combat" and "miss" in text.lower():
-                text += " How... predictable."
-            elif context == "flee" and self.player_metrics.get("flee_count", 0) > 3:
-                text += " The paths remember your cowardice."
-            elif context == "death":
-                text = text.replace("You died", "Compiled. Again.")
-                
-        return text
+        """Filter text through Entity's perspective (rules in narrator.NARRATOR_RULES)"""
+        return narrator_engine.apply(self.tone_bias, text, context, self.player_metrics)
     
     def add_whisper(self, whisper: str) -> str:
         """Add Entity whisper to text"""
@@ -247,41 +265,46 @@ class NarratorFilter:
             return f"{Fore.CYAN}「 {whisper} 」{Fore.RESET}"
         return ""
 
+narrator_engine = NarratorEngine()  # Compiled once; stateless apart from its memo, so sessions share it
+
 class TimedInputManager:
     """Handle timed input with threading"""
     
-    def __init__(self):
+    def __init__(self, clock=None):
         self.input_received = None
+        self.input_ready = threading.Event()  # Set by the input thread once input_received is filled
         self.time_limit = 8
         self.input_thread = None
+        self.clock = clock or REAL_CLOCK  # Game sessions swap in their own
         
+    @profiled("input.timed")
     def get_timed_input(self, prompt: str, choices: List[str], time_limit: int = 8) -> Optional[str]:
         """Get user input within time limit"""
         self.time_limit = time_limit
         self.input_received = None
+        self.input_ready.clear()
         
         print(f"{prompt}")
         for i, choice in enumerate(choices):
             print(f"  {choice}")
         print(f"Time limit: {time_limit}s")
         
-        # Start input thread
-        self.input_thread = threading.Thread(target=self._get_input)
+        # Start input thread (bound to the same session as the caller in server mode)
+        started = self.clock.now()
+        self.input_thread = threading.Thread(target=self._get_input, args=(current_session(),))
         self.input_thread.daemon = True
         self.input_thread.start()
         
-        # Wait for input or timeout
-        start_time = time.time()
-        while time.time() - start_time < time_limit:
-            if self.input_received is not None:
-                return self.input_received
-            time.sleep(0.1)
+        # Wait for input or timeout (simulated time under a VirtualClock)
+        if self.clock.wait(self.input_ready, time_limit, started) and self.input_received is not None:
+            return self.input_received
             
         print(f"\n{Fore.RED}⏰ Time's up! No action taken.{Fore.RESET}")
         return None
     
-    def _get_input(self):
+    def _get_input(self, session=None):
         """Thread function to get input"""
+        bind_session(session)
         try:
             if sys.platform == "win32":
                 # Windows implementation
@@ -297,28 +320,107 @@ class TimedInputManager:
                 self.input_received = sys.stdin.readline().strip().lower()
         except:
             self.input_received = ""
+        finally:
+            self.input_ready.set()
+
+PACING_MODES = ("interactive", "auto", "coalesce", "skip")
+
+class Pacer:
+    """Decide what a 'Press Enter' pause costs: a blocking read, a short delay, or nothing"""
+    
+    def __init__(self, mode: str = "interactive", auto_advance_ms: int = 1500, coalesce_ms: int = 250,
+                 clock=None):
+        self.clock = clock or REAL_CLOCK  # Game sessions swap in their own
+        self.last_pause_end = None  # Clock time the last blocking pause returned
+        self.pauses = 0  # Pauses requested
+        self.reads = 0  # Pauses that actually waited for the player
+        self.configure(mode, auto_advance_ms, coalesce_ms)
+    
+    def configure(self, mode: str, auto_advance_ms: Optional[int] = None, coalesce_ms: Optional[int] = None):
+        """interactive: always wait; auto: continue by itself after auto_advance_ms;
+        coalesce: a pause right after another (within coalesce_ms, so nothing was typed
+        in between) is dropped; skip: never pause (simulations, server sessions)"""
+        if mode not in PACING_MODES:
+            raise ValueError(f"unknown pacing mode {mode!r} (expected one of {', '.join(PACING_MODES)})")
+        self.mode = mode
+        if auto_advance_ms is not None:
+            self.auto_advance_ms = auto_advance_ms
+        if coalesce_ms is not None:
+            self.coalesce_ms = coalesce_ms
+    
+    def pause(self, message: str):
+        self.pauses += 1
+        if self.mode == "skip":
+            return
+        if self.mode == "auto":
+            print(f"\n{colorize_text(message, 'cyan')}")
+            self.clock.sleep(self.auto_advance_ms / 1000.0)
+            return
+        if (self.mode == "coalesce" and self.last_pause_end is not None
+                and (self.clock.now() - self.last_pause_end) * 1000.0 <= self.coalesce_ms):
+            return
+        input(f"\n{colorize_text(message, 'cyan')}")
+        self.reads += 1
+        self.last_pause_end = self.clock.now()
 
-def colorize_text(text: str, color: str = "white", context: str = "general") -> str:
-    """Add color to text based on context"""
-    if not COLORS_AVAILABLE:
+STYLE_CACHE_SIZE = 512  # Colorized static labels kept, least recently used evicted first
+
+class StyleRegistry:
+    """ANSI prefixes per style, resolved once, and an LRU cache of colorized static labels"""
+    
+    def __init__(self, enabled: bool = COLORS_AVAILABLE and not os.environ.get("NO_COLOR")):
+        self.enabled = enabled  # False: colorize_text returns text untouched (simulations, plain clients)
+        self.prefixes = {
+            "lore": Fore.CYAN,
+            "boss": Fore.RED + Style.BRIGHT,
+            "npc": Fore.GREEN,
+            "item": Fore.YELLOW,
+            "warning": Fore.MAGENTA,
+            "whisper": Fore.CYAN + Style.DIM,
+            "death": Fore.RED + Back.BLACK,
+            "success": Fore.GREEN + Style.BRIGHT,
+            "white": Fore.WHITE,
+            "red": Fore.RED,
+            "cyan": Fore.CYAN
+        }
+        self.reset = Style.RESET_ALL
+        self._resolved = {}  # (context, color) -> prefix
+        self._labels = OrderedDict()  # (text, prefix) -> colorized text, for callers passing cache=True
+    
+    def prefix(self, color: str, context: str) -> str:
+        """Escape prefix for a color/context pair (context wins, unknown names are white)"""
+        key = (context, color)
+        prefix = self._resolved.get(key)
+        if prefix is None:
+            prefix = self._resolved[key] = self.prefixes.get(context, self.prefixes.get(color, Fore.WHITE))
+        return prefix
+    
+    def colorize(self, text: str, color: str = "white", context: str = "general", cache: bool = False) -> str:
+        """Wrap text in its style; cache=True memoizes it (string-literal labels only)"""
+        prefix = self.prefix(color, context)
+        if not cache:
+            return f"{prefix}{text}{self.reset}"
+        key = (text, prefix)
+        colorized = self._labels.get(key)
+        if colorized is None:
+            colorized = self._labels[key] = f"{prefix}{text}{self.reset}"
+            if len(self._labels) > STYLE_CACHE_SIZE:
+                self._labels.popitem(last=False)
+        else:
+            self._labels.move_to_end(key)
+        return colorized
+
+styles = StyleRegistry()
+
+def set_color_enabled(enabled: bool):
+    """Turn ANSI colors on or off for the whole process"""
+    styles.enabled = enabled and COLORS_AVAILABLE
+
+def colorize_text(text: str, color: str = "white", context: str = "general", cache: bool = False) -> str:
+    """Add color to text based on context (cache=True only for string literals redrawn every screen)"""
+    if not styles.enabled:
         return text
-        
-    color_map = {
-        "lore": Fore.CYAN,
-        "boss": Fore.RED + Style.BRIGHT,
-        "npc": Fore.GREEN,
-        "item": Fore.YELLOW,
-        "warning": Fore.MAGENTA,
-        "whisper": Fore.CYAN + Style.DIM,
-        "death": Fore.RED + Back.BLACK,
-        "success": Fore.GREEN + Style.BRIGHT,
-        "white": Fore.WHITE,
-        "red": Fore.RED,
-        "cyan": Fore.CYAN
-    }
-    
-    chosen_color = color_map.get(context, color_map.get(color, Fore.WHITE))
-    return f"{chosen_color}{text}{Style.RESET_ALL}"
+    return styles.colorize(text, color, context, cache)
 
 def create_ascii_border(text: str, char: str = "═") -> str:
     """Create ASCII border around text"""
@@ -335,28 +437,70 @@ def create_ascii_border(text: str, char: str = "═") -> str:
     result.append(f"╚{border}╝")
     return '\n'.join(result)
 
+# Text distortion: one NumPy mask per string, output joined from slices. Each text has
+# DISTORTION_VARIANTS cached patterns and a frame shows a random one of them, so redrawing
+# the same screen costs a dict lookup.
+DISTORTION_VARIANTS = 8
+DISTORTION_CACHE_SIZE = 256  # Dropped wholesale when full
+GLITCH_COLORS = (Fore.CYAN, Fore.RED, Fore.GREEN, Fore.YELLOW, Fore.MAGENTA)
+
+# Private streams for patterns and variant picks: redraws never touch random/np.random
+_distortion_rng = np.random.default_rng()
+_variant_rng = random.Random()
+_distortions = {}  # (effect, hash(text), rate, variant) -> (text, distorted text)
+
+def _distorted(effect, text: str, rate: float) -> str:
+    key = (effect, hash(text), rate, _variant_rng.randrange(DISTORTION_VARIANTS))
+    cached = _distortions.get(key)
+    if cached is not None and cached[0] == text:  # Guards against hash collisions
+        return cached[1]
+    if len(_distortions) >= DISTORTION_CACHE_SIZE:
+        _distortions.clear()
+    distorted = effect(text, rate)
+    _distortions[key] = (text, distorted)
+    return distorted
+
+def _glitch(text: str, rate: float) -> str:
+    positions = np.flatnonzero(_distortion_rng.random(len(text)) < rate).tolist()
+    colors = _distortion_rng.integers(len(GLITCH_COLORS), size=len(positions)).tolist()
+    parts = []
+    start = 0
+    for position, color in zip(positions, colors):
+        parts += (text[start:position], GLITCH_COLORS[color], text[position], Fore.RESET)
+        start = position + 1
+    parts.append(text[start:])
+    return "".join(parts)
+
+def _wobble(text: str, intensity: float) -> str:
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    positions = np.flatnonzero((_distortion_rng.random(len(text)) < intensity) & (codes != 32)).tolist()
+    duplicate = (_distortion_rng.random(len(positions)) < 0.5).tolist()
+    parts = []
+    start = 0
+    for position, dup in zip(positions, duplicate):
+        # Duplicate the character or add a space after it
+        parts += (text[start:position + 1], text[position] if dup else " ")
+        start = position + 1
+    parts.append(text[start:])
+    return "".join(parts)
+
+def glitch_text(text: str, rate: float = 0.1) -> str:
+    """Wrap random characters in glitch colors"""
+    if rate <= 0 or not text:
+        return text
+    return _distorted(_glitch, text, rate)
+
 def wobble_text(text: str, intensity: float = 0.3) -> str:
     """Create wobbling text effect for low sanity"""
-    if intensity <= 0:
+    if intensity <= 0 or not text:
         return text
-        
-    wobbled = ""
-    for char in text:
-        if random.random() < intensity and char != ' ':
-            # Add space or duplicate character
-            if random.random() < 0.5:
-                wobbled += char + char  # Duplicate
-            else:
-                wobbled += char + " "   # Add space
-        else:
-            wobbled += char
-    
-    return wobbled
+    return _distorted(_wobble, text, intensity)
 
+@profiled("render.format_stats_display")
 def format_stats_display(player) -> str:
     """Format player stats for display"""
     # Build stats display without embedded colors to prevent ANSI issues
-    header = colorize_text('═══ CHARACTER STATUS ═══', 'green')
+    header = colorize_text('═══ CHARACTER STATUS ═══', 'green', cache=True)
     name_class = f"Name: {player.name} | Class: {player.player_class}"
     floor_deaths = f"Floor: {player.floor} | Deaths: {player.deaths}"
     
@@ -424,15 +568,16 @@ Floor Reached: {metrics.get('floor_reached', 1)}
     
     return ending_text
 
-def save_whisper_archive(whispers: List[str]):
+def save_whisper_archive(whispers):
     """Save top whispers to console log"""
     if not whispers:
         return
         
     print(f"\n{colorize_text('═══ ENTITY WHISPER ARCHIVE ═══', 'cyan')}")
     
-    # Show top 3 whispers
-    for i, whisper in enumerate(whispers[-3:], 1):
+    # Show top 3 whispers (most repeated when the archive keeps a ranking)
+    top_whispers = whispers.top(3) if hasattr(whispers, "top") else list(whispers)[-3:]
+    for i, whisper in enumerate(top_whispers, 1):
         print(f"{i}. {colorize_text(whisper, context='whisper')}")
     
     print(f"\n{colorize_text('These whispers are yours to keep.', 'white')}")
@@ -466,16 +611,22 @@ def one_hot_encode_class(player_class: str) -> List[float]:
     
     return encoding
 
+@profiled("render.clear_screen")
 def clear_screen():
     """Clear the terminal screen"""
+    if current_session() is not None:
+        print("\033[2J\033[H", end="")  # Remote session - clear the client's terminal, not ours
+        return
     os.system('cls' if os.name == 'nt' else 'clear')
 
+@profiled("input.press_enter")
 def press_enter_to_continue(message: str = "Press Enter to continue..."):
-    """Wait for user to press enter"""
-    input(f"\n{colorize_text(message, 'cyan')}")
-
-# Global instances
-music_manager = MusicManager()
-ui_distorter = UIDistorter()
-narrator_filter = NarratorFilter()
-input_manager = TimedInputManager()
+    """Wait for user to press enter (or not, depending on the session's pacing mode)"""
+    pacer.pause(message)
+
+# Global instances (one per session in server mode, where music stays off)
+music_manager = SessionLocal(MusicManager, lambda: MusicManager(enabled=False))
+ui_distorter = SessionLocal(UIDistorter)
+narrator_filter = SessionLocal(NarratorFilter)
+input_manager = SessionLocal(TimedInputManager)
+pacer = SessionLocal(Pacer, lambda: Pacer("skip"))  # Remote pauses would each cost a client round trip